@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Slow client handling for the chat server
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import time
+
+POLICIES = ('drop-oldest', 'coalesce', 'disconnect')
+DEFAULT_POLICY = 'coalesce'
+
+class BackpressurePolicy:
+    """Send-buffer watermarks shared by every connection, and what to do above them
+    
+    A connection is over the limit once its queued bytes pass the high
+    watermark and stays so until its writer drains it below the low
+    watermark. While it is over the limit:
+    
+    drop-oldest  drop the oldest queued frames down to the low watermark
+    coalesce     replace everything queued with one "messages skipped" notice
+    disconnect   keep queuing, but disconnect after grace seconds (or at
+                 four times the high watermark, whichever comes first)
+    """
+    
+    def __init__(self, policy=DEFAULT_POLICY, high_watermark=256 * 1024, low_watermark=64 * 1024, grace=10.0):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown backpressure policy: {policy}")
+        if not 0 <= low_watermark < high_watermark:
+            raise ValueError("the low watermark must be below the high watermark")
+        self.policy = policy
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.grace = grace
+        
+        # Counters for the server log view
+        self.dropped = 0
+        self.coalesced = 0
+        self.disconnected = 0
+    
+    def counters(self):
+        """Return (dropped, coalesced, disconnected)"""
+        return self.dropped, self.coalesced, self.disconnected
+    
+    def relieve(self, outbox):
+        """Apply the policy to an outbox above the high watermark; returns False to disconnect"""
+        now = time.monotonic()
+        if outbox.over_since is None:
+            outbox.over_since = now
+            
+        if self.policy == 'drop-oldest':
+            self.dropped += outbox.drop_oldest(self.low_watermark)
+        elif self.policy == 'coalesce':
+            self.coalesced += outbox.coalesce()
+        elif now - outbox.over_since > self.grace or outbox.size > 4 * self.high_watermark:
+            self.disconnected += 1
+            return False
+        return True
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Micro-batching of the frames written to clients
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import socket
+
+DEFAULT_WINDOW = 0.0             # seconds frames may wait for more to go out with them, 0 to write at once
+DEFAULT_BATCH_BYTES = 16 * 1024  # queued bytes that are written without waiting for the window to end
+
+class BatchPolicy:
+    """How long the engines hold frames for a client before writing them
+    
+    The engines always write everything queued for a client with one
+    system call. With a window, a client's first queued frame also waits
+    up to window seconds for others to join it, unless batch_bytes are
+    queued before then: a burst of chat then reaches each client in a few
+    large writes instead of one small one per message, at the cost of up to
+    window seconds of latency.
+    
+    Batching is done here rather than by Nagle's algorithm, so client
+    sockets get TCP_NODELAY: a write leaves as soon as the engine makes it
+    instead of waiting for the client to acknowledge the previous one.
+    """
+    
+    def __init__(self, window=DEFAULT_WINDOW, batch_bytes=DEFAULT_BATCH_BYTES):
+        if window < 0:
+            raise ValueError("the batching window cannot be negative")
+        if batch_bytes < 1:
+            raise ValueError("the batch size must be at least one byte")
+        self.window = window  # 0: no micro-batching
+        self.batch_bytes = batch_bytes
+    
+    def configure(self, sock):
+        """Turn off Nagle's algorithm for a newly accepted connection"""
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            pass
@@ -0,0 +1,774 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Load generator and latency benchmark for the chat server
+
+Simulates many headless clients that speak the same protocol as ChatClient
+(nickname frame, then text frames) from one event loop, and measures
+connection setup time, broadcast fan-out latency, throughput, bytes on the
+wire and the CPU and memory used by the server (with its worker processes).
+The clients can be spread over several load generator processes, so the
+generator does not run out of CPU before a multi-process server does.
+Results are written as JSON so runs against different engines, compression
+settings, batching windows or commits can be compared. Spawned servers also
+report the writes they made to clients, which shows how far batching cut
+them down for the latency it added.
+
+With TLS the clients also time their handshakes, and after the load they
+all drop their connections and reconnect at once offering their sessions,
+which shows how many resume and what the storm, with dropping the old
+connections, costs the server in CPU.
+Spawned servers get a throwaway self-signed certificate.
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import selectors
+import socket
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from array import array
+
+from compression import CAPABILITY, Deflater, Inflater
+from protocol import (
+    CHAT_HEADER, MSG_CHAT, MSG_EXIT, MSG_HELLO, MSG_PING, MSG_PONG, MSG_REPLAY, MSG_TEXT, MSG_WELCOME, MSG_ZLIB,
+    FrameParser, decode_json, encode_frame, encode_json
+)
+from server_engine import ENGINES
+from tls import client_context, generate_certificate
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server_headless.py')
+
+# Spawned servers measure the engine, not the flood protection; --server-arg can turn the rate limits back on
+UNLIMITED = ['--client-rate', '0', '--client-byte-rate', '0', '--room-rate', '0', '--room-byte-rate', '0']
+
+# Metrics compared against a baseline: (section, key, higher is better)
+COMPARED = (
+    ('latency_ms', 'p50', False),
+    ('latency_ms', 'p99', False),
+    ('latency_ms', 'p999', False),
+    ('connect_ms', 'p99', False),
+    ('handshake_ms', 'p99', False),
+    ('resume_ms', 'p99', False),
+    ('throughput', 'deliveries_per_s', True),
+    ('throughput', 'bytes_per_s', False),
+    ('throughput', 'sent_bytes_per_s', False),
+    ('server', 'cpu_percent', False),
+    ('server', 'writes_per_s', False),
+    ('server', 'peak_rss_kb', False),
+    ('server', 'connect_cpu_s', False),
+    ('server', 'reconnect_cpu_s', False),
+)
+
+# Times generate() calls its phase callback: clients connected, load done, clients reconnected
+PHASES = 3
+
+# Message text is made of these words, so compression sees something like chat rather than padding
+WORDS = (
+    'the you and that this have for with what are not just can will hello thanks please sorry okay yes no '
+    'lol meeting lunch today tomorrow build server client room message file send link check done later '
+    'network wifi printer update restart password coffee office home team project deadline review'
+).split()
+
+def percentiles(values, scale=1.0):
+    """Summarize a sequence of numbers as p50/p99/p999/max/mean"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    pick = lambda q: round(ordered[min(last, int(q * len(ordered)))] * scale, 3)
+    return {
+        'p50': pick(0.50),
+        'p99': pick(0.99),
+        'p999': pick(0.999),
+        'max': round(ordered[last] * scale, 3),
+        'mean': round(sum(ordered) / len(ordered) * scale, 3),
+        'count': len(ordered),
+    }
+
+class ProcessStats:
+    """CPU time and memory of another process and its children, read from /proc where available"""
+    
+    def __init__(self, pid):
+        self.pid = pid
+        self.ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+    
+    def pids(self):
+        """The process and its child processes, such as the workers of a multi-process server"""
+        pids = [self.pid]
+        try:
+            for task in os.listdir(f'/proc/{self.pid}/task'):
+                with open(f'/proc/{self.pid}/task/{task}/children') as f:
+                    pids.extend(int(pid) for pid in f.read().split())
+        except OSError:
+            pass
+        return pids
+    
+    def cpu_seconds(self):
+        total = None
+        for pid in self.pids():
+            try:
+                with open(f'/proc/{pid}/stat') as f:
+                    fields = f.read().rsplit(')', 1)[1].split()
+            except OSError:
+                continue
+            total = (total or 0) + (int(fields[11]) + int(fields[12])) / self.ticks  # utime + stime
+        return total
+    
+    def memory_kb(self):
+        """Return (rss, peak rss) in KiB, summed over the processes"""
+        values = {}
+        for pid in self.pids():
+            try:
+                with open(f'/proc/{pid}/status') as f:
+                    for line in f:
+                        key, _, value = line.partition(':')
+                        if key in ('VmRSS', 'VmHWM'):
+                            values[key] = values.get(key, 0) + int(value.split()[0])
+            except OSError:
+                continue
+        return values.get('VmRSS'), values.get('VmHWM')
+
+def server_writes(metrics_addr):
+    """Return the send calls a spawned server made to its clients so far, or None if its metrics cannot be read"""
+    try:
+        with urllib.request.urlopen(f"http://{metrics_addr[0]}:{metrics_addr[1]}/metrics.json", timeout=10) as response:
+            return json.load(response)['counters']['send_calls']
+    except (OSError, ValueError, KeyError):
+        return None
+
+class SimClient:
+    """One simulated chat client"""
+    
+    __slots__ = ('index', 'sock', 'parser', 'outbuf', 'connect_start', 'connected', 'handshake_start', 'handshaking',
+                 'session', 'next_send', 'seq', 'words', 'inflater', 'inflated', 'deflater')
+    
+    def __init__(self, index, sock, session=None):
+        self.index = index
+        self.sock = sock
+        self.parser = FrameParser()
+        self.outbuf = bytearray()
+        self.connect_start = time.perf_counter()
+        self.connected = False
+        self.handshake_start = None
+        self.handshaking = False
+        self.session = session  # TLS session offered to the server
+        self.next_send = None
+        self.seq = 0
+        self.words = random.Random(index)
+        self.inflater = None  # set when the server accepted compression
+        self.inflated = FrameParser()
+        self.deflater = None
+    
+    def queue(self, frame):
+        """Add a frame to the output buffer, compressed once compression is on"""
+        if self.deflater is not None:
+            frame = self.deflater.pack([frame]) or frame
+        self.outbuf += frame
+
+class LoadGenerator:
+    """Drives simulated clients from one selectors event loop
+    
+    With several load generator processes, each drives the clients whose
+    index is part modulo parts, and totals holds (expected, delivered,
+    finished sending) of every process so they wait for each other's
+    deliveries.
+    """
+    
+    def __init__(
+        self, addr, clients, senders, rate, size, rooms=1, compress=False, part=0, parts=1, totals=None, tls=None
+    ):
+        self.addr = addr
+        self.clients = clients
+        self.indexes = range(part, clients, parts)
+        self.part = part
+        self.totals = totals
+        self.senders = min(senders, clients)
+        self.rooms = rooms  # client i is in room i % rooms
+        self.room_sizes = [len(range(room, clients, rooms)) for room in range(rooms)]
+        self.rate = rate
+        self.size = size
+        self.compress = compress  # offer the zlib capability in the handshake
+        self.tls = tls  # ssl.SSLContext the clients connect with, None for plain TCP
+        self.selector = selectors.DefaultSelector()
+        self.sims = []
+        self.ready = 0  # clients done connecting
+        self.reconnecting = False
+        self.connect_times = array('d')
+        self.handshake_times = array('d')
+        self.resume_times = array('d')  # handshakes when reconnecting
+        self.resumed = 0
+        self.latencies = array('q')  # ns
+        self.sent = 0
+        self.expected = 0  # deliveries the messages sent so far should cause
+        self.delivered = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.measuring = False
+        self.finished = False  # done sending
+    
+    def connect_all(self, timeout=30.0, sessions=None):
+        """Open every connection without blocking and send the nicknames, or only do the TLS handshakes when reconnecting"""
+        for index in self.indexes:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            sock.connect_ex(self.addr)
+            sim = SimClient(index, sock, sessions and sessions[index])
+            self.sims.append(sim)
+            self.selector.register(sock, selectors.EVENT_WRITE, sim)
+            
+        deadline = time.perf_counter() + timeout
+        while self.ready < len(self.indexes):
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f"only {self.ready} of {len(self.indexes)} clients connected")
+            self.poll(0.1)
+    
+    def reconnect_all(self, timeout=30.0):
+        """Drop every TLS connection and open them again at once, offering the sessions of the dropped ones"""
+        sessions = {sim.index: sim.sock.session for sim in self.sims}
+        for sim in self.sims:
+            self.selector.unregister(sim.sock)
+            sim.sock.close()
+        self.sims = []
+        self.ready = 0
+        self.reconnecting = True
+        self.connect_all(timeout, sessions)
+    
+    def poll(self, timeout):
+        """Handle socket events for up to timeout seconds"""
+        for key, mask in self.selector.select(timeout):
+            sim = key.data
+            if not sim.connected:
+                error = sim.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if error:
+                    raise OSError(error, os.strerror(error))
+                sim.connected = True
+                self.connect_times.append(time.perf_counter() - sim.connect_start)
+                if self.tls is not None:
+                    self.start_tls(sim)
+                else:
+                    self.hello(sim)
+                continue
+            if sim.handshaking:
+                self.handshake(sim)
+                continue
+            if mask & selectors.EVENT_WRITE:
+                self.write(sim)
+            if mask & selectors.EVENT_READ:
+                self.read(sim)
+        if self.totals is not None:
+            base = 3 * self.part
+            self.totals[base:base + 3] = [self.expected, self.delivered, self.finished]
+    
+    def hello(self, sim):
+        """Send the nickname, and the room to enter first"""
+        self.ready += 1
+        if self.rooms > 1:
+            sim.outbuf += encode_json(MSG_REPLAY, room=f"bench{sim.index % self.rooms}")
+        sim.outbuf += encode_json(MSG_HELLO, nickname=f"bench{sim.index}", caps=[CAPABILITY] if self.compress else [])
+        self.write(sim)
+    
+    def start_tls(self, sim):
+        self.selector.unregister(sim.sock)
+        sim.sock = self.tls.wrap_socket(
+            sim.sock, server_hostname=self.addr[0], do_handshake_on_connect=False, session=sim.session
+        )
+        sim.handshaking = True
+        sim.handshake_start = time.perf_counter()
+        self.selector.register(sim.sock, selectors.EVENT_READ, sim)
+        self.handshake(sim)
+    
+    def handshake(self, sim):
+        try:
+            sim.sock.do_handshake()
+        except ssl.SSLWantReadError:
+            events = selectors.EVENT_READ
+        except ssl.SSLWantWriteError:
+            events = selectors.EVENT_READ | selectors.EVENT_WRITE
+        else:
+            sim.handshaking = False
+            elapsed = time.perf_counter() - sim.handshake_start
+            if not self.reconnecting:
+                self.handshake_times.append(elapsed)
+                self.hello(sim)
+                return
+            # Reconnecting clients only measure the handshake and stay silent from then on
+            self.resume_times.append(elapsed)
+            self.resumed += sim.sock.session_reused
+            self.ready += 1
+            self.selector.unregister(sim.sock)
+            return
+        self.selector.modify(sim.sock, events, sim)
+    
+    def read(self, sim):
+        while True:
+            try:
+                received = sim.parser.recv_into(sim.sock)
+            except ssl.SSLWantReadError:
+                return
+            if not received:
+                raise ConnectionError(f"server closed the connection of bench{sim.index}")
+            now = time.perf_counter_ns()
+            self.bytes_received += received
+            for msg_type, payload in sim.parser.frames():
+                if msg_type == MSG_ZLIB and sim.inflater is not None:
+                    sim.inflated.feed(sim.inflater.unpack(payload))
+                    for inner_type, inner_payload in sim.inflated.frames():
+                        self.deliver(sim, now, inner_type, inner_payload)
+                elif msg_type == MSG_WELCOME:
+                    if CAPABILITY in decode_json(payload).get('caps', ()):
+                        sim.inflater = Inflater()
+                        sim.deflater = Deflater()
+                else:
+                    self.deliver(sim, now, msg_type, payload)
+            # TLS may hold decrypted data the selector knows nothing about
+            if self.tls is None or not sim.sock.pending():
+                return
+    
+    def deliver(self, sim, now, msg_type, payload):
+        if msg_type == MSG_PING:
+            # Receivers are silent, the server pings them during long runs
+            sim.queue(encode_frame(MSG_PONG))
+            self.write(sim)
+            return
+        if msg_type != MSG_CHAT or not self.measuring:
+            return
+        # "benchN: <sent at ns> <words>"
+        fields = bytes(payload[CHAT_HEADER.size:CHAT_HEADER.size + 64]).split(b' ', 2)
+        if len(fields) > 1 and fields[1].isdigit():
+            self.latencies.append(now - int(fields[1]))
+            self.delivered += 1
+    
+    def write(self, sim):
+        if sim.outbuf:
+            try:
+                sent = sim.sock.send(sim.outbuf)
+                del sim.outbuf[:sent]
+                self.bytes_sent += sent
+            except (BlockingIOError, ssl.SSLWantReadError, ssl.SSLWantWriteError):
+                pass  # TLS goes on with the same bytes next time, which the buffer still starts with
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if sim.outbuf else 0)
+        self.selector.modify(sim.sock, events, sim)
+    
+    def send_due(self, now):
+        """Send a message from every sender whose turn has come; returns the next due time"""
+        interval = 1.0 / self.rate
+        next_due = now + interval
+        for sim in self.sims:
+            if sim.index >= self.senders:
+                break
+            if sim.next_send is None:
+                # Spread the senders evenly over one interval
+                sim.next_send = now + interval * sim.index / self.senders
+            if sim.next_send <= now:
+                sim.queue(encode_frame(MSG_TEXT, self.message_text(sim)))
+                self.write(sim)
+                sim.seq += 1
+                self.sent += 1
+                self.expected += self.room_sizes[sim.index % self.rooms] - 1
+                sim.next_send += interval
+            next_due = min(next_due, sim.next_send)
+        return next_due
+    
+    def message_text(self, sim):
+        """Return "<perf_counter_ns> <words>" of at least size bytes"""
+        text = str(time.perf_counter_ns())
+        while len(text) < self.size:
+            text += ' ' + sim.words.choice(WORDS)
+        return text
+    
+    def run(self, warmup, duration, drain):
+        """Send for duration seconds after warmup, then wait drain seconds for stragglers"""
+        end = time.perf_counter() + warmup
+        while time.perf_counter() < end:
+            self.poll(0.05)
+            
+        self.measuring = True
+        start = time.perf_counter()
+        end = start + duration
+        now = start
+        while now < end:
+            next_due = self.send_due(now)
+            self.poll(max(0.0, min(next_due, end) - time.perf_counter()))
+            now = time.perf_counter()
+        elapsed = now - start
+        self.finished = True
+        
+        end = time.perf_counter() + drain
+        while self.waiting() and time.perf_counter() < end:
+            self.poll(0.05)
+        return elapsed
+    
+    def waiting(self):
+        """Return True while any load generator process still sends or expects deliveries"""
+        if self.totals is None:
+            return self.delivered < self.expected
+        totals = self.totals[:]
+        return not all(totals[2::3]) or sum(totals[1::3]) < sum(totals[0::3])
+    
+    def close(self):
+        for sim in self.sims:
+            try:
+                sim.sock.setblocking(True)
+                sim.sock.sendall(encode_frame(MSG_EXIT))
+            except OSError:
+                pass
+            sim.sock.close()
+        self.selector.close()
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def spawn_server(engine, port, metrics_port, extra_args):
+    """Start server_headless.py and wait until it accepts connections and serves its metrics"""
+    command = [sys.executable, SERVER_SCRIPT, '--host', '127.0.0.1', '--port', str(port), '--engine', engine,
+               '--metrics-port', str(metrics_port), '--log-level', 'warning'] + UNLIMITED + extra_args
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            for listening in (port, metrics_port):
+                socket.create_connection(('127.0.0.1', listening), timeout=0.2).close()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with code {process.returncode}")
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("server did not start listening")
+
+def tls_context(args):
+    """Return the SSLContext of the clients: trusting --tls-ca, or else checking nothing, which only a benchmark may do"""
+    if args.tls_ca:
+        return client_context(args.tls_ca)
+    context = client_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+def generate(args, addr, compress, tls, phase, part=0, totals=None):
+    """Drive one load generator's share of the clients; returns its raw measurements
+    
+    phase() is called PHASES times: once the clients are connected, right
+    before the warmup; once the load is done; and once they reconnected,
+    which they only do with TLS.
+    """
+    generator = LoadGenerator(
+        addr, args.clients, args.senders, args.rate, args.size, args.rooms, compress, part, args.processes, totals,
+        tls_context(args) if tls else None
+    )
+    cpu = time.process_time()
+    try:
+        generator.connect_all()
+        phase()
+        elapsed = generator.run(args.warmup, args.duration, args.drain)
+        phase()
+        if tls:
+            generator.reconnect_all()
+        phase()
+    finally:
+        generator.close()
+    return {
+        'elapsed': elapsed,
+        'connect_times': generator.connect_times,
+        'handshake_times': generator.handshake_times,
+        'resume_times': generator.resume_times,
+        'resumed': generator.resumed,
+        'latencies': generator.latencies,
+        'sent': generator.sent,
+        'expected': generator.expected,
+        'delivered': generator.delivered,
+        'bytes_received': generator.bytes_received,
+        'bytes_sent': generator.bytes_sent,
+        'cpu_s': time.process_time() - cpu,
+    }
+
+def generate_part(results, args, addr, compress, tls, barrier, part, totals):
+    """Load generator process: put the measurements or the error on results"""
+    try:
+        results.put(generate(args, addr, compress, tls, barrier.wait, part, totals))
+    except BaseException as e:
+        barrier.abort()
+        results.put(e)
+
+def generate_parallel(args, addr, compress, tls, phase):
+    """Drive the clients from args.processes load generator processes; returns their measurements"""
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(args.processes + 1)
+    totals = context.Array('q', 3 * args.processes, lock=False)
+    results = context.Queue()
+    processes = [
+        context.Process(
+            target=generate_part, args=(results, args, addr, compress, tls, barrier, part, totals), daemon=True
+        )
+        for part in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for _ in range(PHASES):
+            barrier.wait()
+            phase()
+    except threading.BrokenBarrierError:
+        pass  # a process failed, its error is on the queue
+    measurements = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    for measurement in measurements:
+        if isinstance(measurement, BaseException):
+            raise measurement
+    return measurements
+
+def run_once(
+    args, addr, server_pid=None, engine=None, compress=False, workers=0, batch_window=0.0, metrics_addr=None, tls=False
+):
+    """Run one measurement and return its result dict"""
+    stats = ProcessStats(server_pid) if server_pid else None
+    cpu_marks, write_marks = [], []  # server CPU seconds and writes before connecting and after every phase
+    
+    def phase():
+        cpu_marks.append(stats.cpu_seconds() if stats else None)
+        write_marks.append(server_writes(metrics_addr) if metrics_addr else None)
+        
+    phase()
+    if args.processes > 1:
+        measurements = generate_parallel(args, addr, compress, tls, phase)
+    else:
+        measurements = [generate(args, addr, compress, tls, phase)]
+    connected, loaded, reconnected = range(1, PHASES + 1)
+    
+    def spent(marks, start, end):
+        return marks[end] - marks[start] if marks[start] is not None and marks[end] is not None else None
+    
+    connect_times, handshake_times, resume_times, latencies = array('d'), array('d'), array('d'), array('q')
+    for measurement in measurements:
+        connect_times.extend(measurement['connect_times'])
+        handshake_times.extend(measurement['handshake_times'])
+        resume_times.extend(measurement['resume_times'])
+        latencies.extend(measurement['latencies'])
+    total = lambda key: sum(measurement[key] for measurement in measurements)
+    elapsed = max(measurement['elapsed'] for measurement in measurements)
+    expected = total('expected')
+    result = {
+        'engine': engine,
+        'workers': workers,
+        'clients': args.clients,
+        'senders': min(args.senders, args.clients),
+        'rooms': args.rooms,
+        'compress': compress,
+        'batch_window_ms': batch_window,
+        'tls': tls,
+        'loadgen_processes': args.processes,
+        'duration_s': round(elapsed, 3),
+        'connect_ms': percentiles(connect_times, 1e3),
+        'handshake_ms': percentiles(handshake_times, 1e3),
+        'resume_ms': percentiles(resume_times, 1e3),
+        'resumed': total('resumed') if tls else None,
+        'latency_ms': percentiles(latencies, 1e-6),
+        'sent': total('sent'),
+        'expected': expected,
+        'delivered': total('delivered'),
+        'lost': expected - total('delivered'),
+        'throughput': {
+            'messages_per_s': round(total('sent') / elapsed, 1),
+            'deliveries_per_s': round(total('delivered') / elapsed, 1),
+            'bytes_per_s': round(total('bytes_received') / elapsed, 1),
+            'sent_bytes_per_s': round(total('bytes_sent') / elapsed, 1),
+        },
+        'loadgen': {'cpu_s': round(total('cpu_s'), 3)},
+        'server': None,
+    }
+    if stats:
+        rss, peak = stats.memory_kb()
+        cpu = spent(cpu_marks, connected, loaded)
+        writes = spent(write_marks, connected, loaded)
+        result['server'] = {
+            'cpu_s': cpu,
+            'cpu_percent': round(100 * cpu / elapsed, 1) if cpu is not None else None,
+            'rss_kb': rss,
+            'peak_rss_kb': peak,
+            'writes': writes,
+            'writes_per_s': round(writes / elapsed, 1) if writes is not None else None,
+            'deliveries_per_write': round(total('delivered') / writes, 2) if writes else None,
+            'connect_cpu_s': spent(cpu_marks, 0, connected),
+            'reconnect_cpu_s': spent(cpu_marks, loaded, reconnected) if tls else None,
+        }
+    return result
+
+# Fields that tell the runs of one benchmark invocation apart
+VARIANTS = ('engine', 'workers', 'compress', 'batch_window_ms', 'tls')
+
+def run_name(run):
+    workers = f" x{run['workers']}" if run.get('workers') else ''
+    batch = f" batch {run['batch_window_ms']:g} ms" if run.get('batch_window_ms') else ''
+    return f"{run['engine'] or 'server'}{workers}{' zlib' if run.get('compress') else ''}{batch}{' tls' if run.get('tls') else ''}"
+
+def compare_runs(base, run):
+    """Print the change of the main metrics from run base to run"""
+    for section, key, higher_is_better in COMPARED:
+        old = (base.get(section) or {}).get(key)
+        new = (run.get(section) or {}).get(key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100
+        worse = change < 0 if higher_is_better else change > 0
+        print(f"  {section}.{key}: {old} -> {new} ({change:+.1f}%{' worse' if worse and abs(change) >= 5 else ''})")
+
+def compare(results, baseline):
+    """Print the change of the main metrics against a baseline result file"""
+    variant = lambda run: (
+        run['engine'], run.get('workers', 0), run.get('compress', False), run.get('batch_window_ms', 0), run.get('tls', False)
+    )
+    previous = {variant(run): run for run in baseline.get('runs', [])}
+    for run in results['runs']:
+        base = previous.get(variant(run))
+        if base:
+            print(f"\n{run_name(run)} vs baseline:")
+            compare_runs(base, run)
+
+def compare_variants(results, field):
+    """Print what changing field did, against the first run that only differs in it"""
+    first = {}
+    for run in results['runs']:
+        others = tuple(run.get(name) for name in VARIANTS if name != field)
+        base = first.setdefault(others, run)
+        if base is not run:
+            print(f"\n{run_name(run)} vs {run_name(base)}:")
+            compare_runs(base, run)
+
+def print_summary(run):
+    latency = run['latency_ms'] or {}
+    connect = run['connect_ms'] or {}
+    print(f"\n[{run_name(run)}] {run['clients']} clients, {run['senders']} senders, {run['rooms']} rooms, {run['duration_s']} s")
+    print(f"  connect ms  p50 {connect.get('p50')}  p99 {connect.get('p99')}  max {connect.get('max')}")
+    if run.get('tls'):
+        handshake, resume = run['handshake_ms'] or {}, run['resume_ms'] or {}
+        print(f"  handshake ms  p50 {handshake.get('p50')}  p99 {handshake.get('p99')}  max {handshake.get('max')}")
+        print(f"  reconnect handshake ms  p50 {resume.get('p50')}  p99 {resume.get('p99')}  max {resume.get('max')}, "
+              f"{run['resumed']}/{resume.get('count')} resumed")
+    print(f"  latency ms  p50 {latency.get('p50')}  p99 {latency.get('p99')}  p999 {latency.get('p999')}  max {latency.get('max')}")
+    print(f"  delivered {run['delivered']}/{run['expected']} ({run['lost']} lost), "
+          f"{run['throughput']['deliveries_per_s']} deliveries/s")
+    print(f"  wire MB/s  received {run['throughput']['bytes_per_s'] / 1e6:.3f}  sent {run['throughput']['sent_bytes_per_s'] / 1e6:.3f}")
+    if run['server']:
+        print(f"  server cpu {run['server']['cpu_percent']}%  rss {run['server']['rss_kb']} KiB  peak {run['server']['peak_rss_kb']} KiB")
+        if run['server'].get('writes') is not None:
+            print(f"  server writes/s {run['server']['writes_per_s']}  deliveries per write {run['server']['deliveries_per_write']}")
+        if run['server'].get('connect_cpu_s') is not None:
+            reconnect = run['server'].get('reconnect_cpu_s')
+            print(f"  server cpu s  connecting {run['server']['connect_cpu_s']:.3f}"
+                  + (f"  reconnecting {reconnect:.3f}" if reconnect is not None else ''))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Python Local Area Network ChatVerse load benchmark")
+    parser.add_argument('--engine', nargs='+', choices=sorted(ENGINES),
+                        help="start server_headless.py with each of these engines and benchmark it in turn")
+    parser.add_argument('--server-arg', action='append', default=[],
+                        help="extra option passed to the spawned server, e.g. --server-arg=--backpressure=disconnect")
+    parser.add_argument('--workers', type=int, nargs='+', default=[0],
+                        help="benchmark the spawned server with each of these worker process counts, 0 for a single process "
+                             "(worker processes always use the selector engine; default: %(default)s)")
+    parser.add_argument('--batch-window', type=float, nargs='+', default=[0.0], metavar='MS',
+                        help="benchmark the spawned server with each of these batching windows in milliseconds (default: 0)")
+    parser.add_argument('--host', default='127.0.0.1', help="benchmark an already running server (without --engine)")
+    parser.add_argument('--port', type=int, default=6666)
+    parser.add_argument('--clients', type=int, default=50, help="simulated clients (default: %(default)s)")
+    parser.add_argument('--senders', type=int, default=10, help="clients that send messages (default: %(default)s)")
+    parser.add_argument('--processes', type=int, default=1,
+                        help="load generator processes the clients are spread over (default: %(default)s)")
+    parser.add_argument('--rooms', type=int, default=1, help="rooms the clients are spread over (default: %(default)s)")
+    parser.add_argument('--rate', type=float, default=20.0, help="messages per second per sender (default: %(default)s)")
+    parser.add_argument('--size', type=int, default=100, help="message text size in bytes (default: %(default)s)")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds of measured load (default: %(default)s)")
+    parser.add_argument('--warmup', type=float, default=1.0, help="seconds between connecting and sending (default: %(default)s)")
+    parser.add_argument('--drain', type=float, default=2.0, help="seconds to wait for late deliveries (default: %(default)s)")
+    parser.add_argument('--compress', choices=('off', 'zlib', 'both'), default='off',
+                        help="offer zlib compression in the handshake; 'both' measures every engine with and without it")
+    parser.add_argument('--tls', choices=('off', 'on', 'both'), default='off',
+                        help="connect over TLS; 'both' measures every engine with and without it")
+    parser.add_argument('--tls-ca', metavar='FILE',
+                        help="certificate to trust with --tls against an already running server (default: trust any); "
+                             "spawned servers get a throwaway one")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare with")
+    args = parser.parse_args(argv)
+    if args.rooms < 1 or args.rooms > args.clients:
+        parser.error("--rooms must be between 1 and --clients")
+    if args.processes < 1 or args.processes > args.clients:
+        parser.error("--processes must be between 1 and --clients")
+        
+    results = {
+        'benchmark': 'chatverse-load',
+        'version': 1,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+        'runs': [],
+    }
+    modes = {'off': [False], 'zlib': [True], 'both': [False, True]}[args.compress]
+    tls_modes = {'off': [False], 'on': [True], 'both': [False, True]}[args.tls]
+    if args.engine:
+        with tempfile.TemporaryDirectory() as directory:
+            if any(tls_modes):
+                args.tls_ca = os.path.join(directory, 'server.pem')
+                generate_certificate(args.tls_ca, names=['localhost', '127.0.0.1'])
+            for engine in args.engine:
+                for workers in args.workers:
+                    for compress in modes:
+                        for window in args.batch_window:
+                            for tls in tls_modes:
+                                port, metrics_port = free_port(), free_port()
+                                server_args = ['--workers', str(workers), '--batch-window', str(window)] + args.server_arg
+                                if tls:
+                                    server_args += ['--tls-cert', args.tls_ca]
+                                process = spawn_server(engine, port, metrics_port, server_args)
+                                try:
+                                    run = run_once(args, ('127.0.0.1', port), process.pid, engine, compress, workers,
+                                                   window, ('127.0.0.1', metrics_port), tls)
+                                finally:
+                                    process.terminate()
+                                    process.wait()
+                                results['runs'].append(run)
+                                print_summary(run)
+    else:
+        for compress in modes:
+            for tls in tls_modes:
+                run = run_once(args, (args.host, args.port), compress=compress, tls=tls)
+                results['runs'].append(run)
+                print_summary(run)
+    if len(args.workers) > 1 and args.engine:
+        compare_variants(results, 'workers')
+    if len(modes) > 1:
+        compare_variants(results, 'compress')
+    if len(args.batch_window) > 1 and args.engine:
+        compare_variants(results, 'batch_window_ms')
+    if len(tls_modes) > 1:
+        compare_variants(results, 'tls')
+        
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            compare(results, json.load(f))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,759 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse client - GUI client for chat system
+
+The window and messages are in the language chosen by i18n.py; client_en.py
+and client_zh.py start this client in their language.
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import argparse
+import itertools
+import os
+import socket
+import threading
+import time
+from functools import partial
+from queue import Queue
+
+from compression import CAPABILITY, Deflater, Inflater
+from discovery import DEFAULT_SERVER, ServerCache, discover, parse_address
+from files import (
+    DOWNLOAD_DIRECTORY, ChunkReader, FileError, OutgoingFile, PartialFile, format_size, limit_unsent, safe_name, unique_path
+)
+from heartbeat import set_keepalive
+from i18n import Catalog, locale_parser, select_locale
+from message_view import HISTORY_LINES, VIEW_LINES, HistoryView, MessageHistory, MessagePump
+from presence import TYPING_REFRESH
+from protocol import (
+    MSG_CHAT, MSG_CHUNK, MSG_DIRECT, MSG_DOWNLOAD, MSG_EXIT, MSG_FILE, MSG_HELLO, MSG_JOIN, MSG_NOTICE, MSG_PING, MSG_PONG,
+    MSG_PRESENCE, MSG_REPLAY, MSG_ROOMS, MSG_SEARCH, MSG_TEXT, MSG_TYPING, MSG_UPLOAD, MSG_WELCOME, MSG_ZLIB, FrameParser,
+    decode_chat, decode_chunk, decode_json, decode_notice, decode_text, encode_frame, encode_json
+)
+from reconnect import Backoff, OfflineQueue
+from tls import client_context, wrap_client
+
+# Chat messages requested from the server history when joining
+REPLAY_LINES = 100
+
+# Nicknames listed in the presence line, the others are only counted
+ROSTER_NAMES = 10
+
+# Imported by import_tk() when the window opens, so importing this module does not load Tcl/Tk
+tk = ttk = filedialog = None
+
+def import_tk():
+    """Import the Tk modules the window is built from"""
+    global tk, ttk, filedialog
+    import tkinter as tk
+    from tkinter import filedialog, ttk
+
+class ChatClient:
+    def __init__(self, history_lines=HISTORY_LINES, view_lines=VIEW_LINES, server_addr=None, text=None, tls=None):
+        self.text = text or Catalog()  # i18n.Catalog of the window and messages
+        self.server_addr = server_addr  # None: find a server on the local network
+        self.tls = tls  # ssl.SSLContext to connect with, None for plain TCP
+        self.tls_session = None  # TLS session of the last connection, offered to the server to resume it
+        self.server_cache = ServerCache()
+        self.nickname = ""
+        self.session = None  # token from MSG_WELCOME that takes our nickname back after reconnecting
+        self.room = None  # room the server has put us in
+        self.last_id = 0  # ID of the newest chat message received
+        self.inflater = None  # compression of frames in either direction, once the server accepted it
+        self.deflater = None
+        self.client_socket = None  # current connection, replaced on every reconnect
+        self.online = False  # joined on the current connection
+        self.closing = False
+        self.uploads = {}  # {transfer: OutgoingFile} of files we share, until the server announces them
+        self.downloads = {}  # {transfer: (PartialFile, file announcement)} of files being downloaded
+        self.shared = []  # files announced in our rooms, numbered for /get
+        self.transfers = itertools.count(1)
+        self.offline = OfflineQueue()  # frames typed while disconnected
+        self.backoff = Backoff()
+        self.users = set()  # nicknames in our room
+        self.typing = []  # nicknames of the others typing in our room
+        self.typing_sent = None  # time.monotonic() we last told the server we are typing, None when we are not
+        self.search_request = None  # fields of the last /search, asked again with "before" by /more
+        self.search_next = None  # "before" of the next page of search results, None when there is none
+        self.send_lock = threading.RLock()  # the receive thread also sends: heartbeat answers and the offline queue
+        self.message_queue = Queue()
+        self.history_lines = history_lines
+        self.view_lines = view_lines
+        
+        # Initialize GUI
+        self.init_gui()
+        
+        # Connect to server
+        self.connect_to_server()
+        
+        # Show queued messages from the Tk thread
+        self.message_pump = MessagePump(self.root, self.history_view, self.message_queue)
+        self.message_pump.start()
+        
+        # Start main loop
+        self.root.mainloop()
+    
+    def init_gui(self):
+        """Initialize client GUI interface"""
+        import_tk()
+        self.root = tk.Tk()
+        self.root.title(self.text('client.title'))
+        
+        # Set window size and position
+        self.root.geometry('500x400+500+300')
+        self.root.resizable(False, False)
+        
+        # Message display area
+        self.message_frame = tk.Frame(self.root)
+        self.message_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        self.scrollbar = tk.Scrollbar(self.message_frame)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.message_list = tk.Listbox(
+            self.message_frame,
+            font=('Microsoft YaHei', 10),
+            bg="#ffffff",
+            height=15
+        )
+        self.message_list.pack(fill=tk.BOTH, expand=True)
+        self.history_view = HistoryView(
+            self.message_list,
+            self.scrollbar,
+            MessageHistory(self.history_lines),
+            self.view_lines
+        )
+        
+        # Bottom input area
+        self.input_frame = tk.Frame(self.root)
+        self.input_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        # Nickname input interface
+        self.nickname_frame = tk.Frame(self.input_frame)
+        self.nickname_frame.pack(fill=tk.X)
+        
+        tk.Label(self.nickname_frame, text=self.text('client.nickname')).pack(side=tk.LEFT)
+        
+        self.nickname_entry = tk.Entry(self.nickname_frame, width=40)
+        self.nickname_entry.pack(side=tk.LEFT, padx=5)
+        self.nickname_entry.bind("<Return>", self.set_nickname)
+        self.nickname_entry.focus_set()
+        
+        self.join_button = tk.Button(
+            self.nickname_frame,
+            text=self.text('client.join'),
+            command=self.set_nickname,
+            width=8
+        )
+        self.join_button.pack(side=tk.LEFT)
+        
+        # Room selector (initially hidden)
+        self.room_frame = tk.Frame(self.input_frame)
+        
+        tk.Label(self.room_frame, text=self.text('client.room')).pack(side=tk.LEFT)
+        
+        self.room_box = ttk.Combobox(self.room_frame, width=37, postcommand=self.request_rooms)
+        self.room_box.pack(side=tk.LEFT, padx=5)
+        self.room_box.bind("<Return>", self.join_room)
+        self.room_box.bind("<<ComboboxSelected>>", self.join_room)
+        
+        self.room_button = tk.Button(
+            self.room_frame,
+            text=self.text('client.switch'),
+            command=self.join_room,
+            width=8
+        )
+        self.room_button.pack(side=tk.LEFT)
+        
+        # Who is in the room and who is typing (initially hidden)
+        self.presence_label = tk.Label(self.input_frame, anchor='w', fg="#808080")
+        
+        # Message input interface (initially hidden)
+        self.chat_frame = tk.Frame(self.input_frame)
+        
+        tk.Label(self.chat_frame, text=self.text('client.message')).pack(side=tk.LEFT)
+        
+        self.message_entry = tk.Entry(self.chat_frame, width=32)
+        self.message_entry.pack(side=tk.LEFT, padx=5)
+        self.message_entry.bind("<Return>", self.send_message)
+        self.message_entry.bind("<KeyRelease>", self.typed)
+        
+        self.send_button = tk.Button(
+            self.chat_frame,
+            text=self.text('client.send'),
+            command=self.send_message,
+            width=8
+        )
+        self.send_button.pack(side=tk.LEFT)
+        
+        self.file_button = tk.Button(
+            self.chat_frame,
+            text=self.text('client.file'),
+            command=self.choose_file,
+            width=6
+        )
+        self.file_button.pack(side=tk.LEFT, padx=(5, 0))
+        
+        # Window close event
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+    
+    def connect_to_server(self):
+        """Connect to the server in the background, reconnecting whenever the connection is lost"""
+        threading.Thread(target=self.run_connection, daemon=True).start()
+    
+    def run_connection(self):
+        """Connect, receive until the connection is lost, then start over after a backoff delay"""
+        while not self.closing:
+            server = None if self.server_addr else self.find_server()
+            address = self.server_addr or ((server.host, server.port) if server else DEFAULT_SERVER)
+            try:
+                sock = socket.create_connection(address)
+                if self.tls is not None:
+                    sock = wrap_client(sock, self.tls, address[0], self.tls_session)
+            except OSError as e:
+                if server is not None:
+                    self.server_cache.forget(address)
+                if self.client_socket is None and not self.backoff.attempts:
+                    # Only the first failure is reported; attempts go on quietly
+                    self.add_message(self.text('client.connect_failed', error=e))
+                time.sleep(self.backoff.next_delay())
+                continue
+            
+            if server is not None:
+                self.server_cache.add([server])  # reaching it again soon skips the search
+            set_keepalive(sock)
+            with self.send_lock:
+                self.client_socket = sock
+            if self.nickname:
+                self.resume_session()
+            else:
+                self.backoff.reset()
+                self.add_message(self.text('client.connected'))
+                
+            self.receive_messages(sock)
+            with self.send_lock:
+                self.online = False
+                self.inflater = self.deflater = None
+            if self.tls is not None:
+                # Taken now because the server sends its session ticket after the handshake
+                self.tls_session = sock.session
+            sock.close()
+            if not self.closing:
+                self.add_message(self.text('client.connection_lost'))
+                time.sleep(self.backoff.next_delay())
+    
+    def find_server(self):
+        """Return the server to connect to: the last one that worked while it is cached, else the first to answer a search"""
+        cached = self.server_cache.servers()
+        if cached:
+            return cached[0]
+        servers = discover()
+        if not servers:
+            return None
+        server = servers[0]
+        self.server_cache.add(servers)
+        self.add_message(self.text('client.found_server', name=server.name, host=server.host, port=server.port))
+        return server
+    
+    def set_nickname(self, event=None):
+        """Send the nickname; the chat interface opens once the server accepts it"""
+        nickname = self.nickname_entry.get().strip()
+        if nickname:
+            try:
+                if self.client_socket is None:
+                    self.add_message(self.text('client.not_connected'))
+                    return
+                self.send_frame(self.hello_frames(nickname, {'last': REPLAY_LINES}))
+            except Exception as e:
+                self.add_message(self.text('client.nickname_failed', error=e))
+    
+    def hello_frames(self, nickname, history):
+        """Build the history request and nickname frames that open a session"""
+        hello = encode_json(MSG_HELLO, nickname=nickname, caps=[CAPABILITY], session=self.session)
+        return encode_json(MSG_REPLAY, **history) + hello
+    
+    def resume_session(self):
+        """Join again under our nickname after reconnecting, asking for the messages missed meanwhile"""
+        history = {'since': self.last_id} if self.last_id else {'last': REPLAY_LINES}
+        if self.room is not None:
+            history['room'] = self.room
+        try:
+            self.send_frame(self.hello_frames(self.nickname, history))
+        except OSError:
+            pass  # receive_messages() notices the lost connection
+    
+    def enter_chat(self, nickname):
+        """Switch to chat interface"""
+        self.nickname = nickname
+        self.nickname_frame.pack_forget()
+        self.presence_label.pack(fill=tk.X)
+        self.room_frame.pack(fill=tk.X, pady=(0, 5))
+        self.chat_frame.pack(fill=tk.X)
+        self.message_entry.focus_set()
+        
+        self.root.title(self.text('client.title_user', nickname=nickname))
+        self.history_view.append([self.text('client.welcome', nickname=nickname)])
+    
+    def leave_chat(self):
+        """Go back to the nickname input after the server refused our nickname on reconnecting"""
+        self.presence_label.pack_forget()
+        self.room_frame.pack_forget()
+        self.chat_frame.pack_forget()
+        self.nickname_frame.pack(fill=tk.X)
+        self.nickname_entry.focus_set()
+        self.root.title(self.text('client.title'))
+    
+    def send_message(self, event=None):
+        """Send message to server"""
+        message = self.message_entry.get().strip()
+        if message:
+            try:
+                if message.startswith('/msg '):
+                    self.send_direct(message)
+                elif message == '/get' or message.startswith('/get '):
+                    self.request_file(message)
+                elif message == '/search' or message.startswith('/search '):
+                    self.search(message)
+                elif message == '/more':
+                    self.more_results()
+                elif message.startswith('/') and not message.startswith('//'):
+                    self.send_command(message)
+                else:
+                    # The server sends a message starting with // on with one slash less
+                    shown = message[1:] if message.startswith('//') else message
+                    self.send_typed(encode_frame(MSG_TEXT, message), f"{self.nickname}: {shown}")
+                    self.typing_sent = None  # the server ends the typing indicator with the message
+                self.message_entry.delete(0, tk.END)
+            except Exception as e:
+                self.add_message(self.text('client.send_failed', error=e))
+    
+    def typed(self, event=None):
+        """Tell the server whether we are typing a chat message, renewing the indicator while we keep typing"""
+        draft = self.message_entry.get()
+        typing = bool(draft.strip()) and not draft.startswith('/')  # commands are not shown as typing
+        now = time.monotonic()
+        if typing:
+            if self.typing_sent is not None and now - self.typing_sent < TYPING_REFRESH:
+                return
+        elif self.typing_sent is None:
+            return
+        if not self.online:
+            return
+        try:
+            self.send_frame(encode_json(MSG_TYPING, typing=typing))
+        except OSError:
+            return  # receive_messages() notices the lost connection
+        self.typing_sent = now if typing else None
+    
+    def choose_file(self):
+        """Pick a file to share with the room"""
+        path = filedialog.askopenfilename(parent=self.root, title=self.text('client.share_title'))
+        if path:
+            # Hashing a large file takes a while: not on the Tk thread
+            threading.Thread(target=self.offer_file, args=(path,), daemon=True).start()
+    
+    def offer_file(self, path):
+        """Announce a file to the server, which answers with the offset to send it from"""
+        try:
+            upload = OutgoingFile(path, next(self.transfers))
+        except OSError as e:
+            self.add_message(self.text('client.share_failed', error=e))
+            return
+        with self.send_lock:
+            self.uploads[upload.transfer] = upload
+            online = self.online
+            if online:
+                try:
+                    self.send_frame(upload.offer())
+                except OSError:
+                    pass  # offered again once reconnected
+        if online:
+            self.add_message(self.text('client.sending_file', name=upload.name, size=format_size(upload.size)))
+        else:
+            self.add_message(self.text('client.file_queued', name=upload.name))
+    
+    def send_chunks(self, upload, offset, sock):
+        """Send a file from offset one chunk at a time, so typed messages get in between the chunks"""
+        limit_unsent(sock)
+        reader = ChunkReader(upload.path, upload.transfer, offset, upload.size)
+        try:
+            while (frame := reader.next_frame()) is not None:
+                with self.send_lock:
+                    if self.client_socket is not sock:
+                        return  # reconnected: the file is offered again on the new connection
+                    sock.sendall(frame)
+        except OSError:
+            pass  # receive_messages() notices the lost connection
+        finally:
+            reader.close()
+    
+    def request_file(self, command):
+        """Download a shared file: /get number"""
+        parts = command.split()
+        if len(parts) != 2 or not parts[1].isdigit() or not 0 < int(parts[1]) <= len(self.shared):
+            self.add_message(self.text('client.get_usage'))
+            return
+        info = self.shared[int(parts[1]) - 1]
+        # Opening a partly downloaded file hashes what it holds: not on the Tk thread
+        threading.Thread(target=self.start_download, args=(info,), daemon=True).start()
+    
+    def start_download(self, info):
+        """Download a file into DOWNLOAD_DIRECTORY, going on from an earlier attempt if there was one"""
+        name = safe_name(info['name'])
+        try:
+            os.makedirs(DOWNLOAD_DIRECTORY, exist_ok=True)
+            part = PartialFile(os.path.join(DOWNLOAD_DIRECTORY, f"{name}.{info['id'][:8]}.part"), info['size'], info['id'])
+        except OSError as e:
+            self.add_message(self.text('client.download_failed', name=name, error=e))
+            return
+        transfer = next(self.transfers)
+        self.add_message(self.text('client.downloading', name=name, size=format_size(info['size'])))
+        with self.send_lock:
+            self.downloads[transfer] = (part, info)
+            if part.complete:
+                self.finish_download(transfer)
+            else:
+                self.request_download(transfer)
+    
+    def request_download(self, transfer):
+        """Ask the server for the rest of a download; needs the send lock"""
+        part, info = self.downloads[transfer]
+        if self.online:
+            try:
+                self.send_frame(encode_json(MSG_DOWNLOAD, transfer=transfer, id=info['id'], offset=part.offset))
+            except OSError:
+                pass  # asked again once reconnected
+    
+    def receive_chunk(self, transfer, offset, data):
+        """Write a chunk of a download, saving the file once it is complete"""
+        part, info = self.downloads.get(transfer, (None, None))
+        if part is None:
+            return
+        try:
+            complete = part.write(offset, data)
+        except FileError:
+            return  # not where the download stands: the server is sending it again from there
+        except OSError as e:
+            self.drop_transfer(transfer)
+            self.add_message(self.text('client.download_failed', name=safe_name(info['name']), error=e))
+            return
+        if complete:
+            self.finish_download(transfer)
+    
+    def finish_download(self, transfer):
+        part, info = self.downloads.pop(transfer)
+        name = safe_name(info['name'])
+        try:
+            path = part.finish(unique_path(DOWNLOAD_DIRECTORY, name))
+        except (OSError, FileError) as e:
+            self.add_message(self.text('client.download_broken', name=name, error=e))
+            return
+        self.add_message(self.text('client.saved', name=name, path=path))
+    
+    def drop_transfer(self, transfer):
+        """Give up an upload or download the server refused"""
+        self.uploads.pop(transfer, None)
+        part, info = self.downloads.pop(transfer, (None, None))
+        if part is not None:
+            part.close()
+    
+    def file_shared(self, info):
+        """Number a file announced in the room so it can be downloaded with /get"""
+        self.shared.append(info)
+        number = len(self.shared)
+        if info['from'] == self.nickname:
+            for transfer, upload in list(self.uploads.items()):
+                if upload.sha256 == info['id']:
+                    del self.uploads[transfer]
+        self.add_message(self.text(
+            'client.file_shared', sender=info['from'], name=info['name'], size=format_size(info['size']), number=number
+        ))
+    
+    def send_direct(self, command):
+        """Send "/msg nickname text" as a private message"""
+        parts = command.split(None, 2)
+        if len(parts) < 3:
+            self.add_message(self.text('client.msg_usage'))
+            return
+        to, text = parts[1], parts[2]
+        self.send_typed(encode_json(MSG_DIRECT, to=to, text=text), self.text('client.private_to', to=to, text=text))
+    
+    def search(self, command):
+        """Search the history of the room: /search [from:nickname] [since:YYYY-MM-DD] [until:YYYY-MM-DD] words"""
+        request, words = {}, []
+        try:
+            for word in command.split()[1:]:
+                key, separator, value = word.partition(':')
+                if separator and key == 'from' and value:
+                    request['from'] = value
+                elif separator and key in ('since', 'until'):
+                    day = time.strptime(value, '%Y-%m-%d')
+                    if key == 'until':
+                        day = day[:2] + (day[2] + 1,) + day[3:]  # until the end of that day; mktime() carries over
+                    request[key] = time.mktime(day)
+                else:
+                    words.append(word)
+        except (ValueError, OverflowError):
+            words = request = None
+        if not words and not request:
+            self.add_message(self.text('client.search_usage'))
+            return
+        request['query'] = ' '.join(words)
+        self.search_request = request
+        self.search_next = None
+        self.send_search(request)
+    
+    def more_results(self):
+        """Ask for the next page of the last search: /more"""
+        if self.search_next is None:
+            self.add_message(self.text('client.search_end'))
+            return
+        self.send_search(dict(self.search_request, before=self.search_next))
+    
+    def send_command(self, command):
+        """Send a command the server carries out, such as /who, /nick or /me; what it answers is shown"""
+        if not self.online:
+            self.add_message(self.text('client.not_connected'))
+            return
+        self.send_frame(encode_frame(MSG_TEXT, command))
+    
+    def send_search(self, request):
+        if not self.online:
+            self.add_message(self.text('client.not_connected'))
+            return
+        self.send_frame(encode_json(MSG_SEARCH, **request))
+    
+    def show_results(self, found):
+        """Show a page of search results, newest first"""
+        results = found['results']
+        self.search_next = found['next']
+        if not results:
+            self.add_message(self.text('client.search_none'))
+            return
+        lines = [self.text('client.search_results', count=len(results))]
+        for msg_id, timestamp, text in results:
+            lines.append(f"  {time.strftime('%Y-%m-%d %H:%M', time.localtime(timestamp))}  {text}")
+        if self.search_next is not None:
+            lines.append(self.text('client.search_more'))
+        for line in lines:
+            self.add_message(line)
+    
+    def send_typed(self, frame, echo):
+        """Send a frame the user typed and show it; while disconnected it is queued until the session resumes"""
+        with self.send_lock:
+            if self.online:
+                try:
+                    self.send_frame(frame)
+                    self.add_message(echo)
+                    return
+                except OSError:
+                    self.online = False  # the receive thread notices the lost connection and reconnects
+            queued = self.offline.add(frame)
+        if queued:
+            self.add_message(self.text('client.queued', echo=echo))
+        else:
+            self.add_message(self.text('client.queue_full'))
+    
+    def join_room(self, event=None):
+        """Ask the server to move us to the room in the selector"""
+        room = self.room_box.get().strip()
+        if room and room != self.room:
+            if not self.online:
+                self.add_message(self.text('client.room_offline'))
+                return
+            try:
+                self.send_frame(encode_json(MSG_JOIN, room=room, last=REPLAY_LINES))
+            except Exception as e:
+                self.add_message(self.text('client.room_failed', error=e))
+    
+    def request_rooms(self):
+        """Ask the server for the room list before the selector opens"""
+        if not self.online:
+            return
+        try:
+            self.send_frame(encode_frame(MSG_ROOMS))
+        except OSError:
+            pass
+    
+    def show_rooms(self, rooms, entered):
+        """Update the room selector after a room list from the server"""
+        self.room_box['values'] = sorted(rooms['rooms'])
+        if entered:
+            self.room_box.set(rooms['room'])
+            self.root.title(self.text('client.title_room', nickname=self.nickname, room=rooms['room']))
+            self.history_view.append([self.text('client.in_room', room=rooms['room'])])
+    
+    def receive_messages(self, sock):
+        """Receive messages until the connection is lost"""
+        parser = FrameParser()
+        inflated = FrameParser()
+        while True:
+            try:
+                if not parser.recv_into(sock):
+                    break
+                
+                for msg_type, payload in parser.frames():
+                    if msg_type == MSG_ZLIB and self.inflater is not None:
+                        inflated.feed(self.inflater.unpack(payload))
+                        for inner_type, inner_payload in inflated.frames():
+                            self.handle_frame(inner_type, inner_payload)
+                    else:
+                        self.handle_frame(msg_type, payload)
+                        
+            except OSError:
+                break
+            except Exception as e:
+                self.add_message(self.text('client.receive_failed', error=e))
+                break
+    
+    def handle_frame(self, msg_type, payload):
+        """Handle one frame from the server"""
+        if msg_type == MSG_CHAT:
+            msg_id, timestamp, text = decode_chat(payload)
+            self.last_id = msg_id or self.last_id
+            self.add_message(text)
+        elif msg_type == MSG_TEXT:
+            self.add_message(decode_text(payload))
+        elif msg_type == MSG_DIRECT:
+            direct = decode_json(payload)
+            self.add_message(self.text('client.private_from', sender=direct['from'], text=direct['text']))
+        elif msg_type == MSG_WELCOME:
+            welcome = decode_json(payload)
+            self.session = welcome.get('session')
+            if CAPABILITY in welcome.get('caps', ()):
+                # Compression was accepted: what follows may be compressed
+                self.inflater = Inflater()
+                self.deflater = Deflater()
+            self.backoff.reset()
+            if welcome['nickname'] == self.nickname:
+                self.add_message(self.text('client.reconnected'))
+            else:
+                self.nickname = welcome['nickname']
+                self.message_queue.put(partial(self.enter_chat, welcome['nickname']))
+            self.go_online()
+        elif msg_type == MSG_ROOMS:
+            rooms = decode_json(payload)
+            entered = rooms['room'] != self.room
+            if entered:
+                # Message IDs are counted per room, and searches are of one room
+                self.room = rooms['room']
+                self.last_id = 0
+                self.search_next = None
+            self.message_queue.put(partial(self.show_rooms, rooms, entered))
+        elif msg_type == MSG_NOTICE:
+            notice = decode_notice(payload)
+            self.add_message(self.format_notice(notice))
+            if 'transfer' in notice:
+                self.drop_transfer(notice['transfer'])
+            if notice['code'] in ('nickname_taken', 'bad_nickname') and self.nickname:
+                # Someone else took our nickname while we were away: ask for another one
+                self.nickname = ""
+                self.message_queue.put(self.leave_chat)
+            elif notice['code'] == 'renamed' and notice['old'] == self.nickname:
+                # Reconnects take the session back under the new nickname
+                self.nickname = notice['new']
+                title = self.text('client.title_room', nickname=self.nickname, room=self.room)
+                self.message_queue.put(partial(self.root.title, title))
+        elif msg_type == MSG_PING:
+            self.send_frame(encode_frame(MSG_PONG))
+        elif msg_type == MSG_CHUNK:
+            self.receive_chunk(*decode_chunk(payload))
+        elif msg_type == MSG_UPLOAD:
+            accepted = decode_json(payload)
+            upload = self.uploads.get(accepted['transfer'])
+            if upload is not None and accepted['offset'] < upload.size:
+                threading.Thread(
+                    target=self.send_chunks, args=(upload, accepted['offset'], self.client_socket), daemon=True
+                ).start()
+        elif msg_type == MSG_FILE:
+            self.file_shared(decode_json(payload))
+        elif msg_type == MSG_PRESENCE:
+            self.update_presence(decode_json(payload))
+        elif msg_type == MSG_SEARCH:
+            self.show_results(decode_json(payload))
+    
+    def update_presence(self, presence):
+        """Apply the roster of the room we entered, or a change to it"""
+        if 'users' in presence:
+            self.users = set(presence['users'])
+        self.users.update(presence.get('joined', ()))
+        self.users.difference_update(presence.get('left', ()))
+        if 'typing' in presence:
+            self.typing = [nickname for nickname in presence['typing'] if nickname != self.nickname]
+        self.message_queue.put(partial(self.show_presence, self.presence_text()))
+    
+    def presence_text(self):
+        """Describe who is in the room and who is typing"""
+        users = sorted(self.users)
+        names = ', '.join(users[:ROSTER_NAMES]) + (', ...' if len(users) > ROSTER_NAMES else '')
+        line = self.text('client.online', count=len(users), users=names)
+        if self.typing:
+            line += '    ' + self.text('client.typing', users=', '.join(self.typing[:ROSTER_NAMES]))
+        return line
+    
+    def show_presence(self, line):
+        self.presence_label.config(text=line)
+    
+    def go_online(self):
+        """Send what was typed while disconnected, then send directly again"""
+        with self.send_lock:
+            self.offline.flush(self.send_frame)
+            self.online = True
+            self.typing_sent = None  # a new connection starts without a typing indicator
+            # Transfers that broke off go on from where they stand
+            for upload in self.uploads.values():
+                self.send_frame(upload.offer())
+            for transfer in list(self.downloads):
+                self.request_download(transfer)
+    
+    def format_notice(self, notice):
+        """Turn a server notice into display text"""
+        key = f"notice.{notice['code']}"
+        return self.text(key, **notice) if key in self.text else f"[{notice['code']}]"
+    
+    def send_frame(self, frame):
+        """Send one frame, compressed if compression is on and it is large enough"""
+        with self.send_lock:
+            if self.deflater is not None:
+                frame = self.deflater.pack([frame]) or frame
+            self.client_socket.sendall(frame)
+    
+    def add_message(self, message):
+        """Add message to queue"""
+        self.message_queue.put(message)
+    
+    def on_close(self):
+        """Cleanup when window is closed"""
+        self.closing = True
+        if self.online:
+            try:
+                self.send_frame(encode_frame(MSG_EXIT))
+            except:
+                pass
+        if self.client_socket is not None:
+            self.client_socket.close()
+        self.root.destroy()
+
+def main(argv=None, locale=None):
+    """Start the client in the language of --lang, else CHATVERSE_LANG, else locale, else the system's"""
+    text = Catalog(select_locale(argv, locale))
+    parser = argparse.ArgumentParser(description=text('client.description'), parents=[locale_parser(text)])
+    parser.add_argument('--server', type=parse_address, metavar='HOST[:PORT]', help=text('help.server'))
+    parser.add_argument('--tls', action='store_true', help=text('help.tls'))
+    parser.add_argument('--tls-ca', metavar='FILE', help=text('help.tls_ca'))
+    args = parser.parse_args(argv)
+    tls = None
+    if args.tls or args.tls_ca:
+        try:
+            tls = client_context(args.tls_ca)
+        except OSError as e:
+            parser.error(text('client.tls_failed', error=e))
+    ChatClient(server_addr=args.server, text=text, tls=tls)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,473 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Multi-process server: a hub and its worker processes
+
+With --workers N the server process becomes a hub that serves no client
+sockets itself. N worker processes accept the clients on the server port (on
+Linux each on its own SO_REUSEPORT socket, so the kernel spreads connections
+evenly; elsewhere on one shared listening socket), do all the socket I/O,
+compression and backpressure for them, and relay their frames to the hub
+over a socket pair. The hub runs the ordinary ChatServerCore on a HubEngine:
+it owns the nicknames, rooms and journals and gives every chat message its
+ID, so all clients see one order per room whichever worker they are on. A
+frame for several clients of one worker crosses the bus once, with the
+tokens of those clients, and the worker does the fan-out.
+
+Bus messages are frames of the chat protocol with their own types. Tokens
+and counters are in native byte order, both ends run on the same machine.
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import itertools
+import multiprocessing
+import selectors
+import signal
+import socket
+import struct
+import sys
+import threading
+from array import array
+
+from backpressure import BackpressurePolicy
+from batching import BatchPolicy
+from files import ChunkReader
+from metrics import merge_snapshots
+from protocol import HEADER, MAX_PAYLOAD, MSG_EXIT, FrameParser, ProtocolError, decode_json, decode_text, encode_frame, encode_json
+from server_engine import ClientConnection, SelectorEngine
+
+# Bus message types
+BUS_READY = 1     # worker -> hub: {} once accepting clients, or {"error": ...}
+BUS_OPEN = 2      # worker -> hub: {"token": ..., "addr": [ip, port]} of a new client
+BUS_FRAME = 3     # worker -> hub: FORWARD + payload of a frame from a client
+BUS_CLOSE = 4     # worker -> hub: CLOSE, a client is gone; hub -> worker: CLOSE, disconnect it
+BUS_SEND = 5      # hub -> worker: token count, tokens, then complete frames for each of those clients
+BUS_COMPRESS = 6  # hub -> worker: COMPRESS, compression was negotiated with a client
+BUS_STATS = 7     # worker -> hub: STATS, backpressure state of the worker's clients
+BUS_ERROR = 8     # worker -> hub: text of an error accepting clients
+BUS_METRICS = 9   # worker -> hub: JSON snapshot of the worker's metrics
+BUS_STREAM = 10   # hub -> worker: {"token": ..., "path": ..., "transfer": ..., "offset": ..., "end": ...}, send a file to a client
+
+TOKEN = struct.Struct('=I')
+FORWARD = struct.Struct('=IB')    # token, message type
+CLOSE = struct.Struct('=I?')      # token, unexpected
+COMPRESS = struct.Struct('=IBi')  # token, level, threshold
+STATS = struct.Struct('=IQQQ')    # over the limit, dropped, coalesced, disconnected
+
+BUS_PAYLOAD = 8 * MAX_PAYLOAD  # a BUS_SEND holds a frame of up to MAX_PAYLOAD bytes plus the tokens
+STATS_INTERVAL = 1.0           # seconds between backpressure and metrics reports of a worker
+READY_TIMEOUT = 30.0           # seconds a worker may take to start
+
+# Only Linux balances connections over the sockets sharing a port
+REUSE_PORT = sys.platform.startswith('linux') and hasattr(socket, 'SO_REUSEPORT')
+
+# Bus queues never drop anything: a worker and the hub keep up with each other or fall over together
+UNBOUNDED = BackpressurePolicy('disconnect', high_watermark=float('inf'))
+
+def share_port(sock):
+    """Let workers bind sockets of their own to the port sock will be bound to"""
+    if REUSE_PORT:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+
+def split_frames(frames, size=MAX_PAYLOAD):
+    """Split a buffer of complete frames into parts of at most about size bytes"""
+    if len(frames) <= size:
+        return (frames,)
+    view = memoryview(frames)
+    parts = []
+    start = position = 0
+    while position < len(view):
+        end = position + HEADER.size + HEADER.unpack_from(view, position)[0]
+        if end - start > size and position > start:
+            parts.append(view[start:position])
+            start = position
+        position = end
+    parts.append(view[start:])
+    return parts
+
+class RemoteClient:
+    """A client of a worker, as the server core on the hub sees it"""
+    
+    def __init__(self, link, token, addr):
+        self.link = link
+        self.token = token
+        self.addr = addr
+        self.nickname = None
+        self.session = None  # token a reconnecting client presents to take its nickname back
+        self.replay = None  # history requested before joining
+        self.room = None    # Room the client is in, set by the server core
+        self.uploads = {}   # {transfer: (files.PartialFile, name)} of files the client is sending, kept by the server core
+        self.limiter = None  # ratelimit.RateLimiter of the client, set by the server core; None for no limit
+        self.throttled = False  # told it is over a rate limit, and no message got through since
+        self.closed = False
+
+class WorkerLink(ClientConnection):
+    """Hub end of the bus to one worker process"""
+    
+    def __init__(self, sock, index, process):
+        super().__init__(sock, ('worker', index), UNBOUNDED)
+        self.parser = FrameParser(limit=BUS_PAYLOAD)
+        self.index = index
+        self.process = process
+        self.clients = {}  # {token: RemoteClient}
+        self.stats = (0, 0, 0, 0)
+        self.snapshot = None  # last metrics report of the worker
+        self.frame = None  # frame of the BUS_SEND being collected
+        self.tokens = array('I')
+    
+    def collect(self, client, frame):
+        """Add a frame for one client to the BUS_SEND being collected, starting another for a new frame"""
+        if frame is not self.frame:
+            self.seal()
+            self.frame = frame
+        self.tokens.append(client.token)
+    
+    def seal(self):
+        """Queue the BUS_SEND being collected"""
+        if self.frame is None:
+            return
+        tokens = TOKEN.pack(len(self.tokens)) + self.tokens.tobytes()
+        for part in split_frames(self.frame):
+            self.outbox.push(HEADER.pack(len(tokens) + len(part), BUS_SEND) + tokens)
+            self.outbox.push(part)
+        self.frame = None
+        self.tokens = array('I')
+    
+    def wait_ready(self):
+        """Block until the worker accepts clients; raises OSError if it could not start"""
+        self.sock.settimeout(READY_TIMEOUT)
+        while True:
+            if not self.parser.recv_into(self.sock):
+                raise OSError(f"worker {self.index} exited while starting")
+            for msg_type, payload in self.parser.frames():
+                if msg_type != BUS_READY:
+                    raise OSError(f"worker {self.index} sent bus message {msg_type} while starting")
+                error = decode_json(payload).get('error')
+                if error:
+                    raise OSError(f"worker {self.index}: {error}")
+                self.sock.setblocking(False)
+                return
+
+class HubEngine(SelectorEngine):
+    """Engine of the hub process: runs the rooms for clients served by worker processes"""
+    
+    def __init__(self, server, backpressure=None, workers=2, metrics=None, heartbeat=None, batching=None, tls=None):
+        super().__init__(server, backpressure, metrics, heartbeat)
+        # The workers watch their clients for idleness, batch what they write to them and do their TLS; the hub
+        # has no timers of its own and writes to the bus at once
+        self.reaper = None
+        self.tick_interval = None
+        self.client_batching = batching or BatchPolicy()
+        self.client_tls = tls
+        self.workers = workers
+        self.links = []
+        self.stopping = False
+    
+    def start(self, server_socket):
+        """Start the workers on the bound server socket and wait until they accept clients"""
+        context = multiprocessing.get_context('spawn')
+        address = server_socket.getsockname()
+        try:
+            for index in range(self.workers):
+                hub_end, worker_end = socket.socketpair()
+                # Worker 0 takes over the bound socket; the others bind their own where the port can be shared
+                listener = server_socket if index == 0 or not REUSE_PORT else None
+                process = context.Process(
+                    target=run_worker,
+                    args=(
+                        worker_end, listener, address, self.backpressure, self.heartbeat, self.client_batching,
+                        self.client_tls
+                    ),
+                    name=f'chatverse-worker-{index}',
+                    daemon=True
+                )
+                process.start()
+                worker_end.close()
+                self.links.append(WorkerLink(hub_end, index, process))
+            for link in self.links:
+                link.wait_ready()
+        except BaseException:
+            for link in self.links:
+                link.process.terminate()
+                link.sock.close()
+            raise
+        # The workers have their own copies; one left here would take connections nobody accepts
+        server_socket.close()
+        for link in self.links:
+            self.selector.register(link.sock, selectors.EVENT_READ, link)
+        threading.Thread(target=self.run, daemon=True).start()
+    
+    def read(self, link):
+        """Handle the bus messages a worker sent"""
+        if not link.parser.recv_into(link.sock):
+            self.close(link, unexpected=True)
+            return
+        for msg_type, payload in link.parser.frames():
+            if msg_type == BUS_FRAME:
+                token, client_type = FORWARD.unpack_from(payload)
+                client = link.clients.get(token)
+                if client is not None:
+                    self.client_frame(client, client_type, payload[FORWARD.size:])
+            elif msg_type == BUS_OPEN:
+                opened = decode_json(payload)
+                link.clients[opened['token']] = RemoteClient(link, opened['token'], tuple(opened['addr']))
+            elif msg_type == BUS_CLOSE:
+                token, unexpected = CLOSE.unpack_from(payload)
+                client = link.clients.pop(token, None)
+                if client is not None:
+                    self.forget(client, unexpected)
+            elif msg_type == BUS_STATS:
+                link.stats = STATS.unpack_from(payload)
+            elif msg_type == BUS_METRICS:
+                link.snapshot = decode_json(payload)
+            elif msg_type == BUS_ERROR:
+                self.server.connection_error(decode_text(payload))
+    
+    def client_frame(self, client, msg_type, payload):
+        """Handle one frame a client sent to its worker"""
+        try:
+            if not self.handle_frame(client, msg_type, payload):
+                self.close(client)
+        except ProtocolError:
+            self.close(client, unexpected=True)
+        except Exception as e:
+            self.client_failed(client, e)
+    
+    def send(self, conn, frame):
+        """Queue a frame for a client of a worker"""
+        if conn.closed:
+            return
+        conn.link.collect(conn, frame)
+        self.schedule(conn.link)
+    
+    def broadcast(self, conns, frame):
+        """Queue one frame for several clients, crossing the bus once per worker"""
+        for conn in conns:
+            link = conn.link
+            if link.frame is not frame:
+                link.seal()
+                link.frame = frame
+                self.schedule(link)
+            link.tokens.append(conn.token)
+    
+    def control(self, link, frame):
+        """Queue a bus message after the frames collected for the worker so far"""
+        link.seal()
+        link.outbox.push(frame)
+        self.schedule(link)
+    
+    def schedule(self, link):
+        if not link.writing:
+            link.writing = True
+            self.pending.append(link)
+    
+    def flush(self, link):
+        link.seal()
+        super().flush(link)
+    
+    def enable_compression(self, conn, level, threshold):
+        """Have the worker of conn turn compression on after the frames queued so far"""
+        self.control(conn.link, encode_frame(BUS_COMPRESS, COMPRESS.pack(conn.token, level, threshold)))
+    
+    def stream_file(self, conn, stream):
+        """Have the worker of conn read the file from disk and send it"""
+        self.control(conn.link, encode_json(
+            BUS_STREAM,
+            token=conn.token,
+            path=stream.path,
+            transfer=stream.transfer,
+            offset=stream.offset,
+            end=stream.end
+        ))
+    
+    def backpressure_state(self, connections):
+        """Return the sums of the last backpressure reports of the workers"""
+        return tuple(map(sum, zip(*(link.stats for link in self.links))))
+    
+    def metrics_snapshot(self, connections):
+        """Return the hub's metrics added to the last reports of the workers"""
+        return merge_snapshots([self.metrics.snapshot()] + [link.snapshot for link in self.links if link.snapshot])
+    
+    def close(self, conn, unexpected=False):
+        """Disconnect a client of a worker, or give up on a worker whose bus broke"""
+        if isinstance(conn, WorkerLink):
+            self.close_link(conn)
+            return
+        if conn.closed:
+            return
+        del conn.link.clients[conn.token]
+        self.control(conn.link, encode_frame(BUS_CLOSE, CLOSE.pack(conn.token, unexpected)))
+        self.forget(conn, unexpected)
+    
+    def forget(self, client, unexpected):
+        """Remove a client that is gone from the server core"""
+        client.closed = True
+        if client.nickname is not None:
+            self.server.remove_client(client, unexpected)
+    
+    def stop(self):
+        """Stop the worker processes"""
+        self.stopping = True
+        for link in self.links:
+            link.process.terminate()
+        for link in self.links:
+            link.process.join()
+    
+    def close_link(self, link):
+        if link.closed or self.stopping:
+            return
+        link.closed = True
+        self.selector.unregister(link.sock)
+        link.sock.close()
+        self.server.connection_error(f"worker {link.index} exited")
+        clients, link.clients = link.clients, {}
+        for client in clients.values():
+            self.forget(client, unexpected=True)
+
+class WorkerConnection(ClientConnection):
+    """A client of a worker process"""
+    
+    def __init__(self, sock, addr, policy, metrics, token):
+        super().__init__(sock, addr, policy, metrics)
+        self.token = token  # identifies the client on the bus
+
+class WorkerEngine(SelectorEngine):
+    """Engine of a worker process: serves clients and relays their frames to the hub"""
+    
+    tick_interval = STATS_INTERVAL
+    
+    def __init__(self, bus, backpressure, heartbeat, batching, tls=None):
+        super().__init__(None, backpressure, heartbeat=heartbeat, batching=batching, tls=tls)
+        bus.setblocking(False)
+        self.bus = ClientConnection(bus, ('hub', 0), UNBOUNDED)
+        self.bus.parser = FrameParser(limit=BUS_PAYLOAD)
+        self.selector.register(bus, selectors.EVENT_READ, self.bus)
+        self.clients = {}  # {token: WorkerConnection}
+        self.tokens = itertools.count(1)
+        self.reported = None
+        self.reported_metrics = None
+        self.stopped = threading.Event()  # set once the hub is gone
+    
+    def accept_clients(self, server_socket):
+        """Accept every pending connection and announce it to the hub"""
+        while True:
+            try:
+                client_socket, client_addr = server_socket.accept()
+            except BlockingIOError:
+                return
+            except OSError as e:
+                self.report_error(e)
+                return
+            
+            client_socket.setblocking(False)
+            self.metrics.connections_opened += 1
+            conn = WorkerConnection(
+                self.secure(client_socket), client_addr, self.backpressure, self.metrics, next(self.tokens)
+            )
+            conn.handshaking = self.tls is not None
+            self.clients[conn.token] = conn
+            self.watch(conn, self.now)
+            self.selector.register(conn.sock, selectors.EVENT_READ, conn)
+            self.send(self.bus, encode_json(BUS_OPEN, token=conn.token, addr=client_addr))
+    
+    def report_error(self, error):
+        """Send an error to the hub to report, as workers have no server core of their own"""
+        self.send(self.bus, encode_frame(BUS_ERROR, str(error)))
+    
+    def read(self, conn):
+        if conn is self.bus:
+            self.read_bus()
+        else:
+            super().read(conn)
+    
+    def batched(self, conn):
+        """Frames for the hub go out at once; only those for clients wait for the batching window"""
+        return conn is not self.bus and super().batched(conn)
+    
+    def handle_frame(self, conn, msg_type, payload):
+        """Relay a client frame to the hub"""
+        if msg_type == MSG_EXIT:
+            return False
+        self.send(self.bus, encode_frame(BUS_FRAME, FORWARD.pack(conn.token, msg_type) + payload))
+        return True
+    
+    def read_bus(self):
+        """Handle the bus messages the hub sent"""
+        if not self.bus.parser.recv_into(self.bus.sock):
+            self.close(self.bus)
+            return
+        for msg_type, payload in self.bus.parser.frames():
+            if msg_type == BUS_SEND:
+                start = TOKEN.size * (TOKEN.unpack_from(payload)[0] + 1)
+                tokens = array('I')
+                tokens.frombytes(payload[TOKEN.size:start])
+                frame = bytes(payload[start:])
+                for token in tokens:
+                    conn = self.clients.get(token)
+                    if conn is not None:
+                        self.send(conn, frame)
+            elif msg_type == BUS_CLOSE:
+                conn = self.clients.get(CLOSE.unpack_from(payload)[0])
+                if conn is not None:
+                    self.close(conn)
+            elif msg_type == BUS_COMPRESS:
+                token, level, threshold = COMPRESS.unpack_from(payload)
+                conn = self.clients.get(token)
+                if conn is not None:
+                    self.enable_compression(conn, level, threshold)
+            elif msg_type == BUS_STREAM:
+                stream = decode_json(payload)
+                conn = self.clients.get(stream.pop('token'))
+                if conn is not None:
+                    self.stream_file(conn, ChunkReader(**stream))
+    
+    def tick(self):
+        """Check the idle timers, and report the backpressure state and metrics to the hub when they changed"""
+        super().tick()
+        stats = self.backpressure_state(self.clients.values())
+        if stats != self.reported:
+            self.reported = stats
+            self.send(self.bus, encode_frame(BUS_STATS, STATS.pack(*stats)))
+        snapshot = self.metrics_snapshot(self.clients.values())
+        if snapshot != self.reported_metrics:
+            self.reported_metrics = snapshot
+            self.send(self.bus, encode_json(BUS_METRICS, **snapshot))
+    
+    def close(self, conn, unexpected=False):
+        """Close a client connection and tell the hub; stop once the bus to the hub is gone"""
+        if conn is self.bus:
+            self.stopped.set()
+            return
+        if conn.closed:
+            return
+        conn.closed = True
+        self.metrics.connections_closed += 1
+        del self.clients[conn.token]
+        try:
+            self.selector.unregister(conn.sock)
+            conn.sock.close()
+        finally:
+            self.send(self.bus, encode_frame(BUS_CLOSE, CLOSE.pack(conn.token, unexpected)))
+
+def run_worker(bus, listener, address, backpressure, heartbeat, batching, tls=None):
+    """Entry point of a worker process: serve clients until the hub goes away"""
+    # Ctrl+C stops the hub, and the workers with it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        if listener is None:
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            share_port(listener)
+            listener.bind(address)
+            listener.listen(socket.SOMAXCONN)
+    except OSError as e:
+        bus.sendall(encode_json(BUS_READY, error=str(e)))
+        return
+    bus.sendall(encode_json(BUS_READY))
+    engine = WorkerEngine(bus, backpressure, heartbeat, batching, tls)
+    engine.start(listener)
+    engine.stopped.wait()
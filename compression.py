@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Optional per-connection zlib compression
+
+Each direction of a connection that negotiated the "zlib" capability has one
+raw deflate stream, primed with a dictionary of strings that occur in almost
+every frame. A sender packs a batch of complete frames into one MSG_ZLIB
+frame and flushes the stream with Z_SYNC_FLUSH, so the receiver can inflate
+it right away and parse the frames inside; the stream keeps its window across
+batches, so repetitive chat compresses far better than frame by frame.
+Batches smaller than the threshold are sent as they are.
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import zlib
+
+from protocol import MAX_PAYLOAD, MSG_ZLIB, ProtocolError, encode_frame
+
+CAPABILITY = 'zlib'
+DEFAULT_LEVEL = 6
+DEFAULT_THRESHOLD = 256  # batches of fewer bytes are not worth compressing
+WBITS = -15              # raw deflate: no zlib header or checksum per stream
+
+# Strings the peers send all the time; the most frequent ones go last
+ZDICT = b''.join([
+    "消息 房间 在线 大家好 谢谢 你好 ".encode('utf-8'),
+    b'the you and that this have for with what are not just can will ',
+    b'hello thanks please sorry okay yes no lol http:// https:// www. .com ',
+    b'{"nickname": "', b'{"from": "', b'", "text": "', b'{"to": "',
+    b'{"code": "replayed", "count": ', b'{"code": "skipped", "count": ',
+    b'{"room": "lobby", "rooms": {"lobby": ',
+    b'\x00\x00\x00\x05', b'\x00\x00\x00\x02', b': ',
+])
+
+class Deflater:
+    """Compressing end of one direction of a connection"""
+    
+    def __init__(self, level=DEFAULT_LEVEL, threshold=DEFAULT_THRESHOLD):
+        self.stream = zlib.compressobj(level, zlib.DEFLATED, WBITS, zdict=ZDICT)
+        self.threshold = threshold
+        self.bytes_in = 0   # frame bytes compressed
+        self.bytes_out = 0  # MSG_ZLIB frame bytes produced
+    
+    def pack(self, frames):
+        """Return one MSG_ZLIB frame holding frames, or None if they are below the threshold
+        
+        Once frames have been packed the returned frame must be sent, and
+        before anything packed later: the peer's stream has to see every
+        byte this stream has produced, in order.
+        """
+        size = sum(map(len, frames))
+        if size < self.threshold:
+            return None
+        data = self.stream.compress(b''.join(frames)) + self.stream.flush(zlib.Z_SYNC_FLUSH)
+        frame = encode_frame(MSG_ZLIB, data)
+        self.bytes_in += size
+        self.bytes_out += len(frame)
+        return frame
+
+class Inflater:
+    """Decompressing end of one direction of a connection"""
+    
+    def __init__(self, limit=4 * MAX_PAYLOAD):
+        self.stream = zlib.decompressobj(WBITS, zdict=ZDICT)
+        self.limit = limit  # most bytes one MSG_ZLIB frame may inflate to
+    
+    def unpack(self, payload):
+        """Return the frame bytes held by a MSG_ZLIB payload"""
+        try:
+            data = self.stream.decompress(payload, self.limit)
+        except zlib.error as e:
+            raise ProtocolError(f"invalid compressed frame: {e}") from None
+        if self.stream.unconsumed_tail:
+            raise ProtocolError(f"compressed frame inflates to more than {self.limit} bytes")
+        return data
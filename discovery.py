@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Finding servers on the local network
+
+A client looking for servers sends a probe datagram to a multicast group,
+on the network and on the loopback interface, and to the broadcast address,
+all on the discovery port. Every server's Beacon answers the probe directly to the client with
+its name, TCP port and how long the answer stays valid, so a search is a
+single round trip. Servers only talk when asked: an idle network carries no
+discovery traffic.
+
+Clients keep the servers they found in a small JSON file until the
+announced lifetime runs out, so later launches connect without searching.
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import ipaddress
+import json
+import os
+import secrets
+import socket
+import struct
+import threading
+import time
+from collections import namedtuple
+
+SERVICE = 'chatverse'
+DISCOVERY_GROUP = '239.255.66.66'  # administratively scoped, stays inside the site
+DISCOVERY_PORT = 6667
+DISCOVERY_TIMEOUT = 0.5  # seconds a client waits for answers
+ANNOUNCE_TTL = 3600      # seconds clients may keep connecting to a server without searching again
+DEFAULT_SERVER = ('127.0.0.1', 6666)  # tried when no server answers
+CACHE_PATH = os.path.join(os.path.expanduser('~'), '.chatverse', 'servers.json')
+LOOPBACK = '127.0.0.1'
+MAX_DATAGRAM = 1024
+POLL_INTERVAL = 0.5  # seconds between checks whether the beacon was closed
+
+Server = namedtuple('Server', 'name host port ttl')
+
+def probe_packet():
+    return json.dumps({'service': SERVICE, 'type': 'probe'}).encode('utf-8')
+
+def decode_packet(data, kind):
+    """Return the fields of a discovery datagram of the given type, or None for anything else"""
+    try:
+        packet = json.loads(data.decode('utf-8'))
+    except (UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(packet, dict) or packet.get('service') != SERVICE or packet.get('type') != kind:
+        return None
+    return packet
+
+def parse_address(text):
+    """Turn "host" or "host:port" into an address, with the default chat port when none is given"""
+    host, colon, port = text.rpartition(':')
+    if not colon:
+        return (text, DEFAULT_SERVER[1])
+    if not host or not port.isdigit() or not 0 < int(port) <= 65535:
+        raise ValueError(f"invalid server address: {text}")
+    return (host, int(port))
+
+def is_loopback(host):
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return host == 'localhost'
+
+class Beacon:
+    """Answers discovery probes for a server listening on (host, port)
+    
+    A server listening on every interface leaves the address out of its
+    answers and clients use the one the answer came from; a server bound to
+    one address announces that address, and a server bound to a loopback
+    address only answers probes from the same machine.
+    """
+    
+    def __init__(self, host, port, name=None, discovery_port=DISCOVERY_PORT, group=DISCOVERY_GROUP, ttl=ANNOUNCE_TTL):
+        self.local_only = is_loopback(host)
+        answer = {
+            'service': SERVICE,
+            'type': 'announce',
+            'id': secrets.token_hex(8),  # the same server answers each probe once per path; clients drop the copies
+            'name': name or socket.gethostname(),
+            'port': port,
+            'ttl': ttl,
+        }
+        if host not in ('', '0.0.0.0'):
+            answer['host'] = host
+        self.answer = json.dumps(answer).encode('utf-8')
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            # Several servers on one machine share the discovery port; multicast and broadcast probes reach all of them
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if hasattr(socket, 'SO_REUSEPORT'):
+                self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            self.sock.bind(('', discovery_port))
+        except OSError:
+            self.sock.close()
+            raise
+        for interface in ('0.0.0.0', LOOPBACK):
+            try:
+                membership = struct.pack('4s4s', socket.inet_aton(group), socket.inet_aton(interface))
+                self.sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+            except OSError:
+                pass  # no multicast on this interface: the other probes still arrive
+        self.sock.settimeout(POLL_INTERVAL)
+        self.closed = threading.Event()
+    
+    @property
+    def port(self):
+        return self.sock.getsockname()[1]
+    
+    def start(self):
+        threading.Thread(target=self.serve, daemon=True).start()
+    
+    def serve(self):
+        """Answer probes until closed"""
+        while not self.closed.is_set():
+            try:
+                data, addr = self.sock.recvfrom(MAX_DATAGRAM)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            if decode_packet(data, 'probe') is None:
+                continue
+            if self.local_only and not is_loopback(addr[0]):
+                continue
+            try:
+                self.sock.sendto(self.answer, addr)
+            except OSError:
+                pass  # the client is gone; it would not have waited long anyway
+        self.sock.close()
+    
+    def close(self):
+        self.closed.set()
+
+def discover(timeout=DISCOVERY_TIMEOUT, discovery_port=DISCOVERY_PORT, group=DISCOVERY_GROUP):
+    """Probe the local network and return the servers that answered within timeout seconds, fastest first"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+        sock.bind(('', 0))
+        probe = probe_packet()
+        for target, interface in ((group, None), ('<broadcast>', None), (group, LOOPBACK)):
+            try:
+                if interface is not None:
+                    # Servers on this machine, even one bound to 127.0.0.1 or without a network
+                    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+                sock.sendto(probe, (target, discovery_port))
+            except OSError:
+                pass  # no route for this kind of probe here; the others may still get through
+        
+        servers, seen = [], set()
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            sock.settimeout(remaining)
+            try:
+                data, addr = sock.recvfrom(MAX_DATAGRAM)
+            except socket.timeout:
+                break
+            answer = decode_packet(data, 'announce')
+            if answer is None or answer.get('id') in seen:
+                continue
+            try:
+                server = Server(
+                    str(answer.get('name', '')),
+                    str(answer.get('host') or addr[0]),
+                    int(answer['port']),
+                    float(answer.get('ttl', ANNOUNCE_TTL))
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+            seen.add(answer.get('id'))
+            servers.append(server)
+        return servers
+    finally:
+        sock.close()
+
+class ServerCache:
+    """Servers found earlier, kept in a JSON file until their announced lifetime runs out
+    
+    The cache only saves a search; any error reading or writing the file
+    leaves it empty or unsaved rather than stopping the client.
+    """
+    
+    def __init__(self, path=CACHE_PATH):
+        self.path = path
+        self.entries = {}  # {"host:port": {'name', 'host', 'port', 'ttl', 'expires'}}
+        try:
+            with open(path, encoding='utf-8') as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                self.entries = {key: entry for key, entry in entries.items() if isinstance(entry, dict)}
+        except (OSError, ValueError):
+            pass
+    
+    def servers(self, now=None):
+        """Return the servers that have not expired, the most recently confirmed first"""
+        now = time.time() if now is None else now
+        fresh = []
+        for entry in self.entries.values():
+            try:
+                if entry['expires'] > now:
+                    fresh.append((entry['expires'] - entry['ttl'], Server(entry['name'], entry['host'], entry['port'], entry['ttl'])))
+            except (KeyError, TypeError):
+                continue
+        fresh.sort(key=lambda item: item[0], reverse=True)
+        return [server for confirmed, server in fresh]
+    
+    def add(self, servers, now=None):
+        """Remember servers found or connected to just now"""
+        now = time.time() if now is None else now
+        for server in servers:
+            self.entries[f"{server.host}:{server.port}"] = dict(server._asdict(), expires=now + server.ttl)
+        self.save()
+    
+    def forget(self, address):
+        """Drop a server that could not be reached"""
+        if self.entries.pop(f"{address[0]}:{address[1]}", None) is not None:
+            self.save()
+    
+    def save(self):
+        now = time.time()
+        entries = {key: entry for key, entry in self.entries.items() if entry.get('expires', 0) > now}
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temporary = f"{self.path}.tmp"
+            with open(temporary, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(temporary, self.path)
+        except OSError:
+            pass
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Chunked, resumable file transfer
+
+Files travel as MSG_CHUNK frames of at most CHUNK_SIZE bytes, each read
+from disk into one buffer that is reused for every chunk of a transfer, so
+a file is never held in memory as a whole. Both ends write what they
+receive to a .part file and hash it as it arrives; the SHA-256 announced
+up front is checked once the last byte is in, and a transfer that broke off
+continues from the size of the .part file.
+
+On the server, files are stored in a FileStore under their SHA-256 and
+sent to clients by the engines through a ChunkReader on the client's
+outbox, one chunk at a time and only when no other frame is waiting, so a
+large download never holds up chat messages.
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import hashlib
+import os
+import re
+import socket
+import threading
+
+from protocol import CHUNK_HEADER, HEADER, MSG_CHUNK, MSG_UPLOAD, encode_json
+
+CHUNK_SIZE = 64 * 1024              # file bytes per MSG_CHUNK frame
+UNSENT_LIMIT = CHUNK_SIZE           # bytes a connection sending a file may have waiting in the kernel
+RESUME_CHECK_INTERVAL = 0.25        # seconds between checks of the server for .part files hashed to resume uploads
+MAX_FILE_SIZE = 1024 * 1024 * 1024  # largest file the server accepts by default
+DOWNLOAD_DIRECTORY = os.path.join(os.path.expanduser('~'), 'Downloads', 'ChatVerse')
+SHA256 = re.compile(r'[0-9a-f]{64}')
+UNSAFE = re.compile(r'[\x00-\x1f<>:"/\\|?*]')  # characters some file systems do not allow in names
+
+def limit_unsent(sock, limit=UNSENT_LIMIT):
+    """Keep the kernel from queueing more than limit unsent bytes for sock
+    
+    Without this a socket takes megabytes of file chunks into its send
+    buffer, and a chat message queued after them waits until they are all
+    on the wire. Where the platform has no TCP_NOTSENT_LOWAT the send
+    buffer size is capped instead.
+    """
+    try:
+        if hasattr(socket, 'TCP_NOTSENT_LOWAT'):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NOTSENT_LOWAT, limit)
+        else:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4 * limit)
+    except OSError:
+        pass
+
+class FileError(Exception):
+    """Raised when a transfer cannot go on: a chunk out of order, a checksum mismatch"""
+
+def file_digest(path):
+    """Return the SHA-256 of a file as hex, reading it one chunk at a time"""
+    with open(path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+def safe_name(name):
+    """Turn a file name from a peer into one that is safe to create in a directory"""
+    name = UNSAFE.sub('_', os.path.basename(str(name).replace('\\', '/'))).strip(' .')
+    return name[:200] or 'file'
+
+def unique_path(directory, name):
+    """Return a path for name in directory that is not taken yet, numbering the name if needed"""
+    base, extension = os.path.splitext(name)
+    path = os.path.join(directory, name)
+    number = 1
+    while os.path.exists(path):
+        path = os.path.join(directory, f"{base} ({number}){extension}")
+        number += 1
+    return path
+
+def format_size(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+class ChunkReader:
+    """Reads a byte range of a file as MSG_CHUNK frames of one transfer
+    
+    Every frame is a view of the same buffer: it must have been sent before
+    the next one is read.
+    """
+    
+    def __init__(self, path, transfer, offset, end):
+        self.path = path
+        self.transfer = transfer
+        self.offset = offset
+        self.end = end
+        self.file = None
+        self.buffer = None
+    
+    def next_frame(self):
+        """Return the frame of the next chunk, or None at the end of the range or if the file cannot be read"""
+        if self.offset >= self.end:
+            self.close()
+            return None
+        try:
+            if self.file is None:
+                self.file = open(self.path, 'rb')
+                self.file.seek(self.offset)
+                self.buffer = bytearray(HEADER.size + CHUNK_HEADER.size + min(CHUNK_SIZE, self.end - self.offset))
+            start = HEADER.size + CHUNK_HEADER.size
+            view = memoryview(self.buffer)
+            count = self.file.readinto(view[start:start + min(CHUNK_SIZE, self.end - self.offset)])
+        except OSError:
+            count = 0
+        if not count:
+            self.close()  # the file is gone or shorter than announced: the receiver finds the transfer incomplete
+            return None
+        HEADER.pack_into(self.buffer, 0, CHUNK_HEADER.size + count, MSG_CHUNK)
+        CHUNK_HEADER.pack_into(self.buffer, HEADER.size, self.transfer, self.offset)
+        self.offset += count
+        return view[:start + count]
+    
+    def close(self):
+        self.offset = self.end
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+class OutgoingFile:
+    """A file a client shares: its name, size and SHA-256, worked out once when it is picked"""
+    
+    def __init__(self, path, transfer):
+        self.path = path
+        self.transfer = transfer
+        self.name = os.path.basename(path)
+        self.size = os.path.getsize(path)
+        self.sha256 = file_digest(path)
+    
+    def offer(self):
+        """Build the frame asking the server where to start sending from"""
+        return encode_json(MSG_UPLOAD, transfer=self.transfer, name=self.name, size=self.size, sha256=self.sha256)
+
+class PartialFile:
+    """A file being received into a .part file, renamed to its final path once complete and verified
+    
+    Whatever a .part file already holds is hashed by resume(), so a
+    transfer can go on from its size even after a restart. That happens when
+    it is opened, except on the server, where the FileStore hashes it in a
+    thread of its own rather than hold up every client of the engine.
+    """
+    
+    def __init__(self, part_path, size, sha256, resume=True):
+        self.part_path = part_path
+        self.size = size
+        self.sha256 = sha256
+        self.digest = hashlib.sha256()
+        self.file = None
+        self.owner = None  # connection allowed to write, on the server
+        self.offset = 0
+        self.resuming = False  # set while a thread of the FileStore runs resume()
+        self.error = None  # OSError that kept resume() from reading the .part file, in that thread
+        if resume:
+            self.resume()
+    
+    def resume(self):
+        """Hash what the .part file holds and go on from its end; reads the whole of it"""
+        try:
+            if os.path.getsize(self.part_path) > self.size:
+                os.remove(self.part_path)
+            else:
+                with open(self.part_path, 'rb') as f:
+                    self.digest = hashlib.file_digest(f, 'sha256')
+                    self.offset = f.tell()
+        except FileNotFoundError:
+            pass
+    
+    @property
+    def complete(self):
+        return self.offset >= self.size
+    
+    def write(self, offset, data):
+        """Append a chunk that starts at offset; returns True once every byte is in"""
+        if self.resuming or offset != self.offset or offset + len(data) > self.size:
+            raise FileError(f"chunk at {offset} does not continue the {self.offset} bytes received")
+        if self.file is None:
+            self.file = open(self.part_path, 'ab')
+        self.file.write(data)
+        self.digest.update(data)
+        self.offset += len(data)
+        return self.complete
+    
+    def finish(self, path):
+        """Check the SHA-256 and move the file to path; a mismatching file is deleted"""
+        self.close()
+        if self.digest.hexdigest() != self.sha256:
+            os.remove(self.part_path)
+            raise FileError("checksum mismatch")
+        os.replace(self.part_path, path)
+        return path
+    
+    def close(self):
+        """Release the open file; writing again reopens it"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+class FileStore:
+    """Files shared on the server, each stored once under its SHA-256 however often and under whichever name"""
+    
+    def __init__(self, directory, max_size=MAX_FILE_SIZE):
+        self.directory = os.path.abspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_size = max_size
+        self.uploads = {}  # {sha256: PartialFile} of uploads not complete yet, kept with their hash state for resuming
+        self.lock = threading.Lock()
+    
+    def path(self, sha256):
+        """Return the path of a stored file, or None if there is none"""
+        path = os.path.join(self.directory, sha256)
+        return path if SHA256.fullmatch(sha256) and os.path.isfile(path) else None
+    
+    def upload(self, sha256, size, owner):
+        """Return (PartialFile the upload goes to, connection it was taken over from or None), or (None, None) if the file is stored already
+        
+        Only an upload of the same size is taken over, as when its client reconnected; raises FileError if the
+        stored file or an upload still under way has another size than the one offered.
+        """
+        with self.lock:
+            path = self.path(sha256)
+            if path is not None:
+                stored = os.path.getsize(path)
+                if stored != size:
+                    raise FileError(f"the file stored with this SHA-256 has {stored} bytes, not {size}")
+                return None, None
+            upload = self.uploads.get(sha256)
+            if upload is not None and upload.size != size:
+                if upload.owner is not None and not upload.owner.closed:
+                    raise FileError(f"another upload of this file has {upload.size} bytes, not {size}")
+                upload.close()  # given up by its client: start over with the size offered now
+                upload = None
+            if upload is None:
+                upload = PartialFile(os.path.join(self.directory, f"{sha256}.part"), size, sha256, resume=False)
+                self.uploads[sha256] = upload
+                if os.path.exists(upload.part_path):
+                    upload.resuming = True
+                    threading.Thread(target=self.resume, args=(upload,), daemon=True).start()
+            previous, upload.owner = upload.owner, owner
+            return upload, previous
+    
+    def resume(self, upload):
+        """Hash the .part file of an upload, which may be as large as the largest file accepted"""
+        try:
+            upload.resume()
+        except OSError as e:
+            upload.error = e
+            with self.lock:
+                if self.uploads.get(upload.sha256) is upload:
+                    del self.uploads[upload.sha256]
+        finally:
+            upload.resuming = False
+    
+    def finish(self, upload):
+        """Verify a complete upload and store it; raises FileError on a checksum mismatch"""
+        with self.lock:
+            self.uploads.pop(upload.sha256, None)
+        upload.finish(os.path.join(self.directory, upload.sha256))
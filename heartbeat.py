@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Heartbeats and reaping of idle connections
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import heapq
+import itertools
+import socket
+import threading
+
+DEFAULT_INTERVAL = 30.0   # seconds of silence before a client is pinged
+DEFAULT_TIMEOUT = 90.0    # seconds of silence before a client is disconnected
+DEFAULT_KEEPALIVE = 60.0  # seconds of silence before the kernel sends TCP keepalive probes
+KEEPALIVE_INTERVAL = 10   # seconds between TCP keepalive probes
+KEEPALIVE_COUNT = 3       # unanswered probes before the kernel drops the connection
+CHECK_INTERVAL = 1.0      # seconds between checks of the idle timers
+
+class HeartbeatPolicy:
+    """Heartbeat settings shared by every connection
+    
+    A client that has sent nothing for interval seconds is sent MSG_PING,
+    again every interval seconds while it stays silent, and disconnected
+    once it has been silent for timeout seconds. Clients answer with
+    MSG_PONG, which like any other frame counts as a sign of life. TCP
+    keepalive, tuned to keepalive seconds, also catches peers that vanished
+    while the server had nothing to send them.
+    """
+    
+    def __init__(self, interval=DEFAULT_INTERVAL, timeout=DEFAULT_TIMEOUT, keepalive=DEFAULT_KEEPALIVE):
+        if interval < 0 or keepalive < 0:
+            raise ValueError("heartbeat and keepalive intervals cannot be negative")
+        if interval and timeout <= interval:
+            raise ValueError("the idle timeout must be longer than the heartbeat interval")
+        self.interval = interval  # 0: no heartbeats and no idle timeout
+        self.timeout = timeout
+        self.keepalive = keepalive  # 0: leave TCP keepalive as the system has it
+    
+    def configure(self, sock):
+        """Set up TCP keepalive for a newly accepted connection"""
+        if self.keepalive:
+            set_keepalive(sock, self.keepalive)
+
+def set_keepalive(sock, idle=DEFAULT_KEEPALIVE):
+    """Turn on TCP keepalive for a socket, probing after idle seconds where the platform allows it"""
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    except OSError:
+        return
+    for option, value in (
+        ('TCP_KEEPIDLE', idle),
+        ('TCP_KEEPALIVE', idle),  # macOS name of TCP_KEEPIDLE
+        ('TCP_KEEPINTVL', KEEPALIVE_INTERVAL),
+        ('TCP_KEEPCNT', KEEPALIVE_COUNT),
+    ):
+        if hasattr(socket, option):
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), max(int(value), 1))
+            except OSError:
+                pass  # the name is known but the system does not support the option
+
+class IdleReaper:
+    """One heap of idle deadlines for every connection of an engine
+    
+    Connections only note the time of their last received data; the heap
+    holds one entry per connection, which is checked when it falls due and
+    pushed back if the connection was heard from in the meantime. A busy
+    connection therefore costs one heap operation per interval, not one
+    per frame, and there is no timer per client.
+    """
+    
+    def __init__(self, policy):
+        self.policy = policy
+        self.heap = []  # (deadline, tie breaker, connection)
+        self.order = itertools.count()
+        self.lock = threading.Lock()  # connections are added and checked from different threads in the threaded engine
+    
+    def add(self, conn, now):
+        """Start watching a new connection"""
+        conn.last_seen = now
+        self.push(now + self.policy.interval, conn)
+    
+    def push(self, deadline, conn):
+        with self.lock:
+            heapq.heappush(self.heap, (deadline, next(self.order), conn))
+    
+    def check(self, now):
+        """Return (connections to ping, connections to disconnect) for the deadlines that passed"""
+        policy = self.policy
+        due = []
+        with self.lock:
+            while self.heap and self.heap[0][0] <= now:
+                due.append(heapq.heappop(self.heap)[2])
+                
+        ping, reap, watched = [], [], []
+        for conn in due:
+            if conn.closed:
+                continue
+            silent = now - conn.last_seen
+            if silent >= policy.timeout:
+                reap.append(conn)
+                continue
+            if silent >= policy.interval:
+                ping.append(conn)
+                deadline = min(now + policy.interval, conn.last_seen + policy.timeout)
+            else:
+                deadline = conn.last_seen + policy.interval
+            watched.append((deadline, next(self.order), conn))
+            
+        with self.lock:
+            for entry in watched:
+                heapq.heappush(self.heap, entry)
+        return ping, reap
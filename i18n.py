@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Choosing the language of the windows and messages
+
+Every language has one catalog module, messages_<locale>.py, holding a
+flat dict from message key to text; only the catalog of the chosen locale
+is imported, and the English one as well only if that catalog lacks a key.
+The locale comes from --lang, else the CHATVERSE_LANG environment variable,
+else the language of the launcher that was started (client_zh.py and the
+like), else the system locale.
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import argparse
+import importlib
+import os
+
+LOCALES = ('en', 'zh')
+DEFAULT_LOCALE = 'en'
+ENVIRONMENT = 'CHATVERSE_LANG'
+SYSTEM_ENVIRONMENT = ('LC_ALL', 'LC_MESSAGES', 'LANG')  # checked in this order, like gettext does
+
+def locale_parser(text=None):
+    """Return a parser of just --lang, used as a parent of the full parsers with help from the Catalog text"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--lang', choices=LOCALES, help=text('help.lang') if text else None)
+    return parser
+
+def match_locale(name):
+    """Return the supported locale of a name like "zh_CN.UTF-8", or None"""
+    language = name.split('.')[0].split('_')[0].split('-')[0].lower()
+    return language if language in LOCALES else None
+
+def select_locale(argv=None, default=None):
+    """Return the locale asked for with --lang or CHATVERSE_LANG, else default, else the system's, else English
+    
+    The launchers of one language pass it as default, so that edition stays
+    in its language whatever the system locale is.
+    """
+    requested, _ = locale_parser().parse_known_args(argv)
+    if requested.lang:
+        return requested.lang
+    names = [os.environ.get(ENVIRONMENT, ''), default or '']
+    names += [os.environ.get(name, '') for name in SYSTEM_ENVIRONMENT]
+    for name in names:
+        locale = match_locale(name) if name else None
+        if locale is not None:
+            return locale
+    return DEFAULT_LOCALE
+
+class Catalog:
+    """The messages of one locale: catalog(key, **fields) returns the text of key filled in with fields"""
+    
+    def __init__(self, locale=DEFAULT_LOCALE):
+        self.locale = locale
+        self.messages = load_messages(locale)
+        self.fallback = None  # English catalog, loaded for the first key this one lacks
+    
+    def __call__(self, key, **fields):
+        text = self.messages.get(key)
+        if text is None:
+            if self.fallback is None:
+                self.fallback = load_messages(DEFAULT_LOCALE)
+            text = self.fallback[key]
+        return text.format(**fields) if fields else text
+    
+    def __contains__(self, key):
+        return key in self.messages or key in load_messages(DEFAULT_LOCALE)
+
+def load_messages(locale):
+    """Import the catalog module of locale and return its messages"""
+    if locale not in LOCALES:
+        raise ValueError(f"unsupported locale: {locale}")
+    return importlib.import_module(f'messages_{locale}').MESSAGES
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Append-only on-disk message journal
+
+Chat messages are appended to segment files exactly as they are sent on the
+wire (one MSG_CHAT frame per message), so replaying history to a late joiner
+is a bulk read of a byte range: the range is memory-mapped and the mapping is
+queued on the client's outbox as it is, without decoding or re-encoding a
+single message. Segments are named after the ID of their first message and
+rolled over at a size limit; an in-memory offset index per segment finds the
+byte position of any message ID. Writes go to the page cache immediately and
+are fsync()ed in batches by a JournalStore, which keeps one journal per chat
+room. An indexed journal also keeps a full-text search index of its messages
+next to its segments (see search.py).
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_right
+
+from protocol import CHAT_HEADER, HEADER, MSG_CHAT, decode_chat, encode_chat
+from search import SEARCH_LIMIT, SearchIndex, index_path, journal_terms
+
+SEGMENT_BYTES = 8 * 1024 * 1024  # roll over to a new segment file after this size
+MAX_SEGMENTS = 16                # oldest segments beyond this count are deleted
+SYNC_INTERVAL = 1.0              # seconds between batched fsync() calls
+REPLAY_LIMIT = 500               # most messages sent to one joining client
+
+class Segment:
+    """One segment file and the offset index of its messages"""
+    
+    def __init__(self, path, first_id):
+        self.path = path
+        self.first_id = first_id
+        self.offsets = array('I', [0])  # start of every message, then the end of the last one
+    
+    @property
+    def size(self):
+        return self.offsets[-1]
+    
+    @property
+    def end_id(self):
+        """ID one past the last message in the segment"""
+        return self.first_id + len(self.offsets) - 1
+    
+    def scan(self):
+        """Rebuild the index from the file, cutting off a torn last write"""
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        position = 0
+        while position + HEADER.size + CHAT_HEADER.size <= len(data):
+            length, msg_type = HEADER.unpack_from(data, position)
+            msg_id = CHAT_HEADER.unpack_from(data, position + HEADER.size)[0]
+            end = position + HEADER.size + length
+            if msg_type != MSG_CHAT or msg_id != self.end_id or end > len(data):
+                break
+            self.offsets.append(end)
+            position = end
+        if position < len(data):
+            os.truncate(self.path, position)
+    
+    def map(self, start_id, stop_id):
+        """Return a memoryview of the frames of messages start_id..stop_id-1"""
+        start = self.offsets[start_id - self.first_id]
+        stop = self.offsets[stop_id - self.first_id]
+        base = start - start % mmap.ALLOCATIONGRANULARITY
+        with open(self.path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), stop - base, access=mmap.ACCESS_READ, offset=base)
+        # The view keeps the mapping alive until the frames have been written
+        return memoryview(mapping)[start - base:stop - base]
+
+class Journal:
+    """Segmented append-only message log with ID lookup"""
+    
+    def __init__(self, directory, segment_bytes=SEGMENT_BYTES, max_segments=MAX_SEGMENTS, indexed=False):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.lock = threading.Lock()
+        self.dirty = False
+        self.index = None  # SearchIndex of the messages when the journal is indexed
+        
+        self.segments = []
+        for name in sorted(os.listdir(directory)):
+            stem, ext = os.path.splitext(name)
+            if ext == '.log' and stem.isdigit():
+                segment = Segment(os.path.join(directory, name), int(stem))
+                if self.segments and segment.first_id != self.segments[-1].end_id:
+                    raise ValueError(f"journal segment {name} does not follow the previous one")
+                segment.scan()
+                self.segments.append(segment)
+        if not self.segments:
+            self.segments.append(self.new_segment(1))
+        self.first_ids = [segment.first_id for segment in self.segments]
+        self.trim()
+        if indexed:
+            self.index = SearchIndex()
+            for segment in self.segments:
+                self.index.open_segment(segment, active=segment is self.segments[-1])
+        self.file = open(self.segments[-1].path, 'ab', buffering=0)
+    
+    @property
+    def next_id(self):
+        """ID the next appended message will get"""
+        return self.segments[-1].end_id
+    
+    @property
+    def first_id(self):
+        """ID of the oldest message still kept"""
+        return self.segments[0].first_id
+    
+    def new_segment(self, first_id):
+        segment = Segment(os.path.join(self.directory, f"{first_id:020d}.log"), first_id)
+        open(segment.path, 'ab').close()
+        return segment
+    
+    def append(self, timestamp, text, terms=None):
+        """Store a chat message, indexed under terms if given; returns its encoded frame"""
+        with self.lock:
+            segment = self.segments[-1]
+            frame = encode_chat(segment.end_id, timestamp, text)
+            if segment.size and segment.size + len(frame) > self.segment_bytes:
+                segment = self.roll()
+            self.file.write(frame)
+            segment.offsets.append(segment.size + len(frame))
+            self.dirty = True
+            if self.index is not None:
+                self.index.add(timestamp, journal_terms(text) if terms is None else terms)
+            return frame
+    
+    def roll(self):
+        """Close the active segment, start a new one and apply the retention limit"""
+        os.fsync(self.file.fileno())
+        self.file.close()
+        segment = self.new_segment(self.next_id)
+        if self.index is not None:
+            self.index.roll(self.segments[-1], segment)
+        self.segments.append(segment)
+        self.first_ids.append(segment.first_id)
+        self.file = open(segment.path, 'ab', buffering=0)
+        self.trim()
+        self.dirty = False
+        return segment
+    
+    def trim(self):
+        """Delete the oldest segments beyond max_segments"""
+        while len(self.segments) > self.max_segments:
+            old = self.segments.pop(0)
+            self.first_ids.pop(0)
+            if self.index is not None:
+                self.index.drop()
+            for path in (old.path, index_path(old.path)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass  # still mapped by a replay on Windows; retried on the next roll or restart
+    
+    def read(self, last=None, since=None, limit=REPLAY_LIMIT):
+        """Return (count, views) for the newest last messages or those after ID since
+        
+        At most limit messages are returned; the views hold complete frames
+        ready to be queued on a client's outbox.
+        """
+        with self.lock:
+            stop = self.next_id
+            start = stop - min(limit, last if last is not None else limit)
+            if since is not None:
+                start = max(start, since + 1)
+            start = first = max(start, self.first_id)
+            views = []
+            index = bisect_right(self.first_ids, start) - 1
+            for segment in self.segments[max(index, 0):]:
+                if start >= stop:
+                    break
+                segment_stop = min(stop, segment.end_id)
+                if segment_stop > start:
+                    views.append(segment.map(start, segment_stop))
+                    start = segment_stop
+            return max(stop - first, 0), views
+    
+    def search(self, terms, since=None, until=None, before=None, limit=SEARCH_LIMIT):
+        """Return (messages, more) for the newest messages indexed under all terms
+        
+        messages holds up to limit (id, unix time, text) tuples, newest first,
+        and more tells whether older messages match as well. The filters are
+        those of SearchIndex.search().
+        """
+        with self.lock:
+            ids = self.index.search(terms, since, until, before, limit + 1)
+            return [self.message(msg_id) for msg_id in ids[:limit]], len(ids) > limit
+    
+    def message(self, msg_id):
+        """Return (id, unix time, text) of a stored message; needs the lock"""
+        segment = self.segments[bisect_right(self.first_ids, msg_id) - 1]
+        start = segment.offsets[msg_id - segment.first_id] + HEADER.size
+        stop = segment.offsets[msg_id - segment.first_id + 1]
+        with open(segment.path, 'rb') as f:
+            f.seek(start)
+            return decode_chat(f.read(stop - start))
+    
+    def sync(self):
+        """fsync() the active segment if anything was appended since the last call"""
+        with self.lock:
+            if self.dirty and not self.file.closed:
+                os.fsync(self.file.fileno())
+                self.dirty = False
+    
+    def close(self):
+        """Flush and close the active segment"""
+        self.sync()
+        with self.lock:
+            self.file.close()
+            if self.index is not None:
+                self.index.close(self.segments[-1])
+
+class JournalStore:
+    """Journals of every chat room below one directory, synced by one thread
+    
+    A journal opened with an empty name lives in the directory itself, the
+    others in a subdirectory named after them.
+    """
+    
+    def __init__(
+        self,
+        directory,
+        segment_bytes=SEGMENT_BYTES,
+        max_segments=MAX_SEGMENTS,
+        sync_interval=SYNC_INTERVAL,
+        indexed=False
+    ):
+        if segment_bytes < 1024 or segment_bytes >= 1 << 32:
+            raise ValueError("journal segment size must be at least 1 KiB and below 4 GiB")
+        if max_segments < 1:
+            raise ValueError("at least one journal segment must be kept")
+        if sync_interval <= 0:
+            raise ValueError("journal sync interval must be positive")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.sync_interval = sync_interval
+        self.indexed = indexed  # keep a search index of every journal
+        self.journals = set()
+        self.closed = threading.Event()
+        threading.Thread(target=self.sync_loop, daemon=True).start()
+    
+    def open(self, name=''):
+        """Open the journal called name; close it with release()"""
+        journal = Journal(os.path.join(self.directory, name), self.segment_bytes, self.max_segments, self.indexed)
+        self.journals.add(journal)
+        return journal
+    
+    def release(self, journal):
+        """Close a journal that is no longer used"""
+        self.journals.discard(journal)
+        journal.close()
+    
+    def sync_loop(self):
+        while not self.closed.wait(self.sync_interval):
+            for journal in list(self.journals):
+                try:
+                    journal.sync()
+                except (OSError, ValueError):
+                    pass  # released meanwhile, or the disk failed; appends report that
+    
+    def close(self):
+        """Flush and close every open journal"""
+        self.closed.set()
+        for journal in list(self.journals):
+            self.release(journal)
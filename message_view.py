@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Message list helpers shared by the server and client windows
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+from array import array
+from collections import deque
+from itertools import accumulate
+from queue import Empty
+
+HISTORY_LINES = 100000  # lines kept in memory
+VIEW_LINES = 1000       # lines kept in the Listbox widget
+PAGE_LINES = 200        # lines paged in when scrolling past the widget's edge
+END = 'end'             # tkinter.END, spelled out so this module does not load Tcl/Tk
+
+class MessageHistory:
+    """Bounded ring buffer of message lines, stored as compact UTF-8 chunks
+    
+    Lines are collected in a small tail list; every chunk_lines lines are
+    sealed into one bytes object plus an array of offsets, so a long history
+    costs two objects per chunk instead of one str per line. Once more than
+    capacity lines are kept, the oldest chunk is dropped. Lines are addressed
+    by absolute index: first is the oldest line still kept, end is one past
+    the newest.
+    """
+    
+    def __init__(self, capacity=HISTORY_LINES, chunk_lines=256):
+        self.capacity = capacity
+        self.chunk_lines = chunk_lines
+        self.chunks = deque()  # (blob, offsets) for sealed chunks
+        self.tail = []
+        self.first = 0
+        self.end = 0
+    
+    def extend(self, lines):
+        """Append lines, sealing full chunks and dropping the oldest ones"""
+        for line in lines:
+            self.tail.append(line)
+            if len(self.tail) == self.chunk_lines:
+                encoded = [line.encode('utf-8') for line in self.tail]
+                offsets = array('I', accumulate(map(len, encoded), initial=0))
+                self.chunks.append((b''.join(encoded), offsets))
+                self.tail = []
+        self.end += len(lines)
+        
+        while self.end - self.first > self.capacity and self.chunks:
+            self.chunks.popleft()
+            self.first += self.chunk_lines
+    
+    def lines(self, start, stop):
+        """Return lines start..stop (absolute indexes), clamped to what is kept"""
+        start = max(start, self.first)
+        stop = min(stop, self.end)
+        result = []
+        sealed = len(self.chunks) * self.chunk_lines
+        for index in range(start - self.first, stop - self.first):
+            if index >= sealed:
+                result.append(self.tail[index - sealed])
+            else:
+                blob, offsets = self.chunks[index // self.chunk_lines]
+                i = index % self.chunk_lines
+                result.append(blob[offsets[i]:offsets[i + 1]].decode('utf-8'))
+        return result
+
+class HistoryView:
+    """Shows a window of at most view_lines lines of a MessageHistory in a Listbox
+    
+    While the view is at the bottom new lines are appended and the oldest
+    widget rows are deleted. Scrolling to the top or bottom edge of the widget
+    pages older or newer lines in from the history, so the widget never grows
+    past its window however long the program runs.
+    """
+    
+    def __init__(self, listbox, scrollbar, history=None, view_lines=VIEW_LINES, page_lines=PAGE_LINES):
+        self.listbox = listbox
+        self.scrollbar = scrollbar
+        self.history = history or MessageHistory()
+        self.view_lines = view_lines
+        self.page_lines = page_lines
+        self.start = self.end = self.history.end  # history range shown in the widget
+        self.paging = False
+        
+        listbox.config(yscrollcommand=self.on_scroll)
+        scrollbar.config(command=listbox.yview)
+    
+    def append(self, lines):
+        """Add lines to the history, showing them if the view is at the bottom"""
+        following = self.end == self.history.end and self.listbox.yview()[1] >= 1.0
+        self.history.extend(lines)
+        if not following:
+            return
+        
+        self.listbox.insert(END, *lines)
+        self.end = self.history.end
+        excess = self.end - self.start - self.view_lines
+        if excess > 0:
+            self.listbox.delete(0, excess - 1)
+            self.start += excess
+        self.listbox.yview(END)
+    
+    def on_scroll(self, first, last):
+        """Keep the scrollbar in sync and page in more lines at the widget's edges"""
+        self.scrollbar.set(first, last)
+        if self.paging:
+            return
+        if float(first) <= 0.0 and self.start > self.history.first:
+            self.paging = True
+            self.listbox.after_idle(self.page_older)
+        elif float(last) >= 1.0 and self.end < self.history.end:
+            self.paging = True
+            self.listbox.after_idle(self.page_newer)
+    
+    def page_older(self):
+        """Insert the page before the first shown line, trimming the bottom"""
+        self.paging = False
+        start = max(self.history.first, self.start - self.page_lines)
+        lines = self.history.lines(start, self.start)
+        if not lines:
+            return
+        
+        top = self.listbox.nearest(0)
+        self.listbox.insert(0, *lines)
+        self.start = start
+        excess = self.end - self.start - self.view_lines
+        if excess > 0:
+            self.listbox.delete(self.end - self.start - excess, END)
+            self.end -= excess
+        self.listbox.yview(top + len(lines))
+    
+    def page_newer(self):
+        """Append the page after the last shown line, trimming the top"""
+        self.paging = False
+        if self.end < self.history.first:
+            # Everything shown has been dropped from the history meanwhile
+            self.listbox.delete(0, END)
+            self.start = self.end = self.history.first
+        lines = self.history.lines(self.end, self.end + self.page_lines)
+        if not lines:
+            return
+        
+        top = self.listbox.nearest(0)
+        self.listbox.insert(END, *lines)
+        self.end += len(lines)
+        excess = self.end - self.start - self.view_lines
+        if excess > 0:
+            self.listbox.delete(0, excess - 1)
+            self.start += excess
+            top -= excess
+        self.listbox.yview(max(top, 0))
+
+class MessagePump:
+    """Moves queued messages into a HistoryView from the Tk thread, in batches
+    
+    Network threads only put strings on the queue, or callables for other
+    widget updates. The pump runs from root.after(), so every widget call
+    happens on the Tk thread: it adds everything that arrived since the last
+    run with one call and scrolls once, calling queued callables in order
+    with the messages around them. While idle it only wakes up every
+    idle_interval ms.
+    """
+    
+    def __init__(self, root, view, queue, batch_size=500, idle_interval=50):
+        self.root = root
+        self.view = view
+        self.queue = queue
+        self.batch_size = batch_size
+        self.idle_interval = idle_interval
+    
+    def start(self):
+        """Schedule the first run on the Tk event loop"""
+        self.root.after(self.idle_interval, self.drain)
+    
+    def drain(self):
+        """Show up to one batch of queued messages, then reschedule"""
+        lines = []
+        taken = 0
+        try:
+            while taken < self.batch_size:
+                item = self.queue.get_nowait()
+                taken += 1
+                if callable(item):
+                    if lines:
+                        self.view.append(lines)
+                        lines = []
+                    item()
+                else:
+                    lines.append(item)
+        except Empty:
+            pass
+        
+        if lines:
+            self.view.append(lines)
+            
+        # A full batch means more are waiting: come back as soon as Tk has handled its own events
+        self.root.after(1 if taken == self.batch_size else self.idle_interval, self.drain)
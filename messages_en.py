@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Language -> English
+
+Python Local Area Network ChatVerse - English messages
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+MESSAGES = {
+    # Server window
+    'server.description': "Python Local Area Network ChatVerse server",
+    'server.headless_description': "Python Local Area Network ChatVerse headless server",
+    'server.title': "Network Chat Room [Server]",
+    
+    # Client window and messages
+    'client.description': "Python Local Area Network ChatVerse client",
+    'client.title': "Network Chat Room [Client]",
+    'client.title_user': "Chat Room - User: {nickname}",
+    'client.title_room': "Chat Room - User: {nickname} - Room: {room}",
+    'client.nickname': "Nickname:",
+    'client.join': "Join",
+    'client.room': "Room:",
+    'client.switch': "Switch",
+    'client.message': "Message:",
+    'client.send': "Send",
+    'client.file': "File",
+    'client.share_title': "Share a file",
+    'client.connect_failed': "Failed to connect to server: {error}, retrying...",
+    'client.tls_failed': "cannot load the TLS certificates: {error}",
+    'client.connected': "Connected to server, please enter your nickname",
+    'client.connection_lost': "Connection to server has been lost, reconnecting...",
+    'client.found_server': "Found server {name} at {host}:{port}",
+    'client.not_connected': "Not connected to the server yet",
+    'client.nickname_failed': "Failed to set nickname: {error}",
+    'client.welcome': "Welcome {nickname} to the chat room!",
+    'client.send_failed': "Failed to send message: {error}",
+    'client.share_failed': "Failed to share file: {error}",
+    'client.sending_file': "[Sending {name} ({size})...]",
+    'client.file_queued': "[{name} will be sent once reconnected]",
+    'client.get_usage': "Usage: /get file number",
+    'client.download_failed': "Failed to download {name}: {error}",
+    'client.downloading': "[Downloading {name} ({size})...]",
+    'client.download_broken': "[Download of {name} failed: {error}]",
+    'client.saved': "[{name} saved to {path}]",
+    'client.file_shared': "[{sender} shared {name} ({size}), type /get {number} to download it]",
+    'client.msg_usage': "Usage: /msg nickname message",
+    'client.private_to': "[Private to {to}] {text}",
+    'client.private_from': "[Private from {sender}] {text}",
+    'client.queued': "{echo} [will be sent once reconnected]",
+    'client.queue_full': "[Too many messages are waiting for the connection; this one was not sent]",
+    'client.room_offline': "Failed to change room: not connected to the server",
+    'client.room_failed': "Failed to change room: {error}",
+    'client.in_room': "[You are now in room {room}]",
+    'client.receive_failed': "Error receiving message: {error}",
+    'client.reconnected': "[Reconnected to the server]",
+    'client.online': "{count} online: {users}",
+    'client.typing': "{users} typing...",
+    'client.search_usage': "Usage: /search [from:nickname] [since:YYYY-MM-DD] [until:YYYY-MM-DD] words",
+    'client.search_results': "[{count} messages found, newest first]",
+    'client.search_none': "[No messages found]",
+    'client.search_more': "[Type /more for older results]",
+    'client.search_end': "[No more results]",
+    
+    # Server notices shown to the user
+    'notice.bad_nickname': "[Invalid nickname {nickname}: use 1-32 characters without spaces]",
+    'notice.bad_room': "[Invalid room name: {room}]",
+    'notice.file_failed': "[Transfer of {name} failed: {error}]",
+    'notice.file_too_large': "[{name} was not shared: the server accepts files of up to {limit} bytes]",
+    'notice.me_usage': "[Usage: /me action]",
+    'notice.nick_in_use': "[The nickname {nickname} is already in use]",
+    'notice.nick_invalid': "[{nickname} cannot be a nickname: use 1-32 characters without spaces]",
+    'notice.nickname_taken': "[The nickname {nickname} is already in use, please choose another]",
+    'notice.no_files': "[{name} was not shared: the server does not accept files]",
+    'notice.no_search': "[The server keeps no searchable history of this room]",
+    'notice.no_such_file': "[The file is no longer on the server]",
+    'notice.no_such_user': "[{nickname} is not online]",
+    'notice.renamed': "[{old} is now known as {new}]",
+    'notice.replayed': "[The last {count} messages before you joined]",
+    'notice.skipped': "[{count} messages were skipped because your connection is too slow]",
+    'notice.throttled': "[You are sending too fast: messages are not delivered, try again in {retry} s]",
+    'notice.unknown_command': "[Unknown command /{command}; start a message with // to send it as it is]",
+    'notice.who': "[{count} in {room}: {users}]",
+    
+    # Server event log text
+    'event.listening': "Server started, listening on {host}:{port}, waiting for client connections...",
+    'event.metrics': "Metrics available at http://{host}:{port}/metrics",
+    'event.discovery': "Clients on the local network can find this server as {name} (UDP port {port})",
+    'event.discovery_error': "Local network discovery is off: {error}",
+    'event.start_failed': "Failed to start server: {error}",
+    'event.joined': "[{nickname}] joined the chat room in room {room} (IP: {ip})",
+    'event.message': "Received message from [{nickname}] in {room}: {text}",
+    'event.entered': "[{nickname}] moved to room {room}",
+    'event.rejected': "Rejected nickname [{nickname}] from {ip}: {reason}",
+    'event.direct': "Private message from [{nickname}] to [{to}]",
+    'event.file': "[{nickname}] shared {name} ({size} bytes) in {room}",
+    'event.throttled': "[{nickname}] is sending too fast; messages over the {scope} limit are not delivered",
+    'event.disconnected': "[{nickname}] disconnected unexpectedly",
+    'event.renamed': "[{old}] is now known as [{new}]",
+    'event.left': "[{nickname}] has left the chat room",
+    'event.connection_error': "Client connection error: {error}",
+    'event.backpressure': "Backpressure ({policy}): {over} clients over the limit, {dropped} messages dropped, {coalesced} coalesced, {disconnected} clients disconnected",
+    'event.journal_error': "Failed to store a message in the journal: {error}",
+    'event.plugin_error': "Message pipeline stage {stage} failed, the message was dropped: {error}",
+    
+    # Command line help
+    'help.host': "address to listen on, 0.0.0.0 for every interface (default: %(default)s)",
+    'help.port': "TCP port to listen on (default: %(default)s)",
+    'help.engine': "network engine: selector serves every client from one event loop, threaded uses one thread per client",
+    'help.backpressure': "what to do with clients that read too slowly (default: %(default)s)",
+    'help.high_watermark': "queued bytes per client that count as too slow (default: %(default)s)",
+    'help.low_watermark': "queued bytes a slow client must drain down to before it recovers (default: %(default)s)",
+    'help.grace': "seconds a client may stay over the limit with --backpressure disconnect (default: %(default)s)",
+    'help.journal': "directory for the on-disk message journals of the rooms; clients entering a room are sent recent history from it",
+    'help.journal_segment_bytes': "size at which the journal starts a new segment file (default: %(default)s)",
+    'help.journal_segments': "journal segment files kept, older ones are deleted (default: %(default)s)",
+    'help.journal_sync_interval': "seconds between fsync() calls of the journal (default: %(default)s)",
+    'help.no_search': "do not keep a search index of the journals; clients cannot search the history then",
+    'help.compress_level': "zlib level for clients that support compression, 0 turns compression off (default: %(default)s)",
+    'help.compress_threshold': "smallest batch of bytes that is compressed (default: %(default)s)",
+    'help.workers': "serve clients from this many worker processes with the selector engine, 0 for none (default: %(default)s)",
+    'help.metrics_port': "serve metrics on this HTTP port: /metrics in Prometheus text format, /metrics.json as JSON",
+    'help.metrics_host': "address of the metrics endpoint (default: %(default)s)",
+    'help.heartbeat_interval': "seconds a client may stay silent before it is pinged, 0 turns heartbeats and the idle timeout off (default: %(default)s)",
+    'help.idle_timeout': "seconds of silence after which a client is disconnected (default: %(default)s)",
+    'help.keepalive': "seconds of silence before TCP keepalive probes start, 0 leaves keepalive off (default: %(default)s)",
+    'help.profile_every': "profile one in this many message handling calls with cProfile, shown at /profile of the metrics endpoint, 0 for never (default: %(default)s)",
+    'help.discovery_port': "UDP port on which clients looking for servers are answered, 0 to stay hidden (default: %(default)s)",
+    'help.server_name': "name shown to clients that find the server (default: the host name)",
+    'help.files': "directory for files shared by clients; without it clients cannot share files",
+    'help.max_file_size': "largest file in bytes a client may share (default: %(default)s)",
+    'help.client_rate': "messages per second a client may keep sending, 0 for no limit (default: %(default)s)",
+    'help.client_burst': "messages a client may send at once after a pause (default: %(default)s)",
+    'help.client_byte_rate': "bytes per second a client may keep sending, 0 for no limit (default: %(default)s)",
+    'help.client_byte_burst': "bytes a client may send at once after a pause (default: %(default)s)",
+    'help.room_rate': "chat messages per second all members of a room may keep sending, 0 for no limit (default: %(default)s)",
+    'help.room_burst': "chat messages a room may take at once after a pause (default: %(default)s)",
+    'help.room_byte_rate': "bytes of chat messages per second a room may keep taking, 0 for no limit (default: %(default)s)",
+    'help.room_byte_burst': "bytes of chat messages a room may take at once after a pause (default: %(default)s)",
+    'help.batch_window': "milliseconds frames for a client may wait for more to be written with them, 0 to write at once (default: %(default)s)",
+    'help.batch_bytes': "queued bytes written to a client without waiting for the batching window to end (default: %(default)s)",
+    'help.presence_interval': "shortest time in seconds between two updates of who is in a room and who is typing there (default: %(default)s)",
+    'help.typing_timeout': "seconds a typing indicator lasts unless the client renews it (default: %(default)s)",
+    'help.tls_cert': "PEM certificate file; clients are then served over TLS only",
+    'help.tls_key': "PEM private key file of the certificate (default: in the certificate file)",
+    'help.tls_self_signed': "create a self-signed certificate for testing in the --tls-cert file if there is none",
+    'help.plugin': "load this module as a plugin: its register(pipeline) adds commands and message stages; may be repeated",
+    'help.history_lines': "lines kept in memory for scrolling back (default: %(default)s)",
+    'help.view_lines': "lines kept in the message list widget (default: %(default)s)",
+    'help.lang': "language of the window and messages (default: from CHATVERSE_LANG or the system locale)",
+    'help.log_file': "write the event log to this file instead of stdout",
+    'help.log_format': "event log format (default: %(default)s)",
+    'help.log_level': "lowest event level to log, debug includes every chat message (default: %(default)s)",
+    'help.server': "server to connect to, HOST or HOST:PORT, instead of looking for one on the local network",
+    'help.tls': "connect over TLS, trusting the certificates the system trusts",
+    'help.tls_ca': "connect over TLS, trusting the certificates in this PEM file, such as a server's self-signed one",
+}
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+"""
+项目使用的Python版本 -> python3.13.7
+
+语言 -> 中文
+
+Python局域网聊天室 - 中文消息
+
+版权所有 (C) 2025 文宇香香工作室
+根据MIT许可证授权
+"""
+
+MESSAGES = {
+    # 服务器窗口
+    'server.description': "Python局域网聊天室服务器",
+    'server.headless_description': "Python局域网聊天室无界面服务器",
+    'server.title': "网络聊天室【服务端】",
+    
+    # 客户端窗口与消息
+    'client.description': "Python局域网聊天室客户端",
+    'client.title': "网络聊天室【客户端】",
+    'client.title_user': "聊天室 - 用户: {nickname}",
+    'client.title_room': "聊天室 - 用户: {nickname} - 房间: {room}",
+    'client.nickname': "昵称:",
+    'client.join': "进入",
+    'client.room': "房间:",
+    'client.switch': "切换",
+    'client.message': "消息:",
+    'client.send': "发送",
+    'client.file': "文件",
+    'client.share_title': "分享文件",
+    'client.connect_failed': "无法连接服务器: {error}，正在重试...",
+    'client.tls_failed': "无法加载 TLS 证书: {error}",
+    'client.connected': "已连接到服务器，请输入昵称",
+    'client.connection_lost': "与服务器的连接已断开，正在重连...",
+    'client.found_server': "发现服务器 {name}，地址 {host}:{port}",
+    'client.not_connected': "尚未连接到服务器",
+    'client.nickname_failed': "设置昵称失败: {error}",
+    'client.welcome': "欢迎 {nickname} 进入聊天室！",
+    'client.send_failed': "发送消息失败: {error}",
+    'client.share_failed': "分享文件失败: {error}",
+    'client.sending_file': "[正在发送 {name}（{size}）...]",
+    'client.file_queued': "[{name} 将在重连后发送]",
+    'client.get_usage': "用法: /get 文件编号",
+    'client.download_failed': "下载 {name} 失败: {error}",
+    'client.downloading': "[正在下载 {name}（{size}）...]",
+    'client.download_broken': "[{name} 下载失败: {error}]",
+    'client.saved': "[{name} 已保存到 {path}]",
+    'client.file_shared': "[{sender} 分享了 {name}（{size}），输入 /get {number} 下载]",
+    'client.msg_usage': "用法: /msg 昵称 消息",
+    'client.private_to': "[私聊 → {to}] {text}",
+    'client.private_from': "[私聊 ← {sender}] {text}",
+    'client.queued': "{echo} [将在重连后发送]",
+    'client.queue_full': "[等待发送的消息过多，这条消息未发送]",
+    'client.room_offline': "切换房间失败: 未连接到服务器",
+    'client.room_failed': "切换房间失败: {error}",
+    'client.in_room': "[你已进入房间 {room}]",
+    'client.receive_failed': "接收消息出错: {error}",
+    'client.reconnected': "[已重新连接到服务器]",
+    'client.online': "{count} 人在线: {users}",
+    'client.typing': "{users} 正在输入...",
+    'client.search_usage': "用法: /search [from:昵称] [since:YYYY-MM-DD] [until:YYYY-MM-DD] 关键词",
+    'client.search_results': "[找到 {count} 条消息，最新的在前]",
+    'client.search_none': "[没有找到消息]",
+    'client.search_more': "[输入 /more 查看更早的结果]",
+    'client.search_end': "[没有更多结果了]",
+    
+    # 显示给用户的服务器通知
+    'notice.bad_nickname': "[无效的昵称 {nickname}：请使用1-32个字符且不含空格]",
+    'notice.bad_room': "[无效的房间名: {room}]",
+    'notice.file_failed': "[{name} 传输失败: {error}]",
+    'notice.file_too_large': "[{name} 未能分享：服务器只接受不超过 {limit} 字节的文件]",
+    'notice.me_usage': "[用法: /me 动作]",
+    'notice.nick_in_use': "[昵称 {nickname} 已被使用]",
+    'notice.nick_invalid': "[{nickname} 不能作为昵称：请使用 1-32 个不含空格的字符]",
+    'notice.nickname_taken': "[昵称 {nickname} 已被使用，请换一个]",
+    'notice.no_files': "[{name} 未能分享：服务器不接受文件]",
+    'notice.no_search': "[服务器没有保存这个房间可供搜索的历史消息]",
+    'notice.no_such_file': "[服务器上已没有这个文件]",
+    'notice.no_such_user': "[{nickname} 不在线]",
+    'notice.renamed': "[{old} 已改名为 {new}]",
+    'notice.replayed': "[以下是你加入前的最近 {count} 条消息]",
+    'notice.skipped': "[由于网络过慢，跳过了 {count} 条消息]",
+    'notice.throttled': "[发送过快，消息未被送达，请 {retry} 秒后再试]",
+    'notice.unknown_command': "[未知命令 /{command}；以 // 开头可按原样发送该消息]",
+    'notice.who': "[{room} 中有 {count} 人: {users}]",
+    
+    # 服务器事件的日志文本
+    'event.listening': "服务器已启动，监听于 {host}:{port}，等待客户端连接...",
+    'event.metrics': "指标服务已启动: http://{host}:{port}/metrics",
+    'event.discovery': "局域网内的客户端可以自动发现本服务器，名称为 {name}（UDP 端口 {port}）",
+    'event.discovery_error': "局域网自动发现未能启动: {error}",
+    'event.start_failed': "服务器启动失败: {error}",
+    'event.joined': "[{nickname}] 进入聊天室，房间 {room} (IP: {ip})",
+    'event.message': "收到来自 [{nickname}] 在 {room} 的消息: {text}",
+    'event.entered': "[{nickname}] 进入房间 {room}",
+    'event.rejected': "拒绝来自 {ip} 的昵称 [{nickname}]: {reason}",
+    'event.direct': "[{nickname}] 向 [{to}] 发送了私聊消息",
+    'event.file': "[{nickname}] 在 {room} 分享了文件 {name}（{size} 字节）",
+    'event.throttled': "[{nickname}] 发送过快（{scope} 限制），消息未被转发",
+    'event.disconnected': "[{nickname}] 异常断开连接",
+    'event.renamed': "[{old}] 已改名为 [{new}]",
+    'event.left': "[{nickname}] 已退出聊天室",
+    'event.connection_error': "客户端连接异常: {error}",
+    'event.backpressure': "背压 ({policy}): {over} 个客户端超出限制，已丢弃 {dropped} 条消息，合并 {coalesced} 条，断开 {disconnected} 个客户端",
+    'event.journal_error': "消息写入日志失败: {error}",
+    'event.plugin_error': "消息管道阶段 {stage} 出错，该消息已丢弃: {error}",
+    
+    # 命令行帮助
+    'help.host': "监听地址，0.0.0.0 表示所有网卡（默认: %(default)s）",
+    'help.port': "监听的TCP端口（默认: %(default)s）",
+    'help.engine': "网络引擎：selector 使用单个事件循环服务所有客户端，threaded 为每个客户端使用一个线程",
+    'help.backpressure': "读取过慢的客户端的处理方式（默认: %(default)s）",
+    'help.high_watermark': "每个客户端排队字节数超过该值即视为过慢（默认: %(default)s）",
+    'help.low_watermark': "过慢的客户端需排空到该字节数以下才算恢复（默认: %(default)s）",
+    'help.grace': "使用 --backpressure disconnect 时客户端可超出限制的秒数（默认: %(default)s）",
+    'help.journal': "各房间消息日志的存放目录；进入房间的客户端会收到该房间最近的历史消息",
+    'help.journal_segment_bytes': "消息日志分段文件达到该大小后新建下一个分段（默认: %(default)s）",
+    'help.journal_segments': "保留的日志分段文件数，更早的分段会被删除（默认: %(default)s）",
+    'help.journal_sync_interval': "日志两次 fsync() 之间的秒数（默认: %(default)s）",
+    'help.no_search': "不为日志建立搜索索引；这样客户端无法搜索历史消息",
+    'help.compress_level': "对支持压缩的客户端使用的 zlib 压缩级别，0 表示关闭压缩（默认: %(default)s）",
+    'help.compress_threshold': "达到该字节数的批量数据才进行压缩（默认: %(default)s）",
+    'help.workers': "由这么多个工作进程（使用 selector 引擎）服务客户端，0 表示不使用（默认: %(default)s）",
+    'help.heartbeat_interval': "客户端静默这么多秒后发送心跳，0 表示关闭心跳与空闲超时（默认: %(default)s）",
+    'help.idle_timeout': "客户端静默这么多秒后断开连接（默认: %(default)s）",
+    'help.keepalive': "连接静默这么多秒后开始发送 TCP keepalive 探测，0 表示不开启（默认: %(default)s）",
+    'help.metrics_port': "在该 HTTP 端口提供运行指标：/metrics 为 Prometheus 文本格式，/metrics.json 为 JSON",
+    'help.metrics_host': "指标服务的监听地址（默认: %(default)s）",
+    'help.profile_every': "每这么多次消息处理调用中用 cProfile 分析一次，结果见指标服务的 /profile，0 表示不分析（默认: %(default)s）",
+    'help.discovery_port': "应答局域网内客户端查找服务器请求的 UDP 端口，0 表示不被发现（默认: %(default)s）",
+    'help.server_name': "客户端发现服务器时显示的名称（默认: 主机名）",
+    'help.files': "客户端分享文件的存放目录；不指定则客户端无法分享文件",
+    'help.max_file_size': "客户端可分享的最大文件字节数（默认: %(default)s）",
+    'help.client_rate': "每个客户端每秒可持续发送的消息数，0 表示不限制（默认: %(default)s）",
+    'help.client_burst': "客户端停顿后可一次连续发送的消息数（默认: %(default)s）",
+    'help.client_byte_rate': "每个客户端每秒可持续发送的字节数，0 表示不限制（默认: %(default)s）",
+    'help.client_byte_burst': "客户端停顿后可一次连续发送的字节数（默认: %(default)s）",
+    'help.room_rate': "每个房间所有成员合计每秒可持续发送的聊天消息数，0 表示不限制（默认: %(default)s）",
+    'help.room_burst': "房间停顿后可一次接收的聊天消息数（默认: %(default)s）",
+    'help.room_byte_rate': "每个房间每秒可持续接收的聊天消息字节数，0 表示不限制（默认: %(default)s）",
+    'help.room_byte_burst': "房间停顿后可一次接收的聊天消息字节数（默认: %(default)s）",
+    'help.batch_window': "发给客户端的帧最多等待这么多毫秒，与随后的帧合并为一次写入，0 表示立即写入（默认: %(default)s）",
+    'help.batch_bytes': "排队达到该字节数时不等批处理窗口结束即写入客户端（默认: %(default)s）",
+    'help.presence_interval': "两次房间成员与输入状态更新之间的最短秒数（默认: %(default)s）",
+    'help.typing_timeout': "客户端未续期时“正在输入”状态保持的秒数（默认: %(default)s）",
+    'help.tls_cert': "PEM 证书文件；指定后只通过 TLS 为客户端服务",
+    'help.tls_key': "证书的 PEM 私钥文件（默认: 在证书文件中）",
+    'help.tls_self_signed': "若 --tls-cert 文件不存在，则在其中创建一个供测试用的自签名证书",
+    'help.plugin': "将该模块作为插件加载：其 register(pipeline) 可添加命令和消息处理阶段；可重复指定",
+    'help.history_lines': "内存中保留以供回滚的消息行数（默认: %(default)s）",
+    'help.view_lines': "消息列表控件中保留的行数（默认: %(default)s）",
+    'help.lang': "窗口与消息的语言（默认: 取自 CHATVERSE_LANG 或系统区域设置）",
+    'help.log_file': "将事件日志写入该文件而不是标准输出",
+    'help.log_format': "事件日志格式（默认: %(default)s）",
+    'help.log_level': "记录的最低事件级别，debug 包括每条聊天消息（默认: %(default)s）",
+    'help.server': "要连接的服务器，格式为 HOST 或 HOST:PORT，不指定则在局域网内自动查找",
+    'help.tls': "通过 TLS 连接，信任系统信任的证书",
+    'help.tls_ca': "通过 TLS 连接，信任该 PEM 文件中的证书，例如服务器的自签名证书",
+}
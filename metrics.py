@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Server metrics and the local endpoint serving them
+
+The engines and the server core count into one Metrics object: plain
+integer attributes and fixed-bucket histograms, updated without locks so
+they can stay on in production. MetricsServer serves a snapshot over HTTP:
+    
+    /metrics       Prometheus text format
+    /metrics.json  the same values as JSON
+    /profile       cProfile statistics of the sampled calls, with --profile-every
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import functools
+import io
+import json
+import threading
+from bisect import bisect_left
+
+# http.server (which loads ssl, some 10 MB of memory), cProfile and pstats are
+# only imported by servers that run the endpoint or the profiler
+
+PREFIX = 'chatverse_'
+DEFAULT_METRICS_HOST = '127.0.0.1'
+PROFILE_LINES = 40  # functions listed by /profile
+
+# Counters: attribute name -> help text
+COUNTERS = {
+    'connections_opened': "client connections accepted",
+    'connections_closed': "client connections closed",
+    'tls_handshakes': "TLS handshakes completed with clients",
+    'tls_resumed': "TLS handshakes that resumed an earlier session instead of a full one",
+    'frames_received': "frames received from clients",
+    'frames_queued': "frames queued for clients, including ones backpressure dropped later",
+    'bytes_received': "bytes received from clients",
+    'bytes_sent': "bytes written to clients",
+    'recv_calls': "recv system calls on client sockets",
+    'send_calls': "send system calls on client sockets",
+    'chat_messages': "chat messages sent to a room",
+    'direct_messages': "private messages delivered",
+    'pings_sent': "heartbeat pings sent to silent clients",
+    'idle_reaped': "clients disconnected after the idle timeout",
+    'messages_throttled': "messages not delivered because their sender or room was over a rate limit",
+    'typing_received': "typing indicator frames received from clients",
+    'presence_updates': "roster and typing updates sent to a room",
+    'searches': "history searches answered",
+    'files_shared': "files uploaded completely and shared in a room",
+    'file_chunks_received': "file chunks received from clients",
+    'file_chunks_sent': "file chunks written to clients",
+}
+
+# Backpressure counters, kept by the BackpressurePolicy
+BACKPRESSURE_COUNTERS = {
+    'backpressure_dropped': "frames dropped for clients over the backpressure limit",
+    'backpressure_coalesced': "frames replaced by a skipped notice for clients over the backpressure limit",
+    'backpressure_disconnected': "clients disconnected for staying over the backpressure limit",
+}
+
+# Gauges filled in by the server core
+GAUGES = {
+    'clients': "clients that joined the chat",
+    'rooms': "open chat rooms",
+    'over_limit': "clients over the backpressure limit",
+}
+
+# Histograms: attribute name -> (help text, bucket upper bounds)
+HISTOGRAMS = {
+    'broadcast_seconds': (
+        "time to queue one chat message for every member of its room",
+        (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 0.1, 1.0)
+    ),
+    'broadcast_recipients': (
+        "clients a chat message was queued for",
+        (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+    ),
+    'search_seconds': (
+        "time to look up one page of history search results",
+        (1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 1.0)
+    ),
+}
+
+# Histograms of the message pipeline stages, one per stage (see pipeline.py)
+STAGE_HELP = "time spent in the {name} stage of the message pipeline"
+STAGE_BOUNDS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 1e-3, 1e-2, 0.1)
+
+# Histogram of the clients' send queues, taken when a snapshot is made
+QUEUE_BYTES = 'queue_bytes'
+QUEUE_BYTES_HELP = "bytes queued per client when the metrics were read"
+QUEUE_BYTES_BOUNDS = (0, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+HELP = {**COUNTERS, **BACKPRESSURE_COUNTERS, **GAUGES, QUEUE_BYTES: QUEUE_BYTES_HELP}
+HELP.update((name, help) for name, (help, bounds) in HISTOGRAMS.items())
+
+class Histogram:
+    """Counts of observed values per bucket, with their sum"""
+    
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # the last bucket is everything above the last bound
+        self.sum = 0
+    
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+    
+    def snapshot(self):
+        return {'bounds': list(self.bounds), 'counts': list(self.counts), 'sum': self.sum}
+
+class Metrics:
+    """Counters and histograms of one engine"""
+    
+    def __init__(self):
+        for name in COUNTERS:
+            setattr(self, name, 0)
+        for name, (help, bounds) in HISTOGRAMS.items():
+            setattr(self, name, Histogram(bounds))
+        self.stages = {}  # {stage name: Histogram}
+    
+    def stage(self, name):
+        """Return the histogram of the pipeline stage name"""
+        return self.stages.setdefault(name, Histogram(STAGE_BOUNDS))
+    
+    def snapshot(self):
+        """Return the current values as a JSON-compatible dict"""
+        histograms = {name: getattr(self, name).snapshot() for name in HISTOGRAMS}
+        for name, histogram in self.stages.items():
+            histograms[f'stage_{name}_seconds'] = dict(histogram.snapshot(), help=STAGE_HELP.format(name=name))
+        return {
+            'counters': {name: getattr(self, name) for name in COUNTERS},
+            'histograms': histograms,
+        }
+
+def queue_histogram(connections):
+    """Return the snapshot of a histogram of the bytes queued for each connection"""
+    histogram = Histogram(QUEUE_BYTES_BOUNDS)
+    for conn in connections:
+        histogram.observe(conn.outbox.size)
+    return histogram.snapshot()
+
+def merge_snapshots(snapshots):
+    """Add up snapshots of several engines, such as the hub and its workers"""
+    merged = {'counters': {}, 'histograms': {}}
+    for snapshot in snapshots:
+        for name, value in snapshot['counters'].items():
+            merged['counters'][name] = merged['counters'].get(name, 0) + value
+        for name, histogram in snapshot['histograms'].items():
+            total = merged['histograms'].get(name)
+            if total is None:
+                merged['histograms'][name] = dict(histogram, counts=list(histogram['counts']))
+                continue
+            total['counts'] = [a + b for a, b in zip(total['counts'], histogram['counts'])]
+            total['sum'] += histogram['sum']
+    return merged
+
+def format_prometheus(snapshot):
+    """Render a snapshot, with the gauges the server core adds, in Prometheus text format"""
+    lines = []
+    for name, value in snapshot.get('gauges', {}).items():
+        metric = PREFIX + name
+        lines += [f"# HELP {metric} {HELP.get(name, name)}", f"# TYPE {metric} gauge", f"{metric} {value}"]
+    for name, value in snapshot['counters'].items():
+        metric = f"{PREFIX}{name}_total"
+        lines += [f"# HELP {metric} {HELP.get(name, name)}", f"# TYPE {metric} counter", f"{metric} {value}"]
+    for name, histogram in snapshot['histograms'].items():
+        metric = PREFIX + name
+        lines += [f"# HELP {metric} {HELP.get(name) or histogram.get('help', name)}", f"# TYPE {metric} histogram"]
+        count = 0
+        for bound, bucket in zip(histogram['bounds'] + ['+Inf'], histogram['counts']):
+            count += bucket
+            lines.append(f'{metric}_bucket{{le="{bound}"}} {count}')
+        lines += [f"{metric}_sum {histogram['sum']}", f"{metric}_count {count}"]
+    return '\n'.join(lines) + '\n'
+
+class SampledProfiler:
+    """Runs one in every `every` calls of the wrapped functions under cProfile
+    
+    Only one call is profiled at a time: wrapped functions it calls are
+    profiled as part of it, and calls from other threads meanwhile are not.
+    """
+    
+    def __init__(self, every):
+        self.every = every
+        self.calls = 0
+        self.sampled = 0
+        import cProfile
+        self.profile = cProfile.Profile()
+        self.lock = threading.Lock()
+    
+    def wrap(self, function):
+        """Return function with sampling around it"""
+        @functools.wraps(function)
+        def sampled(*args, **kwargs):
+            self.calls += 1
+            if self.calls % self.every or not self.lock.acquire(blocking=False):
+                return function(*args, **kwargs)
+            try:
+                self.sampled += 1
+                return self.profile.runcall(function, *args, **kwargs)
+            finally:
+                self.lock.release()
+        return sampled
+    
+    def report(self, lines=PROFILE_LINES):
+        """Return the statistics of the sampled calls as text, by cumulative time"""
+        import pstats
+        out = io.StringIO()
+        with self.lock:
+            if not self.sampled:
+                return "no calls sampled yet\n"
+            out.write(f"{self.sampled} of {self.calls} calls sampled\n\n")
+            pstats.Stats(self.profile, stream=out).sort_stats('cumulative').print_stats(lines)
+        return out.getvalue()
+
+class MetricsServer:
+    """Local HTTP endpoint serving snapshots from collect() in a background thread"""
+    
+    def __init__(self, address, collect, profiler=None):
+        from http.server import ThreadingHTTPServer
+        self.collect = collect
+        self.profiler = profiler
+        self.httpd = ThreadingHTTPServer(address, self.handler_class())
+        self.httpd.daemon_threads = True
+    
+    def handler_class(self):
+        from http.server import BaseHTTPRequestHandler
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == '/metrics':
+                    self.reply(format_prometheus(server.collect()), 'text/plain; version=0.0.4')
+                elif path == '/metrics.json':
+                    self.reply(json.dumps(server.collect()), 'application/json')
+                elif path == '/profile' and server.profiler is not None:
+                    self.reply(server.profiler.report(), 'text/plain')
+                else:
+                    self.send_error(404)
+            
+            def reply(self, text, content_type):
+                body = text.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass  # scrapes are not server events
+        
+        return Handler
+    
+    @property
+    def address(self):
+        return self.httpd.server_address[:2]
+    
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+    
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Message pipeline: commands, filters, transformers and audit hooks
+
+Every chat message a client sends goes through the stages of the server's
+pipeline in order before it is broadcast. The first stage carries out
+slash commands such as /who; the stages plugins add after it may drop a
+message (filters) or change its text (transformers). Audit hooks see every
+message once it has been broadcast.
+
+The pipeline is compiled once at startup into a tuple of stages, so a
+message only costs one call per stage; the command stage looks at no more
+than the first character of messages that are not commands. Each stage is
+timed into its own histogram of the server metrics.
+
+A plugin is a module with a register(pipeline) function, loaded with
+--plugin. A stage or audit hook is called with a Message, and a stage
+returns False to stop the message: it is then neither broadcast nor
+audited. pipeline.server is the ChatServerCore the pipeline belongs to.
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import importlib
+import re
+from time import perf_counter
+
+from protocol import encode_notice
+
+STAGE_NAME = re.compile(r'[a-z][a-z0-9_]{0,31}')  # also part of the stage's metric name
+COMMAND_NAME = re.compile(r'[a-z][a-z0-9_-]{0,31}')
+COMMANDS = 'commands'  # name of the stage that carries out slash commands
+
+class Message:
+    """A chat message on its way through the pipeline"""
+    
+    __slots__ = ('conn', 'room', 'text', 'typed', 'action')
+    
+    def __init__(self, conn, text):
+        self.conn = conn
+        self.room = conn.room
+        self.text = text
+        self.typed = text  # text the client showed itself as sent
+        self.action = False  # shown as "* nickname text", as sent with /me
+    
+    def echoed(self):
+        """Tell whether the sender already shows the message as it goes out"""
+        return self.text == self.typed and not self.action
+    
+    def line(self):
+        """Return the message as it is shown and stored"""
+        if self.action:
+            return f"* {self.conn.nickname} {self.text}"
+        return f"{self.conn.nickname}: {self.text}"
+
+class Pipeline:
+    """Ordered stages every chat message of a server goes through"""
+    
+    def __init__(self, server, metrics):
+        self.server = server
+        self.metrics = metrics
+        self.commands = {}  # {name: function(message, argument)}
+        self.stages = []    # [(name, function)] after the command stage, in order
+        self.audits = []    # [(name, function)]
+        self.chain = ()     # (name, function, histogram) of every stage, set by compile()
+        self.audit_chain = ()
+    
+    def add_command(self, name, function):
+        """Carry out /name with function(message, argument); returning True sends the message on as chat"""
+        if not COMMAND_NAME.fullmatch(name):
+            raise ValueError(f"invalid command name: {name}")
+        self.commands[name] = function
+    
+    def add_stage(self, name, function):
+        """Run function(message) on every chat message after the stages added before it"""
+        self.stages.append((self.check_name(name), function))
+    
+    def add_audit(self, name, function):
+        """Run function(message) on every chat message once it has been broadcast"""
+        self.audits.append((self.check_name(name), function))
+    
+    def check_name(self, name):
+        names = [COMMANDS] + [stage[0] for stage in self.stages + self.audits]
+        if not STAGE_NAME.fullmatch(name) or name in names:
+            raise ValueError(f"invalid or duplicate stage name: {name}")
+        return name
+    
+    def compile(self):
+        """Freeze the stages into the chains run for every message"""
+        stages = ([(COMMANDS, self.run_command)] if self.commands else []) + self.stages
+        self.chain = tuple((name, function, self.metrics.stage(name)) for name, function in stages)
+        self.audit_chain = tuple((name, function, self.metrics.stage(name)) for name, function in self.audits)
+    
+    def process(self, message):
+        """Run message through the stages; returns False when one of them stopped it"""
+        return self.run(self.chain, message)
+    
+    def audit(self, message):
+        self.run(self.audit_chain, message)
+    
+    def run(self, chain, message):
+        name = None
+        try:
+            for name, function, histogram in chain:
+                started = perf_counter()
+                passed = function(message)
+                histogram.observe(perf_counter() - started)
+                if passed is False:
+                    return False
+        except Exception as e:
+            # A broken plugin loses the message, not the connection
+            self.server.emit('plugin_error', stage=name, error=f"{type(e).__name__}: {e}")
+            return False
+        return True
+    
+    def run_command(self, message):
+        """Carry out a slash command; "//" starts a chat message with a slash instead"""
+        text = message.text
+        if text[:1] != '/':
+            return True
+        if text[:2] == '//':
+            message.text = message.typed = text[1:]
+            return True
+        name, _, argument = text[1:].partition(' ')
+        command = self.commands.get(name)
+        if command is None:
+            self.server.engine.send(message.conn, encode_notice('unknown_command', command=name))
+            return False
+        return command(message, argument.strip()) is True
+
+def load_plugin(pipeline, name):
+    """Import the plugin module name and let it register its stages; raises ValueError if it cannot"""
+    try:
+        module = importlib.import_module(name)
+        module.register(pipeline)
+    except Exception as e:
+        raise ValueError(f"cannot load the plugin {name}: {e}") from None
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Who is in a room and who is typing there
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+DEFAULT_UPDATE_INTERVAL = 0.5  # shortest time between two presence updates to a room
+DEFAULT_TYPING_TIMEOUT = 6.0   # seconds a typing indicator lasts unless the client renews it
+TYPING_REFRESH = 2.0           # seconds between the renewals a client sends while its user keeps typing
+
+class PresencePolicy:
+    """How often the members of a room hear about its changes
+    
+    Clients entering a room are sent its roster. After that the members are
+    sent who joined, who left and who is typing, at most once every
+    interval seconds per room: changes within an interval go out together
+    in one update, so a room full of typing users costs its members a
+    bounded number of frames per second whatever the number of keystrokes.
+    The first change after a quiet interval goes out at once.
+    """
+    
+    def __init__(self, interval=DEFAULT_UPDATE_INTERVAL, typing_timeout=DEFAULT_TYPING_TIMEOUT):
+        if interval <= 0:
+            raise ValueError("the presence update interval must be positive")
+        if typing_timeout <= TYPING_REFRESH:
+            raise ValueError(f"the typing timeout must be longer than the {TYPING_REFRESH} s clients take to renew it")
+        self.interval = interval
+        self.typing_timeout = typing_timeout
+
+class RoomPresence:
+    """The changes of one room not told to its members yet"""
+    
+    __slots__ = ('changed', 'typing', 'typing_sent', 'next_update')
+    
+    def __init__(self):
+        self.changed = {}  # {nickname: True when it joined, False when it left} since the last update
+        self.typing = {}  # {nickname: time.monotonic() its typing indicator lapses}
+        self.typing_sent = []  # nicknames typing according to the last update
+        self.next_update = 0.0  # no update goes out before then
+    
+    def joined(self, nickname):
+        self.changed[nickname] = True
+    
+    def left(self, nickname):
+        self.changed[nickname] = False
+        self.typing.pop(nickname, None)
+    
+    def set_typing(self, nickname, expires):
+        """Start or renew the typing indicator of nickname until expires, or end it when expires is None"""
+        if expires is None:
+            self.typing.pop(nickname, None)
+        else:
+            self.typing[nickname] = expires
+    
+    def pending(self):
+        """Tell whether an update may be due, now or once indicators lapse"""
+        return bool(self.changed or self.typing or self.typing_sent)
+    
+    def update(self, now, interval):
+        """Return the fields of the update due at now, or None when there is none"""
+        if now < self.next_update:
+            return None
+        lapsed = [nickname for nickname, expires in self.typing.items() if expires <= now]
+        for nickname in lapsed:
+            del self.typing[nickname]
+        fields = {}
+        if self.changed:
+            fields['joined'] = sorted(nickname for nickname, present in self.changed.items() if present)
+            fields['left'] = sorted(nickname for nickname, present in self.changed.items() if not present)
+            self.changed = {}
+        typing = sorted(self.typing)
+        if typing != self.typing_sent:
+            fields['typing'] = self.typing_sent = typing
+        if not fields:
+            return None
+        self.next_update = now + interval
+        return fields
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Wire protocol shared by the server and clients
+
+Every message is one frame: a 4-byte big-endian payload length, a 1-byte
+message type and the payload itself.
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import json
+import re
+import struct
+
+HEADER = struct.Struct('!IB')  # payload length, message type
+MAX_PAYLOAD = 1 << 20
+
+# Message types
+MSG_HELLO = 1  # client -> server: {"nickname": ..., "caps": [...], "session": token to resume}, answered by MSG_WELCOME or a rejection notice
+MSG_TEXT = 2   # chat text in both directions
+MSG_EXIT = 3   # client -> server: leaving the chat room
+MSG_NOTICE = 4  # server -> client: {"code": ..., **fields}, worded by the client
+MSG_CHAT = 5    # server -> client: CHAT_HEADER + "nickname: text"
+MSG_REPLAY = 6  # client -> server, before MSG_HELLO: {"room": name, "last": n} or {"room": name, "since": message id}
+MSG_JOIN = 7    # client -> server: move to another room, same fields as MSG_REPLAY
+MSG_ROOMS = 8   # client -> server: empty, asks for the room list; server -> client: {"room": current, "rooms": {name: members}}
+MSG_DIRECT = 9  # private message; client -> server: {"to": nickname, "text": ...}, server -> client: {"from": nickname, "text": ...}
+MSG_WELCOME = 10  # server -> client: {"nickname": ..., "caps": [capabilities enabled for the connection], "session": token}
+MSG_ZLIB = 11   # either way once "zlib" is enabled: compressed complete frames, see compression.py
+MSG_PING = 12   # either way: empty, answered by MSG_PONG; the server pings clients that have been silent
+MSG_PONG = 13   # either way: empty, answer to MSG_PING
+MSG_UPLOAD = 14  # client -> server: {"transfer": n, "name": ..., "size": bytes, "sha256": hex}; server -> client: {"transfer": n, "offset": bytes to send from}
+MSG_CHUNK = 15   # either way: CHUNK_HEADER + file bytes at that offset of the transfer
+MSG_FILE = 16    # server -> client: {"id": sha256, "name": ..., "size": bytes, "from": nickname}, a file shared in the room
+MSG_DOWNLOAD = 17  # client -> server: {"transfer": n, "id": sha256, "offset": bytes already received}, answered by MSG_CHUNK frames
+MSG_PRESENCE = 18  # server -> client: {"users": [...], "typing": [...]} of the room entered, then changes: {"joined": [...], "left": [...], "typing": [...]}
+MSG_TYPING = 19    # client -> server: {"typing": true} while the user types, renewed every presence.TYPING_REFRESH, or {"typing": false}
+MSG_SEARCH = 20    # client -> server: {"query": words, "from": nickname, "since": unix time, "until": unix time, "before": message id, "limit": n}
+                   # server -> client: {"query": ..., "results": [[id, unix time, text], ...] newest first, "next": "before" of the next page or null}
+
+CHAT_HEADER = struct.Struct('!Qd')  # message id, unix time
+CHUNK_HEADER = struct.Struct('!IQ')  # transfer number, file offset
+MAX_TRANSFER = 0xFFFFFFFF  # largest transfer number CHUNK_HEADER holds
+
+SURROGATE_ESCAPE = re.compile(r'\\u[dD][89a-fA-F]')  # a JSON escape that may leave half a UTF-16 pair
+
+class ProtocolError(Exception):
+    """Raised when a peer sends data that is not a valid frame"""
+
+def encode_frame(msg_type, payload=b''):
+    """Build one frame; str payloads are encoded as UTF-8"""
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    return HEADER.pack(len(payload), msg_type) + payload
+
+def decode_text(payload):
+    """Decode a UTF-8 payload without copying it into an intermediate bytes object"""
+    return str(payload, 'utf-8', 'replace')
+
+def encode_json(msg_type, **fields):
+    """Build a frame whose payload is a JSON object"""
+    return encode_frame(msg_type, json.dumps(fields, ensure_ascii=False))
+
+def decode_json(payload):
+    """Return the fields of a JSON payload as a dict"""
+    text = decode_text(payload)
+    try:
+        fields = json.loads(text)
+    except (ValueError, RecursionError) as e:
+        # Arrays or objects nested thousands deep exhaust the recursion of the decoder
+        raise ProtocolError(f"invalid JSON payload: {e}") from None
+    if not isinstance(fields, dict):
+        raise ProtocolError("JSON payload is not an object")
+    if SURROGATE_ESCAPE.search(text):
+        # A pair of escapes makes one character; a lone one could not be sent on as UTF-8
+        try:
+            json.dumps(fields, ensure_ascii=False).encode('utf-8')
+        except UnicodeEncodeError:
+            raise ProtocolError("JSON payload has a lone surrogate") from None
+    return fields
+
+def encode_notice(code, **fields):
+    """Build a notice frame; clients turn the code into text in their own language"""
+    return encode_json(MSG_NOTICE, code=code, **fields)
+
+decode_notice = decode_json
+
+def encode_chat(msg_id, timestamp, text):
+    """Build a chat frame for a message stored under msg_id"""
+    return encode_frame(MSG_CHAT, CHAT_HEADER.pack(msg_id, timestamp) + text.encode('utf-8'))
+
+def decode_chat(payload):
+    """Return (message id, unix time, text) of a chat payload"""
+    if len(payload) < CHAT_HEADER.size:
+        raise ProtocolError("chat frame too short")
+    msg_id, timestamp = CHAT_HEADER.unpack_from(payload)
+    return msg_id, timestamp, decode_text(payload[CHAT_HEADER.size:])
+
+def decode_chunk(payload):
+    """Return (transfer number, file offset, data) of a chunk payload"""
+    if len(payload) < CHUNK_HEADER.size:
+        raise ProtocolError("chunk frame too short")
+    transfer, offset = CHUNK_HEADER.unpack_from(payload)
+    return transfer, offset, payload[CHUNK_HEADER.size:]
+
+class FrameParser:
+    """Incremental frame parser working over one reusable receive buffer
+    
+    Data is received straight into the buffer, and payloads are handed out as
+    memoryview slices of it, so they are only valid until the next recv_into().
+    """
+    
+    def __init__(self, size=8192, limit=MAX_PAYLOAD):
+        self.buffer = bytearray(size)
+        self.view = memoryview(self.buffer)
+        self.limit = limit  # largest payload accepted
+        self.start = 0  # first unparsed byte
+        self.end = 0    # end of received data
+    
+    def recv_into(self, sock):
+        """Receive as much as fits into the free tail of the buffer"""
+        if self.end == len(self.buffer):
+            self.make_room(self.end - self.start + 1)
+        received = sock.recv_into(self.view[self.end:])
+        self.end += received
+        return received
+    
+    def feed(self, data):
+        """Append already received data, for callers that do not own a socket"""
+        data = memoryview(data)
+        while data:
+            if self.end == len(self.buffer):
+                self.make_room(self.end - self.start + 1)
+            chunk = min(len(data), len(self.buffer) - self.end)
+            self.view[self.end:self.end + chunk] = data[:chunk]
+            self.end += chunk
+            data = data[chunk:]
+    
+    def frames(self):
+        """Yield (msg_type, payload) for every complete frame in the buffer"""
+        while self.end - self.start >= HEADER.size:
+            length, msg_type = HEADER.unpack_from(self.buffer, self.start)
+            if length > self.limit:
+                raise ProtocolError(f"frame of {length} bytes exceeds the {self.limit} byte limit")
+            
+            frame_end = self.start + HEADER.size + length
+            if frame_end > self.end:
+                # Partial frame: make sure the rest of it will fit
+                self.make_room(HEADER.size + length)
+                return
+            
+            payload = self.view[self.start + HEADER.size:frame_end]
+            self.start = frame_end
+            yield msg_type, payload
+            
+        if self.start == self.end:
+            self.start = self.end = 0
+    
+    def make_room(self, needed):
+        """Make sure needed bytes fit after the first unparsed byte"""
+        if self.start + needed <= len(self.buffer):
+            return
+        
+        # Move unparsed bytes to the front, growing the buffer if they still do not fit
+        pending = self.end - self.start
+        if needed > len(self.buffer):
+            buffer = bytearray(max(needed, 2 * len(self.buffer)))
+            buffer[:pending] = self.view[self.start:self.end]
+            self.buffer = buffer
+            self.view = memoryview(buffer)
+        else:
+            self.buffer[:pending] = self.buffer[self.start:self.end]
+        self.start, self.end = 0, pending
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Token bucket rate limits for clients and rooms
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import time
+
+CLIENT_RATE = 10.0              # messages per second a client may keep sending
+CLIENT_BURST = 30               # messages a client may send at once after a pause
+CLIENT_BYTE_RATE = 32 * 1024    # bytes per second a client may keep sending
+CLIENT_BYTE_BURST = 128 * 1024  # bytes a client may send at once after a pause
+ROOM_RATE = 100.0               # messages per second all members of a room may keep sending together
+ROOM_BURST = 300
+ROOM_BYTE_RATE = 256 * 1024
+ROOM_BYTE_BURST = 1024 * 1024
+
+class RateLimiter:
+    """A token bucket of messages and one of bytes
+    
+    Buckets are refilled from the time elapsed since the last check when
+    they are checked, so a check is a few float operations on the limiter's
+    own slots: no timer, no queue of timestamps, nothing allocated per
+    message. A rate of 0 leaves its bucket off.
+    
+    Limiters are not locked. With the threaded engine two members of a room
+    may now and then both be let through on the room's last token, which
+    only makes the room limit a little lenient.
+    """
+    
+    __slots__ = ('rate', 'burst', 'byte_rate', 'byte_burst', 'messages', 'bytes', 'stamp')
+    
+    def __init__(self, rate, burst, byte_rate, byte_burst):
+        self.rate = rate
+        self.burst = burst
+        self.byte_rate = byte_rate
+        self.byte_burst = byte_burst
+        self.messages = burst  # tokens left
+        self.bytes = byte_burst
+        self.stamp = time.monotonic()
+    
+    def allows(self, size, now):
+        """Refill the buckets up to now and tell whether a message of size bytes fits in them"""
+        elapsed = now - self.stamp
+        if elapsed > 0:  # another thread may have refilled up to a later time already
+            self.stamp = now
+            self.messages = min(self.burst, self.messages + elapsed * self.rate)
+            self.bytes = min(self.byte_burst, self.bytes + elapsed * self.byte_rate)
+        if self.rate and self.messages < 1:
+            return False
+        # A message larger than the burst fits into a full bucket and leaves it in debt
+        return not self.byte_rate or self.bytes >= min(size, self.byte_burst)
+    
+    def take(self, size):
+        """Charge a message of size bytes that allows() let through"""
+        self.messages -= 1
+        self.bytes -= size
+    
+    def retry_after(self, size):
+        """Return the seconds until a message of size bytes fits"""
+        wait = 0.0
+        if self.rate and self.messages < 1:
+            wait = (1 - self.messages) / self.rate
+        if self.byte_rate and self.bytes < min(size, self.byte_burst):
+            wait = max(wait, (min(size, self.byte_burst) - self.bytes) / self.byte_rate)
+        return wait
+
+class RateLimitPolicy:
+    """Rate limits shared by every client and every room
+    
+    Chat messages count against the sender's limits and those of its room,
+    private messages and room changes only against the sender's. A message
+    over either limit is not delivered, and the sender is told so with a
+    "throttled" notice once until a message gets through again.
+    """
+    
+    def __init__(
+        self,
+        client_rate=CLIENT_RATE,
+        client_burst=CLIENT_BURST,
+        client_byte_rate=CLIENT_BYTE_RATE,
+        client_byte_burst=CLIENT_BYTE_BURST,
+        room_rate=ROOM_RATE,
+        room_burst=ROOM_BURST,
+        room_byte_rate=ROOM_BYTE_RATE,
+        room_byte_burst=ROOM_BYTE_BURST
+    ):
+        if min(client_rate, client_byte_rate, room_rate, room_byte_rate) < 0:
+            raise ValueError("rate limits cannot be negative")
+        if (client_rate and client_burst < 1) or (room_rate and room_burst < 1):
+            raise ValueError("a message burst must allow at least one message")
+        if (client_byte_rate and client_byte_burst < 1) or (room_byte_rate and room_byte_burst < 1):
+            raise ValueError("a byte burst must allow at least one byte")
+        self.client = (client_rate, client_burst, client_byte_rate, client_byte_burst)
+        self.room = (room_rate, room_burst, room_byte_rate, room_byte_burst)
+    
+    def client_limiter(self):
+        """Return a RateLimiter for a new client, or None when clients are not limited"""
+        return limiter(*self.client)
+    
+    def room_limiter(self):
+        """Return a RateLimiter for a new room, or None when rooms are not limited"""
+        return limiter(*self.room)
+
+def limiter(rate, burst, byte_rate, byte_burst):
+    return RateLimiter(rate, burst, byte_rate, byte_burst) if rate or byte_rate else None
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Reconnect timing and offline queue shared by the clients
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import random
+from collections import deque
+
+BASE_DELAY = 0.5    # seconds, upper bound of the first wait
+MAX_DELAY = 30.0    # seconds, longest wait between two attempts
+OFFLINE_LIMIT = 200  # frames typed while disconnected that are kept for sending later
+
+class Backoff:
+    """Exponential backoff with full jitter
+    
+    Each wait is drawn uniformly between 0 and a bound that doubles with
+    every failed attempt up to MAX_DELAY, so clients that lost the server
+    at the same moment spread their attempts out instead of all coming back
+    together.
+    """
+    
+    def __init__(self, base=BASE_DELAY, cap=MAX_DELAY):
+        self.base = base
+        self.cap = cap
+        self.attempts = 0
+    
+    def next_delay(self):
+        """Return the seconds to wait before the next attempt"""
+        bound = min(self.cap, self.base * 2 ** min(self.attempts, 32))
+        self.attempts += 1
+        return random.uniform(0, bound)
+    
+    def reset(self):
+        """Start over after a connection was established"""
+        self.attempts = 0
+
+class OfflineQueue:
+    """Frames the user sent while disconnected, in order, until they can be sent"""
+    
+    def __init__(self, limit=OFFLINE_LIMIT):
+        self.frames = deque()
+        self.limit = limit
+    
+    def __len__(self):
+        return len(self.frames)
+    
+    def add(self, frame):
+        """Keep a frame for later; returns False when the queue is full"""
+        if len(self.frames) >= self.limit:
+            return False
+        self.frames.append(frame)
+        return True
+    
+    def flush(self, send):
+        """Pass the queued frames to send() in order; if it raises, the frames not sent stay queued"""
+        while self.frames:
+            send(self.frames[0])
+            self.frames.popleft()
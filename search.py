@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Full-text search index of the message journals
+
+Every journal segment has an inverted index from search term to the
+messages of the segment that contain it. The index of the segment being
+appended to is kept in memory and grows with every message; when the
+journal rolls over to a new segment it is written next to the segment as
+<first id>.idx and from then on read through a memory map, and it is
+deleted with its segment. A posting list is a sorted array of message
+numbers within the segment, two bytes each in segments of up to 65536
+messages and four bytes otherwise, so loading one is a single copy and
+intersecting them never decodes anything in Python.
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+from protocol import CHAT_HEADER, HEADER
+
+SEARCH_LIMIT = 20   # results per page unless the client asks for fewer
+MAX_TERM = 64       # longer words are not indexed
+PROBE_LIMIT = 256   # candidates checked one by one; more are intersected as sets
+INDEX_MAGIC = b'CVSI'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('<4sBcxxIIdd')  # magic, version, posting typecode, messages, terms, earliest, latest
+
+# Chinese, Japanese and Korean have no spaces between words: runs of their characters are indexed as single
+# characters and overlapping pairs of characters, and searched for by pairs
+CJK = '\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff'
+TOKEN = re.compile(f'([{CJK}]+)|([^\\W{CJK}]+)')
+
+def tokenize(text, query=False):
+    """Return the distinct search terms of text, lowercased; query=True for the terms of a search"""
+    terms = set()
+    for run, word in TOKEN.findall(text.lower()):
+        if word:
+            if len(word) <= MAX_TERM:
+                terms.add(word)
+            continue
+        pairs = [run[i:i + 2] for i in range(len(run) - 1)]
+        terms.update(pairs)
+        if not (query and pairs):
+            terms.update(run)
+    return terms
+
+def index_terms(nickname, text):
+    """Return the terms a chat message of nickname is indexed under"""
+    terms = tokenize(text)
+    terms.add('@' + nickname)  # words never contain @, so this cannot clash with one
+    return terms
+
+def journal_terms(line):
+    """Return the index terms of a journal line "nickname: text", or "* nickname text" of an action"""
+    if line.startswith('* '):
+        nickname, separator, text = line[2:].partition(' ')
+    else:
+        nickname, separator, text = line.partition(': ')
+    return index_terms(nickname, text) if separator else tokenize(line)
+
+def query_terms(query, nickname=None):
+    """Return the terms a message must all have to match a search"""
+    terms = tokenize(query, query=True)
+    if nickname:
+        terms.add('@' + nickname)
+    return sorted(terms)
+
+def load_array(typecode, data):
+    items = array(typecode)
+    items.frombytes(data)
+    if sys.byteorder != 'little':
+        items.byteswap()
+    return items
+
+def dump_array(items):
+    if sys.byteorder != 'little':
+        items = array(items.typecode, items)
+        items.byteswap()
+    return items.tobytes()
+
+def contains(postings, number):
+    i = bisect_left(postings, number)
+    return i < len(postings) and postings[i] == number
+
+class LiveIndex:
+    """Index of the segment being appended to, kept in memory"""
+    
+    def __init__(self, first_id):
+        self.first_id = first_id
+        self.times = array('d')  # timestamp of every message of the segment
+        self.postings = {}  # {term: array of the numbers of the messages with the term}
+    
+    @property
+    def count(self):
+        return len(self.times)
+    
+    def add(self, timestamp, terms):
+        number = len(self.times)
+        self.times.append(timestamp)
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = array('I')
+            postings.append(number)
+    
+    def lookup(self, term):
+        return self.postings.get(term)
+    
+    def write(self, path):
+        """Store the index in path, replacing the file at once"""
+        terms = sorted(term.encode('utf-8') for term in self.postings)
+        typecode = 'H' if self.count <= 0x10000 else 'I'
+        term_offsets = array('I', [0])
+        posting_offsets = array('I', [0])
+        postings = array(typecode)
+        for term in terms:
+            term_offsets.append(term_offsets[-1] + len(term))
+            items = self.postings[term.decode('utf-8')]
+            posting_offsets.append(posting_offsets[-1] + len(items))
+            postings.extend(items if typecode == 'I' else array(typecode, items))
+        earliest, latest = (self.times[0], self.times[-1]) if self.times else (0.0, 0.0)
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(INDEX_HEADER.pack(
+                INDEX_MAGIC, INDEX_VERSION, typecode.encode(), self.count, len(terms), earliest, latest
+            ))
+            for part in (self.times, term_offsets, posting_offsets):
+                f.write(dump_array(part))
+            f.write(b''.join(terms))
+            f.write(dump_array(postings))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+    
+    def close(self):
+        pass
+
+class SealedIndex:
+    """Index of a full segment, read from its file through a memory map"""
+    
+    def __init__(self, path, first_id):
+        self.first_id = first_id
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, typecode, count, terms, earliest, latest = INDEX_HEADER.unpack_from(self.map)
+            if magic != INDEX_MAGIC or version != INDEX_VERSION:
+                raise ValueError(f"{path} is not a search index of this version")
+            self.typecode = typecode.decode()
+            position = INDEX_HEADER.size
+            self.times = load_array('d', self.map[position:position + count * 8])
+            position += count * 8
+            self.term_offsets = load_array('I', self.map[position:position + (terms + 1) * 4])
+            position += (terms + 1) * 4
+            self.posting_offsets = load_array('I', self.map[position:position + (terms + 1) * 4])
+            position += (terms + 1) * 4
+            self.terms_start = position
+            self.postings_start = position + self.term_offsets[-1]
+            if len(self.times) != count or len(self.posting_offsets) != terms + 1:
+                raise ValueError(f"{path} is cut short")
+        except (ValueError, struct.error):
+            self.map.close()
+            raise
+    
+    @property
+    def count(self):
+        return len(self.times)
+    
+    def term(self, i):
+        start = self.terms_start
+        return self.map[start + self.term_offsets[i]:start + self.term_offsets[i + 1]]
+    
+    def postings(self, i):
+        size = array(self.typecode).itemsize
+        start = self.postings_start + self.posting_offsets[i] * size
+        return load_array(self.typecode, self.map[start:self.postings_start + self.posting_offsets[i + 1] * size])
+    
+    def lookup(self, term):
+        """Return the posting list of term, found by binary search of the sorted terms"""
+        key = term.encode('utf-8')
+        low, high = 0, len(self.term_offsets) - 1
+        while low < high:
+            middle = (low + high) // 2
+            if self.term(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == len(self.term_offsets) - 1 or self.term(low) != key:
+            return None
+        return self.postings(low)
+    
+    def live(self):
+        """Return the index as a LiveIndex, to go on appending to its segment"""
+        index = LiveIndex(self.first_id)
+        index.times = self.times
+        for i in range(len(self.term_offsets) - 1):
+            postings = self.postings(i)
+            index.postings[self.term(i).decode('utf-8')] = postings if postings.typecode == 'I' else array('I', postings)
+        return index
+    
+    def close(self):
+        self.map.close()
+
+class SearchIndex:
+    """Inverted index of one journal, in one part per segment
+    
+    The journal keeps the parts in step with its segments and calls every
+    method with its lock held.
+    """
+    
+    def __init__(self):
+        self.parts = []  # LiveIndex of the active segment last, SealedIndex of every older one
+    
+    def open_segment(self, segment, active):
+        """Load the index of a segment found on disk, rebuilding it from the messages when it is missing or stale"""
+        path = index_path(segment.path)
+        count = len(segment.offsets) - 1
+        try:
+            index = SealedIndex(path, segment.first_id)
+        except (OSError, ValueError):
+            index = None
+        if index is not None and index.count != count:
+            index.close()
+            index = None
+        if index is None:
+            index = rebuild(segment)
+            if not active:
+                index.write(path)
+                index = SealedIndex(path, segment.first_id)
+        elif active:
+            live = index.live()
+            index.close()
+            index = live
+        self.parts.append(index)
+    
+    def add(self, timestamp, terms):
+        self.parts[-1].add(timestamp, terms)
+    
+    def roll(self, segment, new_segment):
+        """Write out the index of the segment that just filled up and start one for the new segment"""
+        path = index_path(segment.path)
+        self.parts[-1].write(path)
+        self.parts[-1] = SealedIndex(path, segment.first_id)
+        self.parts.append(LiveIndex(new_segment.first_id))
+    
+    def drop(self):
+        """Forget the index of the oldest segment, which the journal is deleting"""
+        self.parts.pop(0).close()
+    
+    def search(self, terms, since=None, until=None, before=None, limit=SEARCH_LIMIT):
+        """Return the IDs of the newest messages with all terms, at most limit of them, newest first
+        
+        Only messages sent from since up to until and with IDs below before are
+        looked at. Timestamps are taken as rising with the IDs, which holds
+        unless the system clock is set back.
+        """
+        found = []
+        for part in reversed(self.parts):
+            if not part.count or (before is not None and part.first_id >= before):
+                continue
+            if since is not None and part.times[-1] < since:
+                break  # older parts only have older messages
+            low = 0 if since is None else bisect_left(part.times, since)
+            high = part.count if until is None else bisect_left(part.times, until)
+            if before is not None:
+                high = min(high, before - part.first_id)
+            if low < high:
+                found.extend(part.first_id + number for number in matches(part, terms, low, high, limit - len(found)))
+                if len(found) >= limit:
+                    break
+        return found
+    
+    def close(self, segment):
+        """Write out the index of the active segment, so a restart need not rebuild it"""
+        self.parts[-1].write(index_path(segment.path))
+        for part in self.parts:
+            part.close()
+
+def matches(part, terms, low, high, wanted):
+    """Return the numbers from low to high of the messages of part with all terms, newest first, at most wanted"""
+    if not terms:
+        return range(high - 1, max(low, high - wanted) - 1, -1)
+    lists = []
+    for term in terms:
+        postings = part.lookup(term)
+        if postings is None:
+            return ()
+        lists.append(postings)
+    lists.sort(key=len)
+    shortest, others = lists[0], lists[1:]
+    start, stop = bisect_left(shortest, low), bisect_left(shortest, high)
+    if stop - start > PROBE_LIMIT and others:
+        common = set(shortest[start:stop]).intersection(
+            *(postings[bisect_left(postings, low):bisect_left(postings, high)] for postings in others)
+        )
+        return sorted(common, reverse=True)[:wanted]
+    found = []
+    for i in range(stop - 1, start - 1, -1):
+        number = shortest[i]
+        if all(contains(postings, number) for postings in others):
+            found.append(number)
+            if len(found) == wanted:
+                break
+    return found
+
+def rebuild(segment):
+    """Index the messages of a segment from its file"""
+    index = LiveIndex(segment.first_id)
+    with open(segment.path, 'rb') as f:
+        data = f.read()
+    offsets = segment.offsets
+    for i in range(len(offsets) - 1):
+        start = offsets[i] + HEADER.size
+        timestamp = CHAT_HEADER.unpack_from(data, start)[1]
+        line = data[start + CHAT_HEADER.size:offsets[i + 1]].decode('utf-8', 'replace')
+        index.add(timestamp, journal_terms(line))
+    return index
+
+def index_path(segment_path):
+    return os.path.splitext(segment_path)[0] + '.idx'
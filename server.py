@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Multi-user chat server implementation
+
+The window and event log are in the language chosen by i18n.py;
+server_en.py and server_zh.py start this server in their language.
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import argparse
+from queue import Queue
+
+from i18n import Catalog, locale_parser, select_locale
+from message_view import HISTORY_LINES, VIEW_LINES, HistoryView, MessageHistory, MessagePump
+from server_core import REPORT_INTERVAL, add_server_arguments, create_server_core
+
+# Imported by init_gui(), so importing this module does not load Tcl/Tk
+tk = None
+
+class ChatServer:
+    def __init__(self, core, history_lines=HISTORY_LINES, view_lines=VIEW_LINES, text=None):
+        self.core = core
+        self.text = text or Catalog()  # i18n.Catalog of the window and event log
+        self.message_queue = Queue()
+        self.history_lines = history_lines
+        self.view_lines = view_lines
+        
+        # Initialize GUI
+        self.init_gui()
+        
+        # Attach to the server core and start it
+        self.core.add_listener(self.show_event)
+        self.core.start()
+        
+        # Show queued messages from the Tk thread
+        self.message_pump = MessagePump(self.root, self.history_view, self.message_queue)
+        self.message_pump.start()
+        
+        # Report backpressure counters periodically
+        self.root.after(int(REPORT_INTERVAL * 1000), self.report_backpressure)
+        
+        # Start main loop
+        self.root.mainloop()
+        self.core.close()
+    
+    def init_gui(self):
+        """Initialize server GUI interface"""
+        global tk
+        import tkinter as tk
+        self.root = tk.Tk()
+        self.root.title(self.text('server.title'))
+        
+        # Center window
+        screen_width = self.root.winfo_screenwidth()
+        screen_height = self.root.winfo_screenheight()
+        window_width, window_height = 500, 400
+        x = (screen_width - window_width) // 2
+        y = (screen_height - window_height) // 2
+        self.root.geometry(f'{window_width}x{window_height}+{x}+{y}')
+        
+        # Message display area
+        self.message_frame = tk.Frame(self.root)
+        self.message_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        
+        self.scrollbar = tk.Scrollbar(self.message_frame)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.message_list = tk.Listbox(
+            self.message_frame,
+            font=('Microsoft YaHei', 10),
+            bg="#f0f0f0"
+        )
+        self.message_list.pack(fill=tk.BOTH, expand=True)
+        self.history_view = HistoryView(
+            self.message_list,
+            self.scrollbar,
+            MessageHistory(self.history_lines),
+            self.view_lines
+        )
+    
+    def show_event(self, event, fields):
+        """Show a server event in the message list"""
+        self.add_message(self.text(f'event.{event}', **fields))
+    
+    def report_backpressure(self):
+        """Check the backpressure counters periodically"""
+        self.core.report_backpressure()
+        self.root.after(int(REPORT_INTERVAL * 1000), self.report_backpressure)
+    
+    def add_message(self, message):
+        """Add message to queue"""
+        self.message_queue.put(message)
+
+def main(argv=None, locale=None):
+    """Start the server in the language of --lang, else CHATVERSE_LANG, else locale, else the system's"""
+    text = Catalog(select_locale(argv, locale))
+    parser = argparse.ArgumentParser(description=text('server.description'), parents=[locale_parser(text)])
+    add_server_arguments(parser, text)
+    parser.add_argument('--history-lines', type=int, default=HISTORY_LINES, help=text('help.history_lines'))
+    parser.add_argument('--view-lines', type=int, default=VIEW_LINES, help=text('help.view_lines'))
+    args = parser.parse_args(argv)
+    try:
+        core = create_server_core(args)
+    except ValueError as e:
+        parser.error(str(e))
+    ChatServer(core, history_lines=args.history_lines, view_lines=args.view_lines, text=text)
+
+if __name__ == '__main__':
+    main()
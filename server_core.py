@@ -0,0 +1,852 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Chat server core without a user interface
+
+The core owns the listening socket, the network engine and the connected
+clients. Front-ends (the Tk window in server.py or the headless runner in
+server_headless.py) attach to it with add_listener() and
+receive structured events:
+    
+    listening         host, port
+    metrics           host, port
+    discovery         name, port
+    discovery_error   error
+    start_failed      error
+    joined            nickname, ip, room
+    rejected          nickname, ip, reason
+    message           nickname, room, text
+    direct            nickname, to
+    file              nickname, room, name, size
+    throttled         nickname, scope
+    disconnected      nickname
+    entered           nickname, room
+    renamed           old, new
+    left              nickname
+    connection_error  error
+    backpressure      policy, over, dropped, coalesced, disconnected
+    journal_error     error
+    plugin_error      stage, error
+
+Nicknames are unique: an index from nickname to connection rejects
+duplicates at the handshake and routes private messages to exactly one
+client. Every client gets a session token in MSG_WELCOME; a client that
+reconnects before the server noticed its old connection is gone presents
+the token and takes its nickname over from that connection.
+
+Every client is in exactly one room and messages only go to the members
+of the sender's room. Chat messages get increasing IDs per room. With a
+JournalStore they are also stored on disk, one journal per room, and a
+client that asks for history when it enters a room gets the requested
+part of it ahead of any live message. Clients that stay silent are pinged
+and, if they still do not answer, disconnected (see heartbeat.py), so a
+peer that dropped off the network does not keep its nickname. Token
+buckets per client and per room limit how many messages and bytes get
+through (see ratelimit.py); a client over a limit is told so instead of
+having its messages dropped silently. With a FileStore clients can share
+files with their room: uploads are stored on disk and every member of the
+room is told, and may download them (see files.py).
+
+With workers > 0 the clients are served by worker processes (cluster.py) and
+this process only keeps the rooms, nicknames and journals.
+
+With a batching window the engines hold the frames for each client a few
+milliseconds, so a burst of messages reaches it in fewer, larger writes
+(see batching.py).
+
+Clients entering a room are sent who is in it and who is typing there, and
+then who joins, leaves and starts or stops typing, in updates held back to
+at most one per room every presence interval (see presence.py).
+
+Chat messages go through the message pipeline before they are broadcast
+(see pipeline.py): the core adds the /who, /nick and /me commands to it,
+and plugins their own commands, filters, transformers and audit hooks.
+
+Unless search is turned off, the journals also index every message as it is
+stored, so clients can search the history of their room by words, sender
+and time, a page of results at a time (see search.py).
+
+With a tls.TLSPolicy every client connection is wrapped in TLS, and clients
+reconnecting to the same server process resume their session instead of
+doing a full handshake (see tls.py).
+
+With a metrics address the core serves counters and histograms of the
+engine and itself over HTTP (see metrics.py). With a discovery port it
+answers clients looking for servers on the local network (see discovery.py).
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import os
+import re
+import secrets
+import socket
+import threading
+import time
+
+from backpressure import DEFAULT_POLICY, POLICIES, BackpressurePolicy
+from batching import DEFAULT_BATCH_BYTES, DEFAULT_WINDOW, BatchPolicy
+from cluster import HubEngine, share_port
+from compression import CAPABILITY, DEFAULT_LEVEL, DEFAULT_THRESHOLD
+from discovery import DISCOVERY_PORT, Beacon
+from files import MAX_FILE_SIZE, RESUME_CHECK_INTERVAL, SHA256, ChunkReader, FileError, FileStore
+from heartbeat import DEFAULT_INTERVAL, DEFAULT_KEEPALIVE, DEFAULT_TIMEOUT, HeartbeatPolicy
+from i18n import Catalog
+from journal import MAX_SEGMENTS, SEGMENT_BYTES, SYNC_INTERVAL, JournalStore
+from metrics import DEFAULT_METRICS_HOST, Metrics, MetricsServer, SampledProfiler
+from pipeline import Message, Pipeline, load_plugin
+from presence import DEFAULT_TYPING_TIMEOUT, DEFAULT_UPDATE_INTERVAL, PresencePolicy, RoomPresence
+from protocol import (
+    MAX_TRANSFER, MSG_DIRECT, MSG_FILE, MSG_PRESENCE, MSG_ROOMS, MSG_SEARCH, MSG_UPLOAD, MSG_WELCOME, ProtocolError,
+    decode_chunk, encode_chat, encode_json, encode_notice
+)
+from ratelimit import (
+    CLIENT_BURST, CLIENT_BYTE_BURST, CLIENT_BYTE_RATE, CLIENT_RATE, ROOM_BURST, ROOM_BYTE_BURST, ROOM_BYTE_RATE, ROOM_RATE,
+    RateLimitPolicy
+)
+from search import SEARCH_LIMIT, index_terms, query_terms
+from server_engine import DEFAULT_ENGINE, ENGINES, create_engine
+from tls import TLSPolicy, generate_certificate, local_names
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 6666
+REPORT_INTERVAL = 5.0  # seconds between backpressure counter checks
+DEFAULT_ROOM = 'lobby'  # room clients enter unless they ask for another
+ROOM_NAME = re.compile(r'[\w-]{1,32}')  # also used as the room's journal directory name
+NICKNAME = re.compile(r'[^\s\x00-\x1f]{1,32}')  # no spaces, so "/msg nickname text" can be parsed
+
+class Room:
+    """A chat room: its members and the journal of its messages"""
+    
+    def __init__(self, name, journal=None, limiter=None):
+        self.name = name
+        self.members = {}  # {client_addr: ClientConnection}
+        self.journal = journal
+        self.limiter = limiter  # ratelimit.RateLimiter of the room's chat messages, None for no limit
+        self.presence = RoomPresence()  # joins, leaves and typing not told to the members yet
+        self.last_id = 0  # message IDs when there is no journal
+
+class ChatServerCore:
+    """Chat room networking: accept, join, broadcast and leave"""
+    
+    def __init__(
+        self,
+        host=DEFAULT_HOST,
+        port=DEFAULT_PORT,
+        engine=DEFAULT_ENGINE,
+        backpressure=None,
+        journals=None,
+        compress_level=DEFAULT_LEVEL,
+        compress_threshold=DEFAULT_THRESHOLD,
+        workers=0,
+        metrics_address=None,
+        profile_every=0,
+        heartbeat=None,
+        discovery_port=0,
+        server_name=None,
+        files=None,
+        rate_limits=None,
+        batching=None,
+        presence=None,
+        tls=None,
+        plugins=()
+    ):
+        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if os.name != 'nt':
+            # Allow a quick restart while old connections are in TIME_WAIT
+            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if workers:
+            share_port(self.server_socket)
+        self.server_addr = (host, port)
+        self.connected_clients = {}  # {client_addr: ClientConnection}
+        self.nicknames = {}  # {nickname: ClientConnection}
+        self.backpressure = backpressure or BackpressurePolicy()
+        self.heartbeat = heartbeat or HeartbeatPolicy()
+        self.rate_limits = rate_limits or RateLimitPolicy()
+        self.presence = presence or PresencePolicy()
+        self.reported_counters = (0, 0, 0)
+        self.journals = journals
+        self.files = files  # FileStore, None when clients cannot share files
+        self.resuming = []  # (conn, transfer, PartialFile) of offers waiting for the .part file to be hashed
+        self.compress_level = compress_level  # 0: never compress
+        self.compress_threshold = compress_threshold
+        self.rooms = {}  # {name: Room}, rooms without members are dropped except the default one
+        self.lock = threading.RLock()  # orders joins and room changes against broadcasts
+        self.listeners = []
+        self.metrics = Metrics()
+        self.metrics_address = metrics_address  # (host, port) of the metrics endpoint, None for none
+        self.metrics_server = None
+        self.discovery_port = discovery_port  # 0: do not answer discovery probes
+        self.server_name = server_name
+        self.beacon = None
+        self.profiler = None
+        if profile_every:
+            self.profiler = SampledProfiler(profile_every)
+            self.handle_client = self.profiler.wrap(self.handle_client)
+            self.broadcast_message = self.profiler.wrap(self.broadcast_message)
+        if workers:
+            # Clients are served by worker processes; this process only runs the rooms
+            self.engine = HubEngine(self, self.backpressure, workers, self.metrics, self.heartbeat, batching, tls)
+        else:
+            self.engine = create_engine(engine, self, self.backpressure, self.metrics, self.heartbeat, batching, tls)
+        # Sends the presence updates held back by the interval and ends the typing indicators that lapsed
+        self.engine.every(self.presence.interval, self.update_presence)
+        if files is not None:
+            self.engine.every(RESUME_CHECK_INTERVAL, self.answer_resumed)
+        self.get_room(DEFAULT_ROOM)
+        self.pipeline = Pipeline(self, self.metrics)
+        self.pipeline.add_command('who', self.who)
+        self.pipeline.add_command('nick', self.nick)
+        self.pipeline.add_command('me', self.me)
+        for name in plugins:
+            load_plugin(self.pipeline, name)  # plugins may replace the commands above
+        self.pipeline.compile()
+    
+    def add_listener(self, listener):
+        """Call listener(event, fields) for every server event"""
+        self.listeners.append(listener)
+    
+    def emit(self, event, **fields):
+        """Pass an event to every listener"""
+        for listener in self.listeners:
+            listener(event, fields)
+    
+    def start(self):
+        """Start server listening; returns False if the address cannot be used"""
+        try:
+            self.server_socket.bind(self.server_addr)
+            self.server_socket.listen(socket.SOMAXCONN)
+            host, port = self.server_socket.getsockname()[:2]
+            if self.metrics_address is not None:
+                self.metrics_server = MetricsServer(self.metrics_address, self.collect_metrics, self.profiler)
+            self.engine.start(self.server_socket)
+        except Exception as e:
+            if self.metrics_server is not None:
+                self.metrics_server.close()
+                self.metrics_server = None
+            self.emit('start_failed', error=str(e))
+            return False
+        self.emit('listening', host=host, port=port)
+        if self.metrics_server is not None:
+            self.metrics_server.start()
+            self.emit('metrics', host=self.metrics_server.address[0], port=self.metrics_server.address[1])
+        if self.discovery_port:
+            self.start_beacon(host, port)
+        return True
+    
+    def start_beacon(self, host, port):
+        """Answer discovery probes; the server runs on without them if the port cannot be used"""
+        try:
+            self.beacon = Beacon(host, port, self.server_name, self.discovery_port)
+        except OSError as e:
+            self.emit('discovery_error', error=str(e))
+            return
+        self.beacon.start()
+        self.emit('discovery', name=self.server_name or socket.gethostname(), port=self.beacon.port)
+    
+    def close(self):
+        """Stop the engine, the discovery beacon and the metrics endpoint, then flush and close the journals"""
+        self.engine.stop()
+        if self.beacon is not None:
+            self.beacon.close()
+        if self.metrics_server is not None:
+            self.metrics_server.close()
+        if self.journals is not None:
+            self.journals.close()
+    
+    def client_joined(self, conn, hello):
+        """Register a client under its nickname, in the room it asked for; rejects taken or invalid nicknames"""
+        nickname = hello.get('nickname')
+        if not isinstance(nickname, str) or not NICKNAME.fullmatch(nickname):
+            self.reject_nickname(conn, str(nickname), 'bad_nickname')
+            return
+        caps = hello.get('caps')
+        caps = [CAPABILITY] if isinstance(caps, list) and CAPABILITY in caps and self.compress_level else []
+        request = conn.replay or {}
+        name = self.requested_room(conn, request) or DEFAULT_ROOM
+        session = hello.get('session')
+        limiter = self.rate_limits.client_limiter()
+        with self.lock:
+            previous = self.nicknames.get(nickname)
+            if previous is not None:
+                if not isinstance(session, str) or not secrets.compare_digest(session.encode(), previous.session.encode()):
+                    self.reject_nickname(conn, nickname, 'nickname_taken')
+                    return
+                # The client reconnected while its old connection still looked alive; reconnecting does not refill its limits
+                self.engine.close(previous)
+                limiter = previous.limiter
+            conn.nickname = nickname
+            conn.limiter = limiter
+            conn.session = secrets.token_urlsafe(16)
+            self.nicknames[nickname] = conn
+            self.connected_clients[conn.addr] = conn
+            self.engine.send(conn, encode_json(MSG_WELCOME, nickname=nickname, caps=caps, session=conn.session))
+            if caps:
+                # The client inflates what follows MSG_WELCOME, and may compress from then on
+                self.engine.enable_compression(conn, self.compress_level, self.compress_threshold)
+            self.move_to_room(conn, name, request)
+        if not conn.closed:
+            self.emit('joined', nickname=nickname, ip=conn.addr[0], room=name)
+    
+    def reject_nickname(self, conn, nickname, reason):
+        """Tell a client its nickname cannot be used; it stays connected to try another"""
+        self.engine.send(conn, encode_notice(reason, nickname=nickname))
+        self.emit('rejected', nickname=nickname, ip=conn.addr[0], reason=reason)
+    
+    def switch_room(self, conn, request):
+        """Move a client to the room named in a join request"""
+        name = self.requested_room(conn, request)
+        if name is None:
+            return
+        with self.lock:
+            if conn.room is not None and conn.room.name == name:
+                self.engine.send(conn, self.room_list(conn.room))
+                return
+            self.move_to_room(conn, name, request)
+        if not conn.closed:
+            self.emit('entered', nickname=conn.nickname, room=name)
+    
+    def send_rooms(self, conn):
+        """Answer a room list request"""
+        with self.lock:
+            self.engine.send(conn, self.room_list(conn.room))
+    
+    def requested_room(self, conn, request):
+        """Return the room name of a join request, or None after telling the client it is invalid"""
+        name = request.get('room', DEFAULT_ROOM)
+        if isinstance(name, str) and ROOM_NAME.fullmatch(name):
+            return name
+        self.engine.send(conn, encode_notice('bad_room', room=str(name)))
+        return None
+    
+    def get_room(self, name):
+        """Return the room called name, creating it on first use"""
+        room = self.rooms.get(name)
+        if room is None:
+            journal = None
+            if self.journals is not None:
+                try:
+                    # The default room keeps its journal in the top directory
+                    journal = self.journals.open('' if name == DEFAULT_ROOM else name)
+                except (OSError, ValueError) as e:
+                    self.emit('journal_error', error=str(e))
+            room = self.rooms[name] = Room(name, journal, self.rate_limits.room_limiter())
+        return room
+    
+    def move_to_room(self, conn, name, request):
+        """Move conn to another room and queue the history it asked for; needs the lock"""
+        self.leave_room(conn)
+        room = self.get_room(name)
+        room.members[conn.addr] = conn
+        conn.room = room
+        room.presence.joined(conn.nickname)
+        # The room list comes first so the client knows which room the roster and history are from;
+        # holding the lock keeps broadcasts out until the history has been queued
+        self.engine.send(conn, self.room_list(room))
+        self.engine.send(conn, self.roster(room))
+        self.replay_history(conn, room, request)
+        self.send_presence(room, time.monotonic())
+    
+    def leave_room(self, conn):
+        """Take conn out of its room, dropping the room once it is empty; needs the lock"""
+        room = conn.room
+        if room is None:
+            return
+        conn.room = None
+        room.members.pop(conn.addr, None)
+        if not room.members and room.name != DEFAULT_ROOM:
+            del self.rooms[room.name]
+            if room.journal is not None:
+                self.journals.release(room.journal)
+            return
+        room.presence.left(conn.nickname)
+        self.send_presence(room, time.monotonic())
+    
+    def room_list(self, room):
+        """Build the room list frame for a member of room"""
+        rooms = {name: len(other.members) for name, other in self.rooms.items()}
+        return encode_json(MSG_ROOMS, room=room.name if room else None, rooms=rooms)
+    
+    def roster(self, room):
+        """Build the presence frame a client entering room starts from"""
+        users = sorted(member.nickname for member in room.members.values())
+        return encode_json(MSG_PRESENCE, users=users, typing=sorted(room.presence.typing))
+    
+    def typing(self, conn, request):
+        """Start, renew or end the typing indicator of a client in its room"""
+        typing = request.get('typing')
+        if not isinstance(typing, bool):
+            raise ProtocolError("invalid typing indicator")
+        self.metrics.typing_received += 1
+        now = time.monotonic()
+        with self.lock:
+            room = conn.room
+            if room is not None:
+                room.presence.set_typing(conn.nickname, now + self.presence.typing_timeout if typing else None)
+                self.send_presence(room, now)
+    
+    def send_presence(self, room, now):
+        """Send the members of room the presence update due at now, if there is one; needs the lock"""
+        fields = room.presence.update(now, self.presence.interval)
+        if fields is not None:
+            self.engine.broadcast(list(room.members.values()), encode_json(MSG_PRESENCE, **fields))
+            self.metrics.presence_updates += 1
+    
+    def update_presence(self, now):
+        """Send the presence updates that were held back, called by the engine every presence interval"""
+        with self.lock:
+            for room in list(self.rooms.values()):
+                if room.presence.pending():
+                    self.send_presence(room, now)
+    
+    def connection_error(self, e):
+        """Report an error while accepting client connections"""
+        self.emit('connection_error', error=str(e))
+    
+    def admit(self, conn, size, room=None):
+        """Charge a message of size bytes to the client's limits and those of room; returns False when it is over them"""
+        now = time.monotonic()
+        limiter = conn.limiter
+        room_limiter = None if room is None else room.limiter
+        if limiter is not None and not limiter.allows(size, now):
+            scope, refused = 'client', limiter
+        elif room_limiter is not None and not room_limiter.allows(size, now):
+            scope, refused = 'room', room_limiter
+        else:
+            if limiter is not None:
+                limiter.take(size)
+            if room_limiter is not None:
+                room_limiter.take(size)
+            conn.throttled = False
+            return True
+        self.metrics.messages_throttled += 1
+        if not conn.throttled:
+            # Once per run of refused messages, so a flood is not answered with a flood of notices
+            conn.throttled = True
+            retry = max(round(refused.retry_after(size), 1), 0.1)
+            self.engine.send(conn, encode_notice('throttled', scope=scope, retry=retry))
+            self.emit('throttled', nickname=conn.nickname, scope=scope)
+        return False
+    
+    def handle_client(self, conn, text):
+        """Run a client's chat message through the pipeline and broadcast what comes out of it"""
+        message = Message(conn, text)
+        if not self.pipeline.process(message):
+            return  # a command, or dropped by a filter
+        room = message.room
+        self.emit('message', nickname=conn.nickname, room=room.name, text=message.text)
+        
+        # Index the message before taking the lock, so tokenizing holds up no one
+        journal = room.journal
+        terms = index_terms(conn.nickname, message.text) if journal is not None and journal.index is not None else None
+        
+        # Broadcast message to the other clients in the room, and to the sender too when it changed on the way
+        exclude = conn.addr if message.echoed() else None
+        self.broadcast_message(room, message.line(), exclude=exclude, terms=terms)
+        
+        if conn.nickname in room.presence.typing:
+            # Sending the message ends the typing indicator
+            with self.lock:
+                room.presence.set_typing(conn.nickname, None)
+                self.send_presence(room, time.monotonic())
+        self.pipeline.audit(message)
+    
+    def who(self, message, argument):
+        """/who: tell the client who is in its room"""
+        with self.lock:
+            room = message.conn.room
+            users = sorted(member.nickname for member in room.members.values())
+        self.engine.send(message.conn, encode_notice('who', room=room.name, count=len(users), users=', '.join(users)))
+    
+    def nick(self, message, nickname):
+        """/nick: change the client's nickname, telling its room"""
+        conn = message.conn
+        if not NICKNAME.fullmatch(nickname):
+            self.engine.send(conn, encode_notice('nick_invalid', nickname=nickname))
+            return
+        old = conn.nickname
+        with self.lock:
+            if nickname == old:
+                return
+            if nickname in self.nicknames:
+                self.engine.send(conn, encode_notice('nick_in_use', nickname=nickname))
+                return
+            del self.nicknames[old]
+            self.nicknames[nickname] = conn
+            conn.nickname = nickname
+            room = conn.room
+            room.presence.left(old)
+            room.presence.joined(nickname)
+            self.engine.broadcast(list(room.members.values()), encode_notice('renamed', old=old, new=nickname))
+            self.send_presence(room, time.monotonic())
+        self.emit('renamed', old=old, new=nickname)
+    
+    def me(self, message, action):
+        """/me: send the rest of the line as an action of the client"""
+        if not action:
+            self.engine.send(message.conn, encode_notice('me_usage'))
+            return False
+        message.text = action
+        message.action = True
+        return True
+    
+    def search(self, conn, request):
+        """Answer a client searching the history of its room with one page of results"""
+        query, nickname, limit = request.get('query', ''), request.get('from'), request.get('limit', SEARCH_LIMIT)
+        since, until, before = request.get('since'), request.get('until'), request.get('before')
+        if not (isinstance(query, str) and (nickname is None or isinstance(nickname, str))
+                and all(value is None or type(value) in (int, float) for value in (since, until))
+                and (before is None or type(before) is int) and type(limit) is int and 0 < limit <= SEARCH_LIMIT):
+            raise ProtocolError("invalid search request")
+        journal = conn.room.journal
+        if journal is None or journal.index is None:
+            self.engine.send(conn, encode_notice('no_search'))
+            return
+        started = time.perf_counter()
+        try:
+            results, more = journal.search(query_terms(query, nickname), since, until, before, limit)
+        except (OSError, ValueError) as e:
+            self.emit('journal_error', error=str(e))  # ValueError: the room closed meanwhile
+            return
+        self.metrics.search_seconds.observe(time.perf_counter() - started)
+        self.metrics.searches += 1
+        self.engine.send(conn, encode_json(
+            MSG_SEARCH, query=query, results=[list(result) for result in results], next=results[-1][0] if more else None
+        ))
+    
+    def direct_message(self, conn, request):
+        """Deliver a private message to the one client with the requested nickname"""
+        to, text = request.get('to'), request.get('text')
+        if not isinstance(to, str) or not isinstance(text, str):
+            raise ProtocolError("invalid private message")
+        target = self.nicknames.get(to)
+        if target is None:
+            self.engine.send(conn, encode_notice('no_such_user', nickname=to))
+            return
+        self.emit('direct', nickname=conn.nickname, to=to)
+        self.engine.send(target, encode_json(MSG_DIRECT, **{'from': conn.nickname, 'text': text}))
+        self.metrics.direct_messages += 1
+    
+    def start_upload(self, conn, offer):
+        """Answer a client offering a file with the offset to send it from"""
+        transfer, name, size, sha256 = (offer.get(key) for key in ('transfer', 'name', 'size', 'sha256'))
+        if not (type(transfer) is int and 0 <= transfer <= MAX_TRANSFER and isinstance(name, str)
+                and type(size) is int and size >= 0 and isinstance(sha256, str) and SHA256.fullmatch(sha256)):
+            raise ProtocolError("invalid file offer")
+        if self.files is None:
+            self.engine.send(conn, encode_notice('no_files', name=name, transfer=transfer))
+            return
+        if size > self.files.max_size:
+            self.engine.send(conn, encode_notice('file_too_large', name=name, transfer=transfer, limit=self.files.max_size))
+            return
+        try:
+            upload, previous = self.files.upload(sha256, size, conn)
+        except (OSError, FileError) as e:
+            self.file_failed(conn, name, transfer, e)
+            return
+        if upload is None:
+            # Stored already, maybe under another name: share it without sending it again
+            self.engine.send(conn, encode_json(MSG_UPLOAD, transfer=transfer, offset=size))
+            self.share_file(conn, name, sha256, size)
+            return
+        if previous is not None and previous is not conn:
+            self.upload_taken_over(previous, upload)
+        conn.uploads[transfer] = (upload, name)
+        if upload.resuming:
+            with self.lock:
+                self.resuming.append((conn, transfer, upload))
+            return
+        self.accept_upload(conn, transfer, upload)
+    
+    def accept_upload(self, conn, transfer, upload):
+        """Tell the client the offset to send its file from"""
+        self.engine.send(conn, encode_json(MSG_UPLOAD, transfer=transfer, offset=upload.offset))
+        if upload.complete:
+            self.finish_upload(conn, transfer)
+    
+    def answer_resumed(self, now):
+        """Answer the offers that waited for the .part files hashed since the last call"""
+        if not self.resuming:
+            return
+        with self.lock:
+            done = [entry for entry in self.resuming if not entry[2].resuming]
+            self.resuming = [entry for entry in self.resuming if entry[2].resuming]
+        for conn, transfer, upload in done:
+            taken, name = conn.uploads.get(transfer, (None, None))
+            if taken is not upload or upload.owner is not conn:
+                continue  # the client left or another connection took the upload over
+            if upload.error is not None:
+                del conn.uploads[transfer]
+                self.file_failed(conn, name, transfer, upload.error)
+            else:
+                self.accept_upload(conn, transfer, upload)
+    
+    def upload_chunk(self, conn, payload):
+        """Store a chunk of a file the client is sending, sharing the file once it is complete"""
+        transfer, offset, data = decode_chunk(payload)
+        self.metrics.file_chunks_received += 1
+        upload, name = conn.uploads.get(transfer, (None, None))
+        if upload is None or upload.owner is not conn:
+            return  # refused, failed or taken over by the client's new connection
+        try:
+            complete = upload.write(offset, data)
+        except (OSError, FileError) as e:
+            upload.close()
+            del conn.uploads[transfer]
+            self.file_failed(conn, name, transfer, e)
+            return
+        if complete:
+            self.finish_upload(conn, transfer)
+    
+    def finish_upload(self, conn, transfer):
+        upload, name = conn.uploads.pop(transfer)
+        try:
+            self.files.finish(upload)
+        except (OSError, FileError) as e:
+            self.file_failed(conn, name, transfer, e)
+            return
+        self.share_file(conn, name, upload.sha256, upload.size)
+    
+    def upload_taken_over(self, conn, upload):
+        """Tell a client that another connection goes on with its upload, whose chunks it sends are dropped from now on"""
+        for transfer, (taken, name) in list(conn.uploads.items()):
+            if taken is upload:
+                conn.uploads.pop(transfer, None)
+                self.file_failed(conn, name, transfer, "another connection took the upload over")
+    
+    def file_failed(self, conn, name, transfer, error):
+        self.engine.send(conn, encode_notice('file_failed', name=name, transfer=transfer, error=str(error)))
+    
+    def share_file(self, conn, name, sha256, size):
+        """Tell everyone in the sender's room about a file they can download"""
+        with self.lock:
+            room = conn.room
+            if room is None:
+                return  # the client left meanwhile
+            frame = encode_json(MSG_FILE, id=sha256, name=name, size=size, **{'from': conn.nickname})
+            self.engine.broadcast(list(room.members.values()), frame)
+            self.metrics.files_shared += 1
+        self.emit('file', nickname=conn.nickname, room=room.name, name=name, size=size)
+    
+    def start_download(self, conn, request):
+        """Send a stored file to a client from the offset it asked for"""
+        transfer, sha256, offset = request.get('transfer'), request.get('id'), request.get('offset', 0)
+        if not (type(transfer) is int and 0 <= transfer <= MAX_TRANSFER and isinstance(sha256, str) and type(offset) is int
+                and offset >= 0):
+            raise ProtocolError("invalid download request")
+        path = None if self.files is None else self.files.path(sha256)
+        if path is None:
+            self.engine.send(conn, encode_notice('no_such_file', transfer=transfer))
+            return
+        try:
+            size = os.path.getsize(path)
+        except OSError as e:
+            self.file_failed(conn, '', transfer, e)
+            return
+        self.engine.stream_file(conn, ChunkReader(path, transfer, min(offset, size), size))
+    
+    def broadcast_message(self, room, message, exclude=None, terms=None):
+        """Broadcast message to all clients in room (excluding specified client)"""
+        with self.lock:
+            frame = self.chat_frame(room, message, terms)
+            started = time.perf_counter()
+            recipients = [conn for addr, conn in room.members.items() if addr != exclude]
+            self.engine.broadcast(recipients, frame)
+            self.metrics.broadcast_seconds.observe(time.perf_counter() - started)
+            self.metrics.broadcast_recipients.observe(len(recipients))
+            self.metrics.chat_messages += 1
+    
+    def chat_frame(self, room, message, terms=None):
+        """Give a chat message the room's next ID, storing it in the room's journal if there is one, indexed under terms"""
+        timestamp = time.time()
+        if room.journal is None:
+            room.last_id += 1
+            return encode_chat(room.last_id, timestamp, message)
+        try:
+            return room.journal.append(timestamp, message, terms)
+        except (OSError, ValueError) as e:
+            # Keep the chat going; ID 0 marks a message that was not stored
+            self.emit('journal_error', error=str(e))
+            return encode_chat(0, timestamp, message)
+    
+    def replay_history(self, conn, room, request):
+        """Queue the part of room's history a client asked for"""
+        if room.journal is None:
+            return
+        last, since = request.get('last'), request.get('since')
+        if not all(value is None or type(value) is int for value in (last, since)):
+            raise ProtocolError("invalid history request")
+        if last is None and since is None:
+            return
+        count, views = room.journal.read(last, since)
+        if count:
+            self.engine.send(conn, encode_notice('replayed', count=count))
+            for view in views:
+                self.engine.send(conn, view)
+    
+    def remove_client(self, conn, unexpected=False):
+        """Remove disconnected client"""
+        if unexpected:
+            self.emit('disconnected', nickname=conn.nickname)
+        for upload, name in conn.uploads.values():
+            if upload.owner is conn:
+                upload.close()  # kept by the FileStore for the client to resume
+        with self.lock:
+            self.leave_room(conn)
+            if self.nicknames.get(conn.nickname) is conn:
+                del self.nicknames[conn.nickname]
+            joined = self.connected_clients.pop(conn.addr, None) is not None
+        if joined:
+            self.emit('left', nickname=conn.nickname)
+    
+    def report_backpressure(self):
+        """Emit the backpressure counters if they changed since the last report"""
+        over, *counters = self.engine.backpressure_state(list(self.connected_clients.values()))
+        counters = tuple(counters)
+        if counters == self.reported_counters:
+            return
+        self.reported_counters = counters
+        dropped, coalesced, disconnected = counters
+        self.emit(
+            'backpressure',
+            policy=self.backpressure.policy,
+            over=over,
+            dropped=dropped,
+            coalesced=coalesced,
+            disconnected=disconnected
+        )
+    
+    def collect_metrics(self):
+        """Return a snapshot of the metrics with the gauges and backpressure counters added"""
+        connections = list(self.connected_clients.values())
+        snapshot = self.engine.metrics_snapshot(connections)
+        over, dropped, coalesced, disconnected = self.engine.backpressure_state(connections)
+        snapshot['gauges'] = {'clients': len(connections), 'rooms': len(self.rooms), 'over_limit': over}
+        snapshot['counters'].update(
+            backpressure_dropped=dropped,
+            backpressure_coalesced=coalesced,
+            backpressure_disconnected=disconnected
+        )
+        return snapshot
+
+def add_server_arguments(parser, text=None):
+    """Add the options every server front-end understands, with help from the i18n.Catalog text"""
+    text = text or Catalog()
+    parser.add_argument('--host', default=DEFAULT_HOST, help=text('help.host'))
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=text('help.port'))
+    parser.add_argument('--engine', choices=sorted(ENGINES), default=DEFAULT_ENGINE, help=text('help.engine'))
+    parser.add_argument('--backpressure', choices=POLICIES, default=DEFAULT_POLICY, help=text('help.backpressure'))
+    parser.add_argument('--high-watermark', type=int, default=256 * 1024, help=text('help.high_watermark'))
+    parser.add_argument('--low-watermark', type=int, default=64 * 1024, help=text('help.low_watermark'))
+    parser.add_argument('--grace', type=float, default=10.0, help=text('help.grace'))
+    parser.add_argument('--journal', metavar='DIR', help=text('help.journal'))
+    parser.add_argument('--journal-segment-bytes', type=int, default=SEGMENT_BYTES, help=text('help.journal_segment_bytes'))
+    parser.add_argument('--journal-segments', type=int, default=MAX_SEGMENTS, help=text('help.journal_segments'))
+    parser.add_argument('--journal-sync-interval', type=float, default=SYNC_INTERVAL, help=text('help.journal_sync_interval'))
+    parser.add_argument('--no-search', action='store_true', help=text('help.no_search'))
+    parser.add_argument('--compress-level', type=int, choices=range(10), default=DEFAULT_LEVEL, metavar='0-9',
+                        help=text('help.compress_level'))
+    parser.add_argument('--compress-threshold', type=int, default=DEFAULT_THRESHOLD, help=text('help.compress_threshold'))
+    parser.add_argument('--workers', type=int, default=0, help=text('help.workers'))
+    parser.add_argument('--heartbeat-interval', type=float, default=DEFAULT_INTERVAL, help=text('help.heartbeat_interval'))
+    parser.add_argument('--idle-timeout', type=float, default=DEFAULT_TIMEOUT, help=text('help.idle_timeout'))
+    parser.add_argument('--keepalive', type=float, default=DEFAULT_KEEPALIVE, help=text('help.keepalive'))
+    parser.add_argument('--metrics-port', type=int, help=text('help.metrics_port'))
+    parser.add_argument('--metrics-host', default=DEFAULT_METRICS_HOST, help=text('help.metrics_host'))
+    parser.add_argument('--profile-every', type=int, default=0, metavar='N', help=text('help.profile_every'))
+    parser.add_argument('--discovery-port', type=int, default=DISCOVERY_PORT, help=text('help.discovery_port'))
+    parser.add_argument('--name', help=text('help.server_name'))
+    parser.add_argument('--files', metavar='DIR', help=text('help.files'))
+    parser.add_argument('--max-file-size', type=int, default=MAX_FILE_SIZE, help=text('help.max_file_size'))
+    parser.add_argument('--client-rate', type=float, default=CLIENT_RATE, help=text('help.client_rate'))
+    parser.add_argument('--client-burst', type=int, default=CLIENT_BURST, help=text('help.client_burst'))
+    parser.add_argument('--client-byte-rate', type=float, default=CLIENT_BYTE_RATE, help=text('help.client_byte_rate'))
+    parser.add_argument('--client-byte-burst', type=int, default=CLIENT_BYTE_BURST, help=text('help.client_byte_burst'))
+    parser.add_argument('--room-rate', type=float, default=ROOM_RATE, help=text('help.room_rate'))
+    parser.add_argument('--room-burst', type=int, default=ROOM_BURST, help=text('help.room_burst'))
+    parser.add_argument('--room-byte-rate', type=float, default=ROOM_BYTE_RATE, help=text('help.room_byte_rate'))
+    parser.add_argument('--room-byte-burst', type=int, default=ROOM_BYTE_BURST, help=text('help.room_byte_burst'))
+    parser.add_argument('--batch-window', type=float, default=DEFAULT_WINDOW * 1000, metavar='MS', help=text('help.batch_window'))
+    parser.add_argument('--batch-bytes', type=int, default=DEFAULT_BATCH_BYTES, help=text('help.batch_bytes'))
+    parser.add_argument('--presence-interval', type=float, default=DEFAULT_UPDATE_INTERVAL, help=text('help.presence_interval'))
+    parser.add_argument('--typing-timeout', type=float, default=DEFAULT_TYPING_TIMEOUT, help=text('help.typing_timeout'))
+    parser.add_argument('--tls-cert', metavar='FILE', help=text('help.tls_cert'))
+    parser.add_argument('--tls-key', metavar='FILE', help=text('help.tls_key'))
+    parser.add_argument('--tls-self-signed', action='store_true', help=text('help.tls_self_signed'))
+    parser.add_argument('--plugin', action='append', default=[], metavar='MODULE', help=text('help.plugin'))
+
+def create_server_core(args):
+    """Build a ChatServerCore from parsed options; raises ValueError for invalid ones"""
+    backpressure = BackpressurePolicy(args.backpressure, args.high_watermark, args.low_watermark, args.grace)
+    heartbeat = HeartbeatPolicy(args.heartbeat_interval, args.idle_timeout, args.keepalive)
+    rate_limits = RateLimitPolicy(
+        args.client_rate,
+        args.client_burst,
+        args.client_byte_rate,
+        args.client_byte_burst,
+        args.room_rate,
+        args.room_burst,
+        args.room_byte_rate,
+        args.room_byte_burst
+    )
+    batching = BatchPolicy(args.batch_window / 1000, args.batch_bytes)
+    presence = PresencePolicy(args.presence_interval, args.typing_timeout)
+    if args.workers < 0:
+        raise ValueError("the number of workers cannot be negative")
+    if args.profile_every < 0:
+        raise ValueError("the profiling interval cannot be negative")
+    if not 0 <= args.discovery_port <= 65535:
+        raise ValueError("the discovery port must be between 0 and 65535")
+    metrics_address = None if args.metrics_port is None else (args.metrics_host, args.metrics_port)
+    journals = None
+    if args.journal:
+        try:
+            journals = JournalStore(
+                args.journal,
+                args.journal_segment_bytes,
+                args.journal_segments,
+                args.journal_sync_interval,
+                indexed=not args.no_search
+            )
+        except OSError as e:
+            raise ValueError(f"cannot open the journal: {e}") from None
+    tls = None
+    if args.tls_cert:
+        if args.tls_self_signed and not os.path.exists(args.tls_cert):
+            try:
+                generate_certificate(args.tls_cert, args.tls_key, local_names(args.host))
+            except OSError as e:
+                raise ValueError(f"cannot create the TLS certificate: {e}") from None
+        tls = TLSPolicy(args.tls_cert, args.tls_key)
+    elif args.tls_self_signed or args.tls_key:
+        raise ValueError("--tls-self-signed and --tls-key need --tls-cert")
+    files = None
+    if args.files:
+        try:
+            files = FileStore(args.files, args.max_file_size)
+        except OSError as e:
+            raise ValueError(f"cannot open the file directory: {e}") from None
+    return ChatServerCore(
+        args.host,
+        args.port,
+        args.engine,
+        backpressure,
+        journals,
+        args.compress_level,
+        args.compress_threshold,
+        args.workers,
+        metrics_address,
+        args.profile_every,
+        heartbeat,
+        args.discovery_port,
+        args.name,
+        files,
+        rate_limits,
+        batching,
+        presence,
+        tls,
+        args.plugin
+    )
@@ -0,0 +1,713 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Network engines shared by the chat servers
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import selectors
+import socket
+import threading
+import time
+from collections import deque
+from itertools import islice
+from ssl import SSLSocket, SSLWantReadError, SSLWantWriteError
+
+from backpressure import BackpressurePolicy
+from batching import BatchPolicy
+from compression import Deflater, Inflater
+from files import limit_unsent
+from heartbeat import CHECK_INTERVAL, HeartbeatPolicy, IdleReaper
+from metrics import Metrics, queue_histogram
+from tls import HANDSHAKE_TIMEOUT
+from protocol import (
+    MSG_CHUNK, MSG_DIRECT, MSG_DOWNLOAD, MSG_EXIT, MSG_HELLO, MSG_JOIN, MSG_PING, MSG_PONG, MSG_REPLAY, MSG_ROOMS, MSG_TEXT,
+    MSG_SEARCH, MSG_TYPING, MSG_UPLOAD, MSG_ZLIB, FrameParser, ProtocolError, decode_json, decode_text, encode_frame, encode_notice
+)
+
+IOV_MAX = 512           # buffers handed to one sendmsg() call
+HAVE_SENDMSG = hasattr(socket.socket, 'sendmsg')
+
+PING = encode_frame(MSG_PING)
+PONG = encode_frame(MSG_PONG)
+
+def send_buffers(sock, buffers):
+    """Write several buffers with one system call where the platform allows it"""
+    if HAVE_SENDMSG and not isinstance(sock, SSLSocket):
+        return sock.sendmsg(buffers)
+    return sock.send(b''.join(buffers))  # a TLS socket encrypts the buffers into records anyway
+
+def sendall_buffers(sock, buffers):
+    """Blocking vectored write of every buffer; returns the number of system calls used"""
+    calls = 0
+    for i in range(0, len(buffers), IOV_MAX):
+        batch = buffers[i:i + IOV_MAX]
+        sent = send_buffers(sock, batch)
+        calls += 1
+        if sent < sum(map(len, batch)):
+            sock.sendall(b''.join(batch)[sent:])
+            calls += 1
+    return calls
+
+class Outbox:
+    """Bounded queue of encoded frames waiting to be written to one client
+    
+    Frames are immutable bytes objects, so a broadcast is encoded once and
+    every recipient's outbox only holds a reference to it. The size of the
+    queue is kept in check by a BackpressurePolicy. With compression on,
+    the frames waiting when a write starts are packed into one compressed
+    frame for this client. Files being sent to the client are read one
+    chunk at a time, only when no other frame is waiting, and go out as
+    they are.
+    """
+    
+    def __init__(self, policy, metrics):
+        self.frames = deque()
+        self.size = 0    # queued bytes not written yet
+        self.offset = 0  # bytes of frames[0] already written
+        self.policy = policy
+        self.metrics = metrics
+        self.over_since = None  # when the queue went above the high watermark
+        self.notice = None      # queued "messages skipped" notice
+        self.notice_count = 0   # messages that notice stands for
+        self.codec = None    # compression.Deflater once compression is on
+        self.plain = 0       # leading frames queued before compression was turned on
+        self.packed = False  # frames[0] is a compressed batch, which must not be dropped
+        self.streams = deque()  # files.ChunkReader of each file being sent, taking turns chunk by chunk
+        self.chunk = False   # frames[0] is a file chunk, which must not be dropped or compressed
+        self.retry = 0       # leading frames of a TLS write that must be tried again as they are
+        self.ready = threading.Condition()  # used by engines with a writer thread
+    
+    def push(self, frame):
+        """Queue a frame; returns False when the client should be disconnected"""
+        self.frames.append(frame)
+        self.size += len(frame)
+        self.metrics.frames_queued += 1
+        if self.size > self.policy.high_watermark:
+            return self.policy.relieve(self)
+        return True
+    
+    def compress_after_queued(self, codec):
+        """Compress frames queued from now on with codec; those already queued go out as they are"""
+        with self.ready:
+            self.codec = codec
+            self.plain = len(self.frames)
+    
+    def next_chunk(self):
+        """Queue the next chunk of the files being sent; returns False once there are none left"""
+        while self.streams:
+            stream = self.streams.popleft()
+            frame = stream.next_frame()
+            if frame is not None:
+                self.streams.append(stream)
+                self.frames.append(frame)
+                self.size += len(frame)
+                self.chunk = True
+                self.metrics.file_chunks_sent += 1
+                return True
+        return False
+    
+    def take(self):
+        """Remove and return every queued frame, packed if compression is on, or else the next file chunk"""
+        if not self.frames:
+            self.next_chunk()
+        frames = list(self.frames)
+        self.frames.clear()
+        self.size = self.offset = 0
+        self.over_since = None
+        plain, self.plain = frames[:self.plain], 0
+        chunk, self.chunk = self.chunk, False
+        if self.codec is not None and not chunk:
+            packed = self.codec.pack(frames[len(plain):])
+            if packed is not None:
+                frames = plain + [packed]
+        return frames
+    
+    def pack(self):
+        """Replace the queued frames by one compressed frame if they are worth it"""
+        frame = self.codec.pack(self.frames)
+        if frame is not None:
+            self.frames.clear()
+            self.frames.append(frame)
+            self.size = len(frame)
+            self.packed = True
+    
+    def kept_head(self):
+        """Remove and return the leading frames that must be written as they are"""
+        # Partly written or packed frames must finish, and frames queued before
+        # compression was turned on must not be packed with later ones
+        count = max(self.plain, self.retry) or (1 if self.offset or self.packed or self.chunk else 0)
+        return [self.frames.popleft() for _ in range(min(count, len(self.frames) - 1))]
+    
+    def restore_head(self, head):
+        self.frames.extendleft(reversed(head))
+    
+    def drop_oldest(self, target):
+        """Drop the oldest frames until at most target bytes are queued; returns how many"""
+        head = self.kept_head()
+        dropped = 0
+        while len(self.frames) > 1 and self.size > target:
+            self.size -= len(self.frames.popleft())
+            dropped += 1
+        self.restore_head(head)
+        return dropped
+    
+    def coalesce(self):
+        """Replace all but the newest queued frame by one notice; returns how many were replaced"""
+        head = self.kept_head()
+        newest = self.frames.pop()
+        replaced = skipped = 0
+        for frame in self.frames:
+            self.size -= len(frame)
+            if frame is self.notice:
+                skipped += self.notice_count
+            else:
+                replaced += 1
+        self.frames.clear()
+        
+        skipped += replaced
+        if skipped:
+            self.notice = encode_notice('skipped', count=skipped)
+            self.notice_count = skipped
+            self.frames.append(self.notice)
+            self.size += len(self.notice)
+        self.frames.append(newest)
+        self.restore_head(head)
+        return replaced
+    
+    def write_to(self, sock):
+        """Write queued frames, or else one file chunk, to a non-blocking socket; returns True once nothing is left"""
+        while self.frames or self.next_chunk():
+            if (self.codec is not None and not self.plain and not self.offset and not self.packed and not self.chunk
+                    and not self.retry):
+                self.pack()
+            buffers = list(islice(self.frames, min(self.plain or IOV_MAX, IOV_MAX)))
+            if self.offset:
+                buffers[0] = memoryview(buffers[0])[self.offset:]
+            try:
+                sent = send_buffers(sock, buffers)
+            except BlockingIOError:
+                break
+            except (SSLWantWriteError, SSLWantReadError):
+                # OpenSSL has taken on part of the write and goes on from the same bytes next time
+                self.retry = len(buffers)
+                break
+            self.retry = 0
+            self.size -= sent
+            self.metrics.send_calls += 1
+            self.metrics.bytes_sent += sent
+            
+            written = self.offset + sent
+            chunk = self.chunk
+            while self.frames and written >= len(self.frames[0]):
+                written -= len(self.frames.popleft())
+                self.plain = max(self.plain - 1, 0)
+                self.packed = self.chunk = False
+            self.offset = written
+            if written or chunk:
+                break  # a chunk per write keeps one large file from holding up the event loop
+        
+        if self.over_since is not None and self.size <= self.policy.low_watermark:
+            self.over_since = None
+        return not self.frames and not self.streams
+
+class ClientConnection:
+    """State of one connected client, shared by all engines"""
+    
+    def __init__(self, sock, addr, policy, metrics=None):
+        self.sock = sock
+        self.addr = addr
+        self.nickname = None
+        self.session = None  # token a reconnecting client presents to take its nickname back
+        self.replay = None  # history requested before joining
+        self.room = None    # Room the client is in, set by the server core
+        self.uploads = {}   # {transfer: (files.PartialFile, name)} of files the client is sending, kept by the server core
+        self.limiter = None  # ratelimit.RateLimiter of the client, set by the server core; None for no limit
+        self.throttled = False  # told it is over a rate limit, and no message got through since
+        self.inflater = None  # compression.Inflater once the client may send compressed frames
+        self.inflated = FrameParser()
+        self.closed = False
+        self.handshaking = False  # the TLS handshake has not finished yet
+        self.last_seen = None  # time.monotonic() of the last data received, kept for the idle reaper
+        self.parser = FrameParser()
+        self.outbox = Outbox(policy, metrics or Metrics())
+        self.writing = False  # a flush is scheduled or waiting for writability
+
+class BaseEngine:
+    """Frame dispatch shared by all engines"""
+    
+    def __init__(self, server, backpressure=None, metrics=None, heartbeat=None, batching=None, tls=None):
+        self.server = server
+        self.backpressure = backpressure or BackpressurePolicy()
+        self.metrics = metrics or Metrics()
+        self.heartbeat = heartbeat or HeartbeatPolicy()
+        self.batching = batching or BatchPolicy()
+        self.tls = tls  # tls.TLSPolicy client connections are wrapped with, None for plain TCP
+        self.reaper = IdleReaper(self.heartbeat) if self.heartbeat.interval else None
+        self.timers = []  # [interval, callback, next call] of every()
+    
+    def every(self, interval, callback):
+        """Have the engine call callback(now) every interval seconds once it starts"""
+        self.timers.append([interval, callback, None])
+    
+    def run_timers(self, now):
+        """Call the timers that are due"""
+        for timer in self.timers:
+            interval, callback, due = timer
+            if due is None or now >= due:
+                timer[2] = now + interval
+                callback(now)
+    
+    def dispatch(self, conn):
+        """Handle every complete frame received so far; returns False once the client leaves"""
+        for msg_type, payload in conn.parser.frames():
+            if msg_type == MSG_ZLIB and conn.inflater is not None:
+                conn.inflated.feed(conn.inflater.unpack(payload))
+                frames = conn.inflated.frames()
+            else:
+                frames = ((msg_type, payload),)
+            for msg_type, payload in frames:
+                self.metrics.frames_received += 1
+                if msg_type == MSG_PONG:
+                    continue  # having received something is all that counts
+                if msg_type == MSG_PING:
+                    self.send(conn, PONG)
+                elif not self.handle_frame(conn, msg_type, payload):
+                    return False
+        return True
+    
+    def watch(self, conn, now):
+        """Set up keepalive, TCP_NODELAY and idle checks for a newly accepted connection"""
+        self.heartbeat.configure(conn.sock)
+        self.batching.configure(conn.sock)
+        if self.reaper is not None:
+            self.reaper.add(conn, now)  # also disconnects clients that never finish the TLS handshake
+    
+    def secure(self, sock):
+        """Wrap an accepted socket in TLS when the server has a certificate; returns the socket to use"""
+        return sock if self.tls is None else self.tls.wrap(sock)
+    
+    def secured(self, conn):
+        """Count a finished TLS handshake"""
+        conn.handshaking = False
+        self.metrics.tls_handshakes += 1
+        if conn.sock.session_reused:
+            self.metrics.tls_resumed += 1
+    
+    def client_failed(self, conn, error):
+        """Report an error no handler expected and disconnect the client it came up for, and only that one"""
+        self.report_error(f"{conn.addr[0]}: {type(error).__name__}: {error}")
+        self.close(conn, unexpected=True)
+    
+    def report_error(self, error):
+        self.server.connection_error(error)
+    
+    def reap_idle(self, now):
+        """Ping connections that have been silent too long and disconnect those silent for longer"""
+        ping, reap = self.reaper.check(now)
+        for conn in ping:
+            self.send(conn, PING)
+        for conn in reap:
+            self.close(conn, unexpected=True)
+        self.metrics.pings_sent += len(ping)
+        self.metrics.idle_reaped += len(reap)
+    
+    def broadcast(self, conns, frame):
+        """Queue one frame for several clients"""
+        for conn in conns:
+            self.send(conn, frame)
+    
+    def enable_compression(self, conn, level, threshold):
+        """Accept compressed frames from conn and compress what is queued for it from now on"""
+        conn.inflater = Inflater()
+        conn.outbox.compress_after_queued(Deflater(level, threshold))
+    
+    def stop(self):
+        """Release what the engine runs besides the client connections, when the server shuts down"""
+    
+    def backpressure_state(self, connections):
+        """Return (over the limit, dropped, coalesced, disconnected) for the engine's connections"""
+        over = sum(1 for conn in connections if conn.outbox.over_since is not None)
+        return (over, *self.backpressure.counters())
+    
+    def metrics_snapshot(self, connections):
+        """Return the engine's metrics with a histogram of the bytes queued for connections"""
+        snapshot = self.metrics.snapshot()
+        snapshot['histograms']['queue_bytes'] = queue_histogram(connections)
+        return snapshot
+    
+    def received(self, count):
+        """Count one recv call on a client socket; returns count"""
+        self.metrics.recv_calls += 1
+        self.metrics.bytes_received += count
+        return count
+    
+    def handle_frame(self, conn, msg_type, payload):
+        """Handle one frame; returns False once the client leaves"""
+        if conn.nickname is None:
+            if msg_type == MSG_REPLAY:
+                conn.replay = decode_json(payload)
+            elif msg_type == MSG_HELLO:
+                # Sets conn.nickname if it is accepted; otherwise the client may try another one
+                self.server.client_joined(conn, decode_json(payload))
+            else:
+                raise ProtocolError("expected a nickname frame")
+        elif msg_type == MSG_TEXT:
+            if self.server.admit(conn, len(payload), conn.room):
+                self.server.handle_client(conn, decode_text(payload))
+        elif msg_type == MSG_JOIN:
+            if self.server.admit(conn, len(payload)):
+                self.server.switch_room(conn, decode_json(payload))
+        elif msg_type == MSG_ROOMS:
+            self.server.send_rooms(conn)
+        elif msg_type == MSG_DIRECT:
+            if self.server.admit(conn, len(payload)):
+                self.server.direct_message(conn, decode_json(payload))
+        elif msg_type == MSG_TYPING:
+            self.server.typing(conn, decode_json(payload))
+        elif msg_type == MSG_SEARCH:
+            if self.server.admit(conn, len(payload)):
+                self.server.search(conn, decode_json(payload))
+        elif msg_type == MSG_CHUNK:
+            self.server.upload_chunk(conn, payload)
+        elif msg_type == MSG_UPLOAD:
+            self.server.start_upload(conn, decode_json(payload))
+        elif msg_type == MSG_DOWNLOAD:
+            self.server.start_download(conn, decode_json(payload))
+        elif msg_type == MSG_EXIT:
+            return False
+        return not conn.closed
+
+class ThreadedEngine(BaseEngine):
+    """Original engine: one blocking thread per client"""
+    
+    def start(self, server_socket):
+        """Start accepting clients in a background thread"""
+        threading.Thread(target=self.accept_clients, args=(server_socket,), daemon=True).start()
+        if self.reaper is not None:
+            threading.Thread(target=self.watch_idle, daemon=True).start()
+        if self.timers:
+            threading.Thread(target=self.watch_timers, daemon=True).start()
+    
+    def watch_idle(self):
+        """Check the idle timers of every client from one thread"""
+        while True:
+            time.sleep(CHECK_INTERVAL)
+            self.reap_idle(time.monotonic())
+    
+    def watch_timers(self):
+        """Call the timers of every() from one thread"""
+        interval = min(timer[0] for timer in self.timers)
+        while True:
+            time.sleep(interval)
+            self.run_timers(time.monotonic())
+    
+    def accept_clients(self, server_socket):
+        """Accept client connections"""
+        while True:
+            try:
+                client_socket, client_addr = server_socket.accept()
+            except OSError as e:
+                self.server.connection_error(e)
+                break
+            
+            # Start client message handling, which starts the writer thread
+            self.metrics.connections_opened += 1
+            conn = ClientConnection(self.secure(client_socket), client_addr, self.backpressure, self.metrics)
+            conn.handshaking = self.tls is not None
+            self.watch(conn, time.monotonic())
+            threading.Thread(target=self.handle_client, args=(conn,), daemon=True).start()
+    
+    def handle_client(self, conn):
+        """Do the TLS handshake if there is one, then read the nickname and messages until the client leaves"""
+        unexpected = False
+        try:
+            if conn.handshaking:
+                self.handshake(conn)
+            # Only one thread uses the socket until the handshake is done
+            threading.Thread(target=self.write_client, args=(conn,), daemon=True).start()
+            while self.received(conn.parser.recv_into(conn.sock)):
+                conn.last_seen = time.monotonic()
+                if not self.dispatch(conn):
+                    break
+        except (OSError, ProtocolError):
+            unexpected = not conn.closed
+        except Exception as e:
+            self.client_failed(conn, e)
+        finally:
+            self.close(conn, unexpected)
+    
+    def handshake(self, conn):
+        """Do the TLS handshake of a client, giving up after HANDSHAKE_TIMEOUT"""
+        conn.sock.settimeout(HANDSHAKE_TIMEOUT)
+        conn.sock.do_handshake()
+        conn.sock.settimeout(None)
+        self.secured(conn)
+    
+    def write_client(self, conn):
+        """Drain the client's outbox, batching everything queued since the last write"""
+        outbox = conn.outbox
+        window, batch_bytes = self.batching.window, self.batching.batch_bytes
+        try:
+            while True:
+                with outbox.ready:
+                    while not outbox.frames and not outbox.streams and not conn.closed:
+                        outbox.ready.wait()
+                    if window and outbox.frames:
+                        # Give the frames that follow the first one the window to join it
+                        deadline = time.monotonic() + window
+                        while outbox.size < batch_bytes and not conn.closed:
+                            remaining = deadline - time.monotonic()
+                            if remaining <= 0:
+                                break
+                            outbox.ready.wait(remaining)
+                    if conn.closed:
+                        return
+                    frames = outbox.take()
+                self.metrics.send_calls += sendall_buffers(conn.sock, frames)
+                self.metrics.bytes_sent += sum(map(len, frames))
+        except OSError:
+            self.close(conn, unexpected=True)
+        except Exception as e:
+            self.client_failed(conn, e)
+    
+    def send(self, conn, frame):
+        """Queue a frame for the client's writer thread without blocking"""
+        with conn.outbox.ready:
+            queued = conn.outbox.push(frame)
+            conn.outbox.ready.notify()
+        if not queued:
+            self.close(conn, unexpected=True)
+    
+    def stream_file(self, conn, stream):
+        """Send a file to the client in chunks, whenever nothing else is queued for it"""
+        limit_unsent(conn.sock)
+        with conn.outbox.ready:
+            conn.outbox.streams.append(stream)
+            conn.outbox.ready.notify()
+    
+    def close(self, conn, unexpected=False):
+        """Close a client connection and notify the server once"""
+        with conn.outbox.ready:
+            if conn.closed:
+                return
+            conn.closed = True
+            conn.outbox.ready.notify()
+        self.metrics.connections_closed += 1
+        try:
+            # Wake the reader thread if another thread is closing the connection
+            conn.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        try:
+            conn.sock.close()
+        finally:
+            if conn.nickname is not None:
+                self.server.remove_client(conn, unexpected)
+
+class SelectorEngine(BaseEngine):
+    """Event loop engine: every client is served by one thread using selectors"""
+    
+    tick_interval = None  # seconds between tick() calls from the event loop, None for never
+    
+    def __init__(self, server, backpressure=None, metrics=None, heartbeat=None, batching=None, tls=None):
+        super().__init__(server, backpressure, metrics, heartbeat, batching, tls)
+        self.selector = selectors.DefaultSelector()
+        self.pending = []  # connections with frames queued during this loop iteration, or held for the batching window
+        self.flush_at = None  # when the batching window of the pending connections ends
+        self.now = time.monotonic()  # when the current loop iteration started
+        self.next_tick = None
+        if self.reaper is not None:
+            self.tick_interval = min(self.tick_interval or CHECK_INTERVAL, CHECK_INTERVAL)
+    
+    def every(self, interval, callback):
+        """Have the event loop call callback(now) every interval seconds"""
+        super().every(interval, callback)
+        self.tick_interval = min(self.tick_interval or interval, interval)
+    
+    def start(self, server_socket):
+        """Register the listening socket and start the event loop thread"""
+        server_socket.setblocking(False)
+        self.selector.register(server_socket, selectors.EVENT_READ)
+        threading.Thread(target=self.run, daemon=True).start()
+    
+    def run(self):
+        """Event loop"""
+        while True:
+            timeout = self.tick_interval
+            if self.flush_at is not None:
+                wait = max(self.flush_at - time.monotonic(), 0)
+                timeout = wait if timeout is None else min(timeout, wait)
+            events = self.selector.select(timeout)
+            self.now = time.monotonic()
+            for key, mask in events:
+                conn = key.data
+                if conn is None:
+                    self.accept_clients(key.fileobj)
+                    continue
+                
+                try:
+                    if mask & selectors.EVENT_WRITE:
+                        self.flush(conn)
+                    if mask & selectors.EVENT_READ and not conn.closed:
+                        self.read(conn)
+                except (OSError, ProtocolError):
+                    self.close(conn, unexpected=True)
+                except Exception as e:
+                    # Every client shares this thread: a bug in serving one must not stop the others
+                    self.client_failed(conn, e)
+                    
+            if self.tick_interval is not None:
+                if self.next_tick is None or self.now >= self.next_tick:
+                    self.next_tick = self.now + self.tick_interval
+                    self.tick()
+                    
+            if self.pending:
+                self.flush_pending()
+    
+    def flush_pending(self):
+        """Write what was queued for clients in one write per client, at the end of the batching window if there is one"""
+        pending, self.pending = self.pending, []
+        if self.batching.window:
+            if self.flush_at is None:
+                self.flush_at = self.now + self.batching.window
+            if self.now < self.flush_at:
+                # Clients with a full batch are written now, the others wait for the window to end
+                self.pending = [conn for conn in pending if self.batched(conn) and not conn.closed]
+                pending = [conn for conn in pending if not self.batched(conn)]
+            if not self.pending:
+                self.flush_at = None
+        for conn in pending:
+            try:
+                self.flush(conn)
+            except OSError:
+                self.close(conn, unexpected=True)
+            except Exception as e:
+                self.client_failed(conn, e)
+    
+    def batched(self, conn):
+        """Tell whether the frames queued for conn may wait for the batching window to end"""
+        return conn.outbox.size < self.batching.batch_bytes
+    
+    def tick(self):
+        """Called from the event loop every tick_interval seconds"""
+        if self.reaper is not None:
+            self.reap_idle(self.now)
+        self.run_timers(self.now)
+    
+    def accept_clients(self, server_socket):
+        """Accept every pending connection without blocking"""
+        while True:
+            try:
+                client_socket, client_addr = server_socket.accept()
+            except BlockingIOError:
+                return
+            except OSError as e:
+                self.server.connection_error(e)
+                return
+            
+            client_socket.setblocking(False)
+            self.metrics.connections_opened += 1
+            conn = ClientConnection(self.secure(client_socket), client_addr, self.backpressure, self.metrics)
+            conn.handshaking = self.tls is not None
+            self.watch(conn, self.now)
+            self.selector.register(conn.sock, selectors.EVENT_READ, conn)
+    
+    def read(self, conn):
+        """Handle one readable event; a single read may complete many frames"""
+        if conn.handshaking and not self.handshake(conn):
+            return
+        while True:
+            try:
+                received = conn.parser.recv_into(conn.sock)
+            except SSLWantReadError:
+                return  # only part of a TLS record has arrived
+            if not self.received(received):
+                self.close(conn)
+                return
+            conn.last_seen = self.now
+            if not self.dispatch(conn):
+                self.close(conn)
+                return
+            # TLS may hold decrypted data the selector knows nothing about
+            if self.tls is None or conn.closed or not conn.sock.pending():
+                return
+    
+    def handshake(self, conn):
+        """Go on with the TLS handshake of a client; returns True once it is done"""
+        try:
+            conn.sock.do_handshake()
+        except SSLWantReadError:
+            events = selectors.EVENT_READ
+        except SSLWantWriteError:
+            events = selectors.EVENT_READ | selectors.EVENT_WRITE
+        except OSError:
+            self.close(conn)  # not a TLS client, or one that does not trust the certificate
+            return False
+        else:
+            self.secured(conn)
+            self.flush(conn)  # what was queued meanwhile, such as pings
+            return True
+        if self.selector.get_key(conn.sock).events != events:
+            self.selector.modify(conn.sock, events, conn)
+        return False
+    
+    def send(self, conn, frame):
+        """Queue a frame for a client; it is written at the end of the loop iteration"""
+        if conn.closed:
+            return
+        if not conn.outbox.push(frame):
+            self.close(conn, unexpected=True)
+        elif not conn.writing:
+            conn.writing = True
+            self.pending.append(conn)
+    
+    def stream_file(self, conn, stream):
+        """Send a file to a client in chunks, whenever nothing else is queued for it"""
+        if conn.closed:
+            return
+        limit_unsent(conn.sock)
+        conn.outbox.streams.append(stream)
+        if not conn.writing:
+            conn.writing = True
+            self.pending.append(conn)
+    
+    def flush(self, conn):
+        """Write queued frames, watching for writability while some are left"""
+        if conn.closed:
+            return
+        if conn.handshaking:
+            self.handshake(conn)  # which flushes once it is done
+            return
+        conn.writing = not conn.outbox.write_to(conn.sock)
+        
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if conn.writing else 0)
+        if self.selector.get_key(conn.sock).events != events:
+            self.selector.modify(conn.sock, events, conn)
+    
+    def close(self, conn, unexpected=False):
+        """Close a client connection and notify the server once"""
+        if conn.closed:
+            return
+        conn.closed = True
+        self.metrics.connections_closed += 1
+        try:
+            self.selector.unregister(conn.sock)
+            conn.sock.close()
+        finally:
+            if conn.nickname is not None:
+                self.server.remove_client(conn, unexpected)
+
+ENGINES = {
+    'threaded': ThreadedEngine,
+    'selector': SelectorEngine,
+}
+DEFAULT_ENGINE = 'selector'
+
+def create_engine(name, server, backpressure=None, metrics=None, heartbeat=None, batching=None, tls=None):
+    """Create the engine registered under name for server"""
+    return ENGINES[name](server, backpressure, metrics, heartbeat, batching, tls)
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Headless chat server for production deployment
+
+Runs the same server core as the GUI without Tkinter and writes one
+structured log record per server event to stdout or a file. Only the
+command line help is translated; the log stays machine-readable.
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import argparse
+import json
+import logging
+import signal
+import sys
+import threading
+
+from i18n import Catalog, locale_parser, select_locale
+from server_core import REPORT_INTERVAL, add_server_arguments, create_server_core
+
+# Events logged at a level other than INFO; chat text is only logged with --log-level debug
+EVENT_LEVELS = {
+    'message': logging.DEBUG,
+    'direct': logging.DEBUG,
+    'plugin_error': logging.ERROR,
+    'start_failed': logging.ERROR,
+    'connection_error': logging.WARNING,
+    'discovery_error': logging.WARNING,
+    'disconnected': logging.WARNING,
+    'backpressure': logging.WARNING,
+    'throttled': logging.WARNING,
+    'journal_error': logging.ERROR,
+}
+
+class TextFormatter(logging.Formatter):
+    """time level event key=value ..."""
+    
+    def format(self, record):
+        fields = ' '.join(f"{key}={json.dumps(value, ensure_ascii=False)}" for key, value in record.fields.items())
+        return f"{self.formatTime(record)} {record.levelname} {record.msg} {fields}".rstrip()
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+    
+    def format(self, record):
+        entry = {'time': self.formatTime(record), 'level': record.levelname, 'event': record.msg}
+        entry.update(record.fields)
+        return json.dumps(entry, ensure_ascii=False)
+
+FORMATTERS = {
+    'text': TextFormatter,
+    'json': JsonFormatter,
+}
+
+LOG_LEVELS = ('debug', 'info', 'warning', 'error')
+
+def setup_logging(log_file=None, log_format='text', log_level='info'):
+    """Return the event logger writing to log_file, or stdout when it is None"""
+    handler = logging.FileHandler(log_file, encoding='utf-8') if log_file else logging.StreamHandler(sys.stdout)
+    handler.setFormatter(FORMATTERS[log_format]())
+    logger = logging.getLogger('chatverse.server')
+    logger.addHandler(handler)
+    logger.setLevel(log_level.upper())
+    return logger
+
+def run(core, logger):
+    """Serve until interrupted by Ctrl+C or SIGTERM"""
+    core.add_listener(lambda event, fields: logger.log(EVENT_LEVELS.get(event, logging.INFO), event, extra={'fields': fields}))
+    if not core.start():
+        return 1
+    
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopped.set())
+    try:
+        while not stopped.wait(REPORT_INTERVAL):
+            core.report_backpressure()
+    except KeyboardInterrupt:
+        pass
+    core.close()
+    logger.info('stopped', extra={'fields': {}})
+    return 0
+
+def main(argv=None):
+    text = Catalog(select_locale(argv))
+    parser = argparse.ArgumentParser(description=text('server.headless_description'), parents=[locale_parser(text)])
+    add_server_arguments(parser, text)
+    parser.add_argument('--log-file', help=text('help.log_file'))
+    parser.add_argument('--log-format', choices=sorted(FORMATTERS), default='text', help=text('help.log_format'))
+    parser.add_argument('--log-level', choices=LOG_LEVELS, default='info', help=text('help.log_level'))
+    args = parser.parse_args(argv)
+    try:
+        core = create_server_core(args)
+    except ValueError as e:
+        parser.error(str(e))
+    return run(core, setup_logging(args.log_file, args.log_format, args.log_level))
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+"""
+Python version used in the project -> python3.13.7
+
+Python Local Area Network ChatVerse - Encrypted connections (TLS)
+
+A server given a certificate wraps every client connection in TLS 1.2 or
+later. Clients started with --tls do the same and check the certificate
+against the system's trusted ones, or against the file passed with
+--tls-ca, which may be the server's own self-signed certificate made by
+generate_certificate() for testing.
+
+Handshakes are kept cheap. Generated keys are ECDSA P-256, whose signature
+costs the server a fraction of an RSA 2048 one, and the signature is most
+of the work of a full handshake. The server hands every client one session
+ticket, and clients offer the session of their last connection when they
+reconnect. A client coming back after its connection dropped then resumes
+without a certificate or a signature. The ticket keys only live in the
+server process, so after a server restart (or on another worker process)
+the client falls back to a full handshake, spread out by the reconnect
+backoff.
+
+Copyright (C) 2025 Wenyu Xiangxiang Studio
+Licensed under the MIT License
+"""
+
+import os
+import shutil
+import socket
+import ssl
+import subprocess
+import tempfile
+
+MINIMUM_VERSION = ssl.TLSVersion.TLSv1_2
+CURVE = 'prime256v1'       # ECDSA P-256 keys for generated certificates
+CERTIFICATE_DAYS = 365     # validity of generated certificates
+SESSION_TICKETS = 1        # tickets per connection: clients only keep the session of their last one
+HANDSHAKE_TIMEOUT = 10.0   # seconds a blocking handshake may take
+
+class TLSPolicy:
+    """Certificate and key the server wraps client connections with
+    
+    The context is built again in every process the policy is handed to,
+    so worker processes load the certificate themselves.
+    """
+    
+    def __init__(self, certfile, keyfile=None):
+        self.certfile = certfile
+        self.keyfile = keyfile  # None: the key is in the certificate file
+        self.context = server_context(certfile, keyfile)
+    
+    def __getstate__(self):
+        return {'certfile': self.certfile, 'keyfile': self.keyfile}
+    
+    def __setstate__(self, state):
+        self.__init__(state['certfile'], state['keyfile'])
+    
+    def wrap(self, sock):
+        """Wrap an accepted socket; the engine does the handshake when it suits it"""
+        return self.context.wrap_socket(sock, server_side=True, do_handshake_on_connect=False)
+
+def server_context(certfile, keyfile=None):
+    """Return the SSLContext of a server; raises ValueError when the certificate or key cannot be used"""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.minimum_version = MINIMUM_VERSION
+    context.num_tickets = SESSION_TICKETS
+    try:
+        context.load_cert_chain(certfile, keyfile)
+    except (OSError, ssl.SSLError) as e:
+        raise ValueError(f"cannot load the TLS certificate: {e}") from None
+    return context
+
+def client_context(cafile=None):
+    """Return the SSLContext of a client, trusting cafile if given, else the system's certificates"""
+    context = ssl.create_default_context(cafile=cafile)
+    context.minimum_version = MINIMUM_VERSION
+    return context
+
+def wrap_client(sock, context, host, session=None):
+    """Do the handshake of a client connection, offering session to resume it; sock is closed if it fails"""
+    try:
+        return context.wrap_socket(sock, server_hostname=host, session=session)
+    except BaseException:
+        sock.close()
+        raise
+
+def local_names(host=None):
+    """Return the names and addresses this machine is reached by, for the certificate of a server on host"""
+    names = ['localhost', socket.gethostname(), '127.0.0.1', '::1']
+    try:
+        names += socket.gethostbyname_ex(socket.gethostname())[2]
+    except OSError:
+        pass
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+            probe.connect(('10.255.255.255', 1))  # sends nothing, only picks the address of the default route
+            names.append(probe.getsockname()[0])
+    except OSError:
+        pass
+    if host and host not in ('0.0.0.0', '::'):
+        names.append(host)
+    return list(dict.fromkeys(names))
+
+def subject_names(names):
+    """Return the subjectAltName extension value listing names"""
+    entries = []
+    for name in names:
+        try:
+            socket.inet_pton(socket.AF_INET6 if ':' in name else socket.AF_INET, name)
+            entries.append(f'IP:{name}')
+        except OSError:
+            entries.append(f'DNS:{name}')
+    return 'subjectAltName=' + ','.join(entries)
+
+def generate_certificate(certfile, keyfile=None, names=None, days=CERTIFICATE_DAYS):
+    """Make a self-signed certificate for names with the openssl command line tool, for testing
+    
+    The key goes to keyfile, or after the certificate into certfile when
+    keyfile is None, readable by the owner only. Raises OSError when openssl
+    is missing or fails.
+    """
+    names = names or local_names()
+    openssl = shutil.which('openssl')
+    if openssl is None:
+        raise FileNotFoundError("the openssl command is needed to generate a certificate")
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = os.path.join(directory, 'cert.pem'), os.path.join(directory, 'key.pem')
+        result = subprocess.run(
+            [
+                openssl, 'req', '-x509', '-newkey', 'ec', '-pkeyopt', f'ec_paramgen_curve:{CURVE}', '-nodes',
+                '-keyout', key_path, '-out', cert_path, '-days', str(days), '-subj', f'/CN={names[0]}',
+                '-addext', subject_names(names)
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        if result.returncode:
+            details = result.stderr.strip().splitlines()
+            raise OSError(f"openssl failed: {details[-1] if details else result.returncode}")
+        with open(cert_path, 'rb') as f:
+            certificate = f.read()
+        with open(key_path, 'rb') as f:
+            key = f.read()
+    for path in (certfile, keyfile or certfile):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if keyfile is None:
+        write_private(certfile, certificate + key)
+    else:
+        write_private(keyfile, key)
+        with open(certfile, 'wb') as f:
+            f.write(certificate)
+
+def write_private(path, data):
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with open(fd, 'wb') as f:
+        f.write(data)